@@ -0,0 +1,221 @@
+"""
+Intent Classifiers - Decide which agent should answer a query
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.embeddings import word_bucket
+
+# Example phrasings per intent; the mean of their hashed n-gram vectors is the prototype
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "teach": [
+        "teach me the next lesson",
+        "start the lesson",
+        "let's begin",
+        "begin from the first chapter",
+        "next lesson please",
+        "continue with the next section",
+        "walk me through this chapter",
+        "give me an overview of the book",
+        "introduce the two dads",
+        "tell me about lesson 2",
+        "explain this chapter step by step",
+        "I want to learn the book from the beginning",
+        "how do I get started with the course",
+        "go on to the next part",
+        "keep teaching",
+        "move on",
+    ],
+    "search": [
+        "what is an asset",
+        "what does the book say about taxes",
+        "why does rich dad avoid working for money",
+        "how does the author define a liability",
+        "where does the book mention corporations",
+        "find the passage about the rat race",
+        "search for financial freedom",
+        "according to the book what is cash flow",
+        "when did robert start working for rich dad",
+        "what is the difference between rich dad and poor dad",
+        "does the book talk about real estate",
+        "what is financial literacy",
+        "who is mike",
+        "is my house an asset",
+        "how do rich people use corporations",
+        "what did poor dad believe about money",
+    ],
+    "quiz": [
+        "quiz me",
+        "quiz me on chapter 3",
+        "test my knowledge",
+        "give me some questions",
+        "ask me questions about assets",
+        "check my understanding",
+        "challenge me",
+        "what is on the quiz",
+        "can I take a test",
+        "give me a practice exercise",
+        "assess what I learned",
+        "multiple choice questions please",
+        "evaluate me on lesson 1",
+        "I want to be tested",
+        "make a quiz about taxes",
+        "let's do a quiz",
+    ],
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_SUFFIXES = ("ing", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    """Strip a common suffix so "lessons"/"lesson" and "tested"/"test" share a slot"""
+    for suffix in _SUFFIXES:
+        if len(word) > 4 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float
+    # "embedding" when the prototype margin was large enough, else "keyword"
+    source: str
+    scores: Optional[Dict[str, float]] = None
+
+
+class KeywordIntentClassifier:
+    """Ordered substring checks over keyword lists"""
+
+    # Teaching intent keywords
+    teach_keywords = [
+        "teach", "explain", "lesson", "start", "begin", "chapter",
+        "tell me about", "walk me through", "introduce", "overview"
+    ]
+
+    # Search intent keywords
+    search_keywords = [
+        "what", "how", "why", "when", "where", "find", "search",
+        "does the book say", "according to", "mentions"
+    ]
+
+    # Quiz intent keywords
+    quiz_keywords = [
+        "quiz", "test", "question", "assess", "check my",
+        "evaluate", "challenge", "exercise"
+    ]
+
+    def classify(self, query: str) -> IntentPrediction:
+        query_lower = query.lower()
+
+        # Check quiz first (most specific), then teaching, then search
+        for intent, keywords in (("quiz", self.quiz_keywords),
+                                 ("teach", self.teach_keywords),
+                                 ("search", self.search_keywords)):
+            if any(keyword in query_lower for keyword in keywords):
+                return IntentPrediction(intent, 1.0, "keyword")
+
+        # Default to search
+        return IntentPrediction("search", 0.0, "keyword")
+
+    def classify_batch(self, queries: Sequence[str]) -> List[IntentPrediction]:
+        return [self.classify(query) for query in queries]
+
+
+class EmbeddingIntentClassifier:
+    """
+    Prototype classifier over hashed word and bigram vectors.
+
+    Each intent's prototype is the normalized mean of its example vectors,
+    computed once at construction, so a query is scored with one
+    matrix-vector product. Confidence is the margin between the best and the
+    runner-up intent; below min_confidence the keyword classifier decides.
+    """
+
+    def __init__(self, examples: Optional[Dict[str, List[str]]] = None,
+                 min_confidence: float = 0.05, dim: int = 2048,
+                 fallback: Optional[KeywordIntentClassifier] = None):
+        examples = examples or INTENT_EXAMPLES
+        self.dim = dim
+        self.min_confidence = min_confidence
+        self.fallback = fallback or KeywordIntentClassifier()
+        self.intents = list(examples)
+
+        # Inverse document frequency over the examples: "quiz" outweighs "what"
+        counts = self._counts([text for intent in self.intents for text in examples[intent]])
+        document_frequency = (counts > 0).sum(axis=0)
+        self.idf = np.log((1 + len(counts)) / (1 + document_frequency)).astype(np.float32) + 1.0
+
+        vectors = self._normalize(counts * self.idf)
+        bounds = np.cumsum([0] + [len(examples[intent]) for intent in self.intents])
+        self.prototypes = self._normalize(np.stack([
+            vectors[start:end].mean(axis=0) for start, end in zip(bounds, bounds[1:])
+        ]))
+
+    def classify(self, query: str) -> IntentPrediction:
+        """Score one query against the prototypes using only its non-zero slots"""
+        slots: Dict[int, float] = {}
+        for token in self._tokens(query):
+            bucket = word_bucket(token, self.dim)
+            slots[bucket] = slots.get(bucket, 0.0) + 1.0
+        if not slots:
+            return self._predict(query, [0.0] * len(self.intents))
+
+        buckets = np.fromiter(slots, dtype=np.int64, count=len(slots))
+        weights = np.fromiter(slots.values(), dtype=np.float32, count=len(slots)) * self.idf[buckets]
+        scores = self.prototypes[:, buckets] @ (weights / np.linalg.norm(weights))
+        return self._predict(query, scores.tolist())
+
+    def classify_batch(self, queries: Sequence[str]) -> List[IntentPrediction]:
+        """Classify many queries with one sparse product over all their tokens"""
+        rows, buckets = [], []
+        for row, query in enumerate(queries):
+            for token in self._tokens(query):
+                rows.append(row)
+                buckets.append(word_bucket(token, self.dim))
+
+        # (query, slot) pairs with their counts, i.e. the non-zeros of the count matrix
+        keys, counts = np.unique(np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(buckets, dtype=np.int64),
+                                 return_counts=True)
+        key_rows, key_buckets = np.divmod(keys, self.dim)
+        weights = counts * self.idf[key_buckets]
+        norms = np.sqrt(np.bincount(key_rows, weights * weights, minlength=len(queries)))
+        weights /= np.where(norms > 0, norms, 1.0)[key_rows]
+
+        scores = np.stack([
+            np.bincount(key_rows, prototype[key_buckets] * weights, minlength=len(queries))
+            for prototype in self.prototypes
+        ], axis=1)
+        return [self._predict(query, row) for query, row in zip(queries, scores.tolist())]
+
+    def _predict(self, query: str, scores: List[float]) -> IntentPrediction:
+        ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        margin = scores[ranked[0]] - scores[ranked[1]]
+        row_scores = dict(zip(self.intents, scores))
+        if margin < self.min_confidence:
+            return IntentPrediction(self.fallback.classify(query).intent, margin, "keyword", row_scores)
+        return IntentPrediction(self.intents[ranked[0]], margin, "embedding", row_scores)
+
+    def _counts(self, texts: Sequence[str]) -> np.ndarray:
+        """Hashed token counts, one row per text"""
+        counts = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in self._tokens(text):
+                counts[row, word_bucket(token, self.dim)] += 1.0
+        return counts
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        """Lightly stemmed words plus adjacent word pairs"""
+        words = [_stem(word) for word in _TOKEN.findall(text.lower())]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
@@ -2,11 +2,26 @@
 Orchestrator Agent - Routes user queries to appropriate specialized agents
 """
 
-import re
-from typing import Tuple, List, Dict
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, Optional, Tuple, List, Dict
 from agents.tutor_agent import TutorAgent
 from agents.search_agent import SearchAgent
 from agents.quiz_agent import QuizAgent
+from agents.intent import EmbeddingIntentClassifier, IntentPrediction
+from utils.deadline import Deadline
+from utils.embeddings import embed_many
+from utils.retrieval_context import RetrievalContext
+from utils.session_store import DEFAULT_SESSION, SessionStore
+from utils.student_memory import StudentMemorySystem
+from utils.tracing import Span, span, timestamp
+
+# How much a branch's passage relevance (0-1) counts next to its intent score
+FAN_OUT_RELEVANCE_WEIGHT = 0.5
+
+# Runs the candidate retrievals of ambiguous turns for the synchronous entry points
+_fan_out_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fan-out")
 
 
 class OrchestratorAgent:
@@ -15,115 +30,315 @@ class OrchestratorAgent:
     Implements multi-agent coordination pattern.
     """
     
-    def __init__(self):
-        self.tutor = TutorAgent()
+    def __init__(self, session_store: Optional[SessionStore] = None, intent_classifier=None,
+                 fan_out_margin: float = 0.1, turn_budget_ms: Optional[float] = None,
+                 student_memory: Optional[StudentMemorySystem] = None):
+        # Any object with classify(query) -> IntentPrediction; prototypes are built once here
+        self.intent_classifier = intent_classifier or EmbeddingIntentClassifier()
+        # Below this intent confidence the top two agents retrieve concurrently (0 disables)
+        self.fan_out_margin = fan_out_margin
+        # One RetrievalContext per turn is shared by the fan-out and the answering agent;
+        # False gives every agent its own, as before (for comparison)
+        self.shared_retrieval = True
+        # Latency budget of each turn, bounding its Qdrant and LLM calls (TURN_BUDGET_MS when None, 0 disables)
+        self.turn_budget_ms = turn_budget_ms
+        # Agents are shared by every user; per-user state lives in the session store
+        self.sessions = session_store if session_store is not None else SessionStore()
+        self.tutor = TutorAgent(session_store=self.sessions, student_memory=student_memory)
         self.search = SearchAgent()
         self.quiz = QuizAgent()
-        self.conversation_context = []
     
-    def process(self, user_query: str) -> Tuple[str, List[Dict]]:
+    def process(self, user_query: str, session_id: str = DEFAULT_SESSION) -> Tuple[str, List[Dict]]:
         """
         Main processing method - analyzes intent and routes to appropriate agent
         
+        Args:
+            user_query: The student's message
+            session_id: Identifies the student whose lesson progress and context apply
+        
+        Returns:
+            Tuple of (response_text, agent_logs)
+        """
+        turn, context = span("turn", session=session_id), self._new_context()
+        intent, topic, logs = self._resolve(user_query, session_id, context)
+        
+        if intent == "teach":
+            response, agent_logs = self.tutor.teach(user_query, session_id, self._shared(context))
+        elif intent == "quiz":
+            response, agent_logs = self.quiz.generate_quiz(user_query, topic, self._shared(context))
+        else:
+            response, agent_logs = self.search.semantic_search(user_query, self._shared(context))
+        
+        logs.extend(agent_logs)
+        self._end_turn(turn, intent, context, logs)
+        return response, logs
+    
+    async def aprocess(self, user_query: str, session_id: str = DEFAULT_SESSION) -> Tuple[str, List[Dict]]:
+        """
+        Non-blocking variant of process() - awaits the agents' async Qdrant and
+        Groq calls so one event loop can serve many sessions concurrently
+        
         Returns:
             Tuple of (response_text, agent_logs)
         """
+        turn, context = span("turn", session=session_id), self._new_context()
+        intent, topic, logs = await self._aresolve(user_query, session_id, context)
+        
+        if intent == "teach":
+            response, agent_logs = await self.tutor.ateach(user_query, session_id, self._shared(context))
+        elif intent == "quiz":
+            response, agent_logs = await self.quiz.agenerate_quiz(user_query, topic, self._shared(context))
+        else:
+            response, agent_logs = await self.search.asemantic_search(user_query, self._shared(context))
+        
+        logs.extend(agent_logs)
+        self._end_turn(turn, intent, context, logs)
+        return response, logs
+    
+    def stream_process(self, user_query: str, session_id: str = DEFAULT_SESSION) -> Tuple[Iterator[str], List[Dict]]:
+        """
+        Streaming variant of process() - yields text deltas as they arrive from Groq
+        
+        Returns:
+            Tuple of (text deltas, agent_logs); the agent's logs are appended
+            once the deltas are exhausted
+        """
+        turn, context = span("turn", session=session_id), self._new_context()
+        intent, topic, logs = self._resolve(user_query, session_id, context)
+        
+        if intent == "teach":
+            deltas, agent_logs = self.tutor.stream_teach(user_query, session_id, self._shared(context))
+        elif intent == "quiz":
+            deltas, agent_logs = self.quiz.stream_quiz(user_query, topic, self._shared(context))
+        else:
+            deltas, agent_logs = self.search.stream_semantic_search(user_query, self._shared(context))
+        
+        def stream() -> Iterator[str]:
+            yield from deltas
+            logs.extend(agent_logs)
+            self._end_turn(turn, intent, context, logs)
+        
+        return stream(), logs
+    
+    def _resolve(self, user_query: str, session_id: str,
+                 context: RetrievalContext) -> Tuple[str, Optional[str], List[Dict]]:
+        """
+        Decide the agent for this turn, fanning out across the top two
+        candidates when the intent is ambiguous
+        
+        Returns:
+            Tuple of (intent, quiz topic or None, logs)
+        """
+        prediction, logs = self._route(user_query)
+        intent, topic = prediction.intent, None
+        
+        candidates = self._fan_out_candidates(prediction)
+        if candidates:
+            requests = self._branch_requests(candidates, user_query, session_id, context)
+            started = time.perf_counter()
+            futures = {text: _fan_out_pool.submit(self._timed_search, context, text, limit)
+                       for text, limit in requests.values()}
+            
+            results, winner = {}, None
+            pending = set(futures.values())
+            while winner is None:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.update({branch: self._branch_result(futures[text].result(), limit)
+                                for branch, (text, limit) in requests.items()
+                                if branch not in results and futures[text].done()})
+                winner = self._decide(user_query, prediction, requests, results)
+            
+            # A losing retrieval that already runs finishes in the background and only warms the cache
+            for future in pending:
+                future.cancel()
+            intent, topic = self._fan_out_logged(winner, requests, results, started, logs)
+        
+        self._commit(intent, user_query, session_id, logs)
+        return intent, topic, logs
+    
+    async def _aresolve(self, user_query: str, session_id: str,
+                        context: RetrievalContext) -> Tuple[str, Optional[str], List[Dict]]:
+        """Non-blocking variant of _resolve() that cancels the losing branch's retrieval task"""
+        prediction, logs = self._route(user_query)
+        intent, topic = prediction.intent, None
+        
+        candidates = self._fan_out_candidates(prediction)
+        if candidates:
+            requests = self._branch_requests(candidates, user_query, session_id, context)
+            started = time.perf_counter()
+            tasks = {text: asyncio.ensure_future(self._atimed_search(context, text, limit))
+                     for text, limit in requests.values()}
+            
+            results, winner = {}, None
+            pending = set(tasks.values())
+            while winner is None:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                results.update({branch: self._branch_result(tasks[text].result(), limit)
+                                for branch, (text, limit) in requests.items()
+                                if branch not in results and tasks[text].done()})
+                winner = self._decide(user_query, prediction, requests, results)
+            
+            for task in pending:
+                task.cancel()
+            intent, topic = self._fan_out_logged(winner, requests, results, started, logs)
+        
+        self._commit(intent, user_query, session_id, logs)
+        return intent, topic, logs
+    
+    def _route(self, user_query: str) -> Tuple[IntentPrediction, List[Dict]]:
+        """Classify intent and log the classification"""
         logs = []
         
         # Log orchestrator activity
         logs.append({
             "agent": "orchestrator",
             "action": f"Analyzing query: {user_query[:50]}...",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
         
         # Intent classification
-        intent = self._classify_intent(user_query)
+        with span("intent.classify") as classify_span:
+            prediction = self.intent_classifier.classify(user_query)
+            classify_span.set(intent=prediction.intent, source=prediction.source)
         
         logs.append({
             "agent": "orchestrator",
-            "action": f"Classified intent: {intent}",
-            "timestamp": self._get_timestamp()
+            "action": f"Classified intent: {prediction.intent} "
+                      f"(confidence {prediction.confidence:.2f}, {prediction.source})",
+            "intent_confidence": prediction.confidence,
+            "timestamp": timestamp()
         })
         
+        return prediction, logs
+    
+    def _commit(self, intent: str, user_query: str, session_id: str, logs: List[Dict]):
+        """Record the turn in the session and log the routing decision"""
+        session = self.sessions.load(session_id)
+        session.conversation_context.append({"query": user_query, "intent": intent})
+        self.sessions.save(session)
+        
+        # Anything but the next lesson makes the tutor's prefetched section a wasted guess
+        if intent != "teach":
+            self.tutor.cancel_prefetch(session_id)
+        
         # Route to appropriate agent
-        if intent == "teach":
-            logs.append({
-                "agent": "orchestrator",
-                "action": "Routing to Tutor Agent",
-                "timestamp": self._get_timestamp()
-            })
-            response, agent_logs = self.tutor.teach(user_query)
-            logs.extend(agent_logs)
-            
-        elif intent == "search":
-            logs.append({
-                "agent": "orchestrator",
-                "action": "Routing to Search Agent",
-                "timestamp": self._get_timestamp()
-            })
-            response, agent_logs = self.search.semantic_search(user_query)
-            logs.extend(agent_logs)
-            
-        elif intent == "quiz":
-            logs.append({
-                "agent": "orchestrator",
-                "action": "Routing to Quiz Agent",
-                "timestamp": self._get_timestamp()
-            })
-            response, agent_logs = self.quiz.generate_quiz(user_query)
-            logs.extend(agent_logs)
-            
-        else:
+        routes = {
+            "teach": "Routing to Tutor Agent",
+            "search": "Routing to Search Agent",
+            "quiz": "Routing to Quiz Agent"
+        }
+        logs.append({
+            "agent": "orchestrator",
             # Default to search for general questions
+            "action": routes.get(intent, "Default routing to Search Agent"),
+            "timestamp": timestamp()
+        })
+    
+    def _fan_out_candidates(self, prediction: IntentPrediction) -> List[str]:
+        """The top two intents when the classifier is unsure, else nothing"""
+        if not prediction.scores or prediction.confidence >= self.fan_out_margin:
+            return []
+        return sorted(prediction.scores, key=prediction.scores.get, reverse=True)[:2]
+    
+    def _branch_requests(self, candidates: List[str], user_query: str, session_id: str,
+                         context: RetrievalContext) -> Dict[str, Tuple[str, int]]:
+        """The (text, limit) Qdrant search each candidate agent would run, planned in the turn's context"""
+        requests = {}
+        for intent in candidates:
+            if intent == "teach":
+                requests[intent] = self.tutor.retrieval_request(user_query, session_id)
+            elif intent == "quiz":
+                requests[intent] = self.quiz.retrieval_request(user_query)
+            else:
+                requests[intent] = self.search.retrieval_request(user_query)
+            # Branches needing the same text share one fetch at the larger limit
+            context.plan(*requests[intent])
+        return requests
+    
+    @staticmethod
+    def _timed_search(context: RetrievalContext, text: str, limit: int) -> Tuple[List[Dict], float]:
+        start = time.perf_counter()
+        passages = context.search(text, limit)
+        return passages, (time.perf_counter() - start) * 1000
+    
+    @staticmethod
+    async def _atimed_search(context: RetrievalContext, text: str, limit: int) -> Tuple[List[Dict], float]:
+        start = time.perf_counter()
+        passages = await context.asearch(text, limit)
+        return passages, (time.perf_counter() - start) * 1000
+    
+    @staticmethod
+    def _branch_result(result: Tuple[List[Dict], float], limit: int) -> Tuple[List[Dict], float]:
+        passages, duration = result
+        return passages[:limit], duration
+    
+    def _new_context(self) -> RetrievalContext:
+        # The turn's deadline starts here
+        return RetrievalContext(self.search.qdrant, Deadline(self.turn_budget_ms))
+    
+    def _shared(self, context: RetrievalContext) -> Optional[RetrievalContext]:
+        """The context handed to the answering agent"""
+        return context if self.shared_retrieval else None
+    
+    def _end_turn(self, turn: Span, intent: str, context: RetrievalContext, logs: List[Dict]):
+        """Log the turn's Qdrant query count and close its trace span"""
+        # Agents on a private context fetch again; count only what this turn's shared context did
+        logs.append({
+            "agent": "orchestrator",
+            "action": f"Qdrant queries this turn: {context.qdrant_calls}",
+            "qdrant_calls": context.qdrant_calls,
+            "timestamp": timestamp()
+        })
+        turn.end(intent=intent, qdrant_calls=context.qdrant_calls)
+    
+    def _decide(self, user_query: str, prediction: IntentPrediction, requests: Dict[str, Tuple[str, int]],
+                results: Dict[str, Tuple[List[Dict], float]]) -> Optional[str]:
+        """
+        Pick the branch whose intent score plus passage relevance is highest,
+        as soon as no pending branch could still overtake it
+        """
+        if not results:
+            return None
+        
+        combined = {}
+        with span("embed", texts=1 + sum(len(passages) for passages, _ in results.values())):
+            query_vector = embed_many([user_query])[0]
+            for intent, (passages, _) in results.items():
+                relevance = float((embed_many([p["text"] for p in passages]) @ query_vector).max()) if passages else 0.0
+                combined[intent] = prediction.scores[intent] + FAN_OUT_RELEVANCE_WEIGHT * relevance
+        
+        best = max(combined, key=combined.get)
+        pending = [intent for intent in requests if intent not in results]
+        if all(combined[best] >= prediction.scores[intent] + FAN_OUT_RELEVANCE_WEIGHT for intent in pending):
+            return best
+        return None
+    
+    def _fan_out_logged(self, winner: str, requests: Dict[str, Tuple[str, int]],
+                        results: Dict[str, Tuple[List[Dict], float]], started: float,
+                        logs: List[Dict]) -> Tuple[str, Optional[str]]:
+        """Log each branch's retrieval timing and the decision; return the winner and its quiz topic"""
+        elapsed = (time.perf_counter() - started) * 1000
+        for intent, (text, limit) in requests.items():
+            if intent in results:
+                passages, duration = results[intent]
+                action = f"Fan-out branch {intent}: retrieved {len(passages)} passages for '{text[:40]}'"
+            else:
+                duration = elapsed
+                action = f"Fan-out branch {intent}: cancelled"
             logs.append({
                 "agent": "orchestrator",
-                "action": "Default routing to Search Agent",
-                "timestamp": self._get_timestamp()
+                "action": f"{action} ({duration:.0f}ms)",
+                "branch": intent,
+                "duration_ms": round(duration, 1),
+                "winner": intent == winner,
+                "timestamp": timestamp()
             })
-            response, agent_logs = self.search.semantic_search(user_query)
-            logs.extend(agent_logs)
         
-        return response, logs
-    
-    def _classify_intent(self, query: str) -> str:
-        """Classify user intent based on query patterns"""
-        query_lower = query.lower()
-        
-        # Teaching intent keywords
-        teach_keywords = [
-            "teach", "explain", "lesson", "start", "begin", "chapter",
-            "tell me about", "walk me through", "introduce", "overview"
-        ]
-        
-        # Search intent keywords
-        search_keywords = [
-            "what", "how", "why", "when", "where", "find", "search",
-            "does the book say", "according to", "mentions"
-        ]
-        
-        # Quiz intent keywords
-        quiz_keywords = [
-            "quiz", "test", "question", "assess", "check my",
-            "evaluate", "challenge", "exercise"
-        ]
-        
-        # Check quiz first (most specific)
-        if any(keyword in query_lower for keyword in quiz_keywords):
-            return "quiz"
-        
-        # Then teaching
-        if any(keyword in query_lower for keyword in teach_keywords):
-            return "teach"
-        
-        # Then search
-        if any(keyword in query_lower for keyword in search_keywords):
-            return "search"
-        
-        # Default to search
-        return "search"
-    
-    def _get_timestamp(self):
-        """Get current timestamp"""
-        from datetime import datetime
-        return datetime.now().strftime("%H:%M:%S")
+        logs.append({
+            "agent": "orchestrator",
+            "action": f"Ambiguous intent resolved to {winner} after {elapsed:.0f}ms",
+            "timestamp": timestamp()
+        })
+        
+        topic = requests[winner][0] if winner == "quiz" else None
+        return winner, topic
@@ -2,10 +2,14 @@
 Quiz Agent - Generates questions from Qdrant-retrieved content
 """
 
-import os
-from typing import Tuple, List, Dict
-from groq import Groq
-from utils.qdrant_client import QdrantManager
+from typing import Iterator, Optional, Tuple, List, Dict
+from groq import APIError
+from utils.circuit_breaker import CircuitOpenError
+from utils.clients import get_async_groq_client, get_breaker, get_groq_client, get_qdrant_manager
+from utils.context_packing import pack_passages
+from utils.deadline import budgeted_completion, log_degraded, stream_completion
+from utils.retrieval_context import RetrievalContext, turn_context
+from utils.tracing import span, timestamp
 import random
 
 
@@ -14,57 +18,146 @@ class QuizAgent:
     Specialized agent for generating quizzes.
     Retrieves context from Qdrant and generates questions.
     """
-    
+
+    # Prompt tokens the retrieved passages may take (None: every passage, as retrieved)
+    CONTEXT_TOKENS = 480
+
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.qdrant = QdrantManager()
-    
-    def generate_quiz(self, query: str) -> Tuple[str, List[Dict]]:
-        """Generate quiz questions based on book content"""
-        logs = []
-        
-        logs.append({
-            "agent": "quiz",
-            "action": "Preparing quiz generation",
-            "timestamp": self._get_timestamp()
-        })
-        
+        self.groq_client = get_groq_client()
+        self.groq_breaker = get_breaker("groq")
+        self.qdrant = get_qdrant_manager()
         # Select random topics from the book
-        topics = [
+        self.topics = [
             "assets and liabilities",
             "financial literacy",
             "working for money vs money working for you",
             "corporation and taxes",
             "overcoming fear and obstacles"
         ]
-        
-        selected_topic = random.choice(topics)
-        
+
+    def generate_quiz(self, query: str, topic: Optional[str] = None,
+                      context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
+        """Generate quiz questions based on book content, on a random topic unless one is given"""
+        selected_topic, logs = self._start(query, topic)
+        context = turn_context(context, self.qdrant)
+
+        retrieved_content = context.search(selected_topic, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        client, args = budgeted_completion(self.groq_client, self._completion_args(selected_topic, retrieved_content),
+                                           context.deadline, "quiz", logs)
+        try:
+            with span("llm.completion", agent="quiz"):
+                response = self.groq_breaker.call(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            return self._finish(self._degraded(retrieved_content, e, logs), selected_topic, logs), logs
+
+        return self._finish(response.choices[0].message.content, selected_topic, logs), logs
+
+    async def agenerate_quiz(self, query: str, topic: Optional[str] = None,
+                             context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
+        """Non-blocking variant of generate_quiz() on the async Qdrant and Groq clients"""
+        selected_topic, logs = self._start(query, topic)
+        context = turn_context(context, self.qdrant)
+
+        retrieved_content = await context.asearch(selected_topic, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        client, args = budgeted_completion(get_async_groq_client(),
+                                           self._completion_args(selected_topic, retrieved_content),
+                                           context.deadline, "quiz", logs)
+        try:
+            with span("llm.completion", agent="quiz"):
+                response = await self.groq_breaker.acall(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            return self._finish(self._degraded(retrieved_content, e, logs), selected_topic, logs), logs
+
+        return self._finish(response.choices[0].message.content, selected_topic, logs), logs
+
+    def stream_quiz(self, query: str, topic: Optional[str] = None,
+                    context: Optional[RetrievalContext] = None) -> Tuple[Iterator[str], List[Dict]]:
+        """
+        Streaming variant of generate_quiz()
+
+        Returns:
+            Tuple of (text deltas, agent_logs); the logs are complete once
+            the deltas are exhausted
+        """
+        selected_topic, logs = self._start(query, topic)
+        return self._stream(selected_topic, logs, context), logs
+
+    def _stream(self, selected_topic: str, logs: List[Dict], context: Optional[RetrievalContext]) -> Iterator[str]:
+        context = turn_context(context, self.qdrant)
+        retrieved_content = context.search(selected_topic, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        yield self._header(selected_topic)
+
+        client, args = budgeted_completion(self.groq_client, self._completion_args(selected_topic, retrieved_content),
+                                           context.deadline, "quiz", logs)
+        yield from stream_completion(client, self.groq_breaker, args, context.deadline, "quiz", logs,
+                                     lambda error: self._degraded(retrieved_content, error, logs), output="quiz")
+        yield self._complete(logs)
+
+    def retrieval_request(self, query: str) -> Tuple[str, int]:
+        """Pick a topic and return the (text, limit) Qdrant search a quiz on it runs"""
+        return random.choice(self.topics), 3
+
+    def _start(self, query: str, topic: Optional[str]) -> Tuple[str, List[Dict]]:
+        logs = []
+
+        logs.append({
+            "agent": "quiz",
+            "action": "Preparing quiz generation",
+            "timestamp": timestamp()
+        })
+
+        selected_topic = topic or random.choice(self.topics)
+
         # Retrieve relevant content
         logs.append({
             "agent": "quiz",
             "action": f"Retrieving content about: {selected_topic}",
             "qdrant_query": selected_topic,
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
-        retrieved_content = self.qdrant.search(selected_topic, limit=3)
-        
+
+        return selected_topic, logs
+
+    def _retrieved(self, retrieved_content: List[Dict], logs: List[Dict]):
         logs.append({
             "agent": "quiz",
             "action": f"Retrieved {len(retrieved_content)} passages",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
+        if any(item.get("fallback") for item in retrieved_content):
+            logs.append({
+                "agent": "quiz",
+                "action": "Qdrant unavailable in time; using fallback passages",
+                "degraded": "fallback_passages",
+                "timestamp": timestamp()
+            })
+
         # Generate quiz
         logs.append({
             "agent": "quiz",
             "action": "Generating quiz with Groq LLM",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
+    @staticmethod
+    def _degraded(retrieved_content: List[Dict], error: Exception, logs: List[Dict]) -> str:
+        """Offer a passage to review when the quiz could not be generated in time"""
+        log_degraded("quiz", error, logs, "offering a passage to review")
+        passage = retrieved_content[0]["text"] if retrieved_content else ""
+        return f"I couldn't put the quiz together in time. Review this passage and ask again:\n\n> {passage}"
+
+    def _completion_args(self, selected_topic: str, retrieved_content: List[Dict]) -> Dict:
+        if self.CONTEXT_TOKENS is not None:
+            retrieved_content, _ = pack_passages(retrieved_content, self.CONTEXT_TOKENS)
         context = "\n\n".join([item["text"] for item in retrieved_content])
-        
+
         prompt = f"""You are creating a quiz about "Rich Dad Poor Dad" by Robert Kiyosaki.
 
 Topic: {selected_topic}
@@ -89,29 +182,30 @@ D) [option]
 ✓ **Answer:** [letter] - [brief explanation]
 
 Quiz:"""
-        
-        response = self.groq_client.chat.completions.create(
-            messages=[
+
+        return {
+            "messages": [
                 {"role": "system", "content": "You are a quiz creator for Rich Dad Poor Dad."},
                 {"role": "user", "content": prompt}
             ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.8,
-            max_tokens=600
-        )
-        
-        quiz = response.choices[0].message.content
-        
-        full_response = f"📝 **Quiz Time!** (Topic: {selected_topic})\n\n{quiz}\n\n*Take your time and think through each answer!*"
-        
+            "model": "llama-3.3-70b-versatile",
+            "temperature": 0.8,
+            "max_tokens": 600
+        }
+
+    def _finish(self, quiz: str, selected_topic: str, logs: List[Dict]) -> str:
+        return f"{self._header(selected_topic)}{quiz}{self._complete(logs)}"
+
+    @staticmethod
+    def _header(selected_topic: str) -> str:
+        return f"📝 **Quiz Time!** (Topic: {selected_topic})\n\n"
+
+    def _complete(self, logs: List[Dict]) -> str:
+        """Log completion and return the closing line"""
         logs.append({
             "agent": "quiz",
             "action": "Quiz generated successfully",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
-        return full_response, logs
-    
-    def _get_timestamp(self):
-        from datetime import datetime
-        return datetime.now().strftime("%H:%M:%S")
+
+        return "\n\n*Take your time and think through each answer!*"
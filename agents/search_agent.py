@@ -2,10 +2,18 @@
 Search Agent - Semantic search powered by Qdrant vector database
 """
 
-import os
-from typing import Tuple, List, Dict
-from groq import Groq
-from utils.qdrant_client import QdrantManager
+from typing import Iterator, Optional, Tuple, List, Dict
+from groq import APIError
+from utils.circuit_breaker import CircuitOpenError
+from utils.clients import get_async_groq_client, get_breaker, get_groq_client, get_qdrant_manager
+from utils.context_packing import pack_passages
+from utils.deadline import Deadline, budgeted_completion, log_degraded, stream_completion
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_context import RetrievalContext, turn_context
+from utils.tracing import span, timestamp
+
+# Similarity at which a cached answer to another question stands in once the turn is out of time
+DEGRADED_CACHE_THRESHOLD = 0.75
 
 
 class SearchAgent:
@@ -13,52 +21,216 @@ class SearchAgent:
     Specialized agent for semantic search across book content.
     Uses Qdrant for vector similarity search.
     """
-    
+
+    NO_RESULTS = "I couldn't find relevant information in the book. Try rephrasing your question!"
+    # Prompt tokens the retrieved passages may take (None: every passage, as retrieved)
+    CONTEXT_TOKENS = 800
+
     def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.qdrant = QdrantManager()
-    
-    def semantic_search(self, query: str) -> Tuple[str, List[Dict]]:
+        self.groq_client = get_groq_client()
+        self.groq_breaker = get_breaker("groq")
+        self.qdrant = get_qdrant_manager()
+        self.response_cache = SemanticResponseCache()
+
+    def semantic_search(self, query: str, context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
         """Perform semantic search and generate answer"""
+        logs = self._start(query)
+        context = turn_context(context, self.qdrant)
+
+        cached = self._cached(query, logs, context.deadline)
+        if cached:
+            return self._finish(cached["answer"], cached["results"], logs), logs
+
+        search_results = context.search(*self.retrieval_request(query))
+
+        if not self._retrieved(search_results, logs):
+            return self.NO_RESULTS, logs
+
+        client, args = budgeted_completion(self.groq_client, self._completion_args(query, search_results),
+                                           context.deadline, "search", logs)
+        try:
+            with span("llm.completion", agent="search"):
+                response = self.groq_breaker.call(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            return self._finish(self._degraded(search_results, e, logs), search_results, logs), logs
+
+        answer = self._remember(query, response.choices[0].message.content, search_results)
+        return self._finish(answer, search_results, logs), logs
+
+    async def asemantic_search(self, query: str,
+                               context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
+        """Non-blocking variant of semantic_search() on the async Qdrant and Groq clients"""
+        logs = self._start(query)
+        context = turn_context(context, self.qdrant)
+
+        cached = self._cached(query, logs, context.deadline)
+        if cached:
+            return self._finish(cached["answer"], cached["results"], logs), logs
+
+        search_results = await context.asearch(*self.retrieval_request(query))
+
+        if not self._retrieved(search_results, logs):
+            return self.NO_RESULTS, logs
+
+        client, args = budgeted_completion(get_async_groq_client(), self._completion_args(query, search_results),
+                                           context.deadline, "search", logs)
+        try:
+            with span("llm.completion", agent="search"):
+                response = await self.groq_breaker.acall(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            return self._finish(self._degraded(search_results, e, logs), search_results, logs), logs
+
+        answer = self._remember(query, response.choices[0].message.content, search_results)
+        return self._finish(answer, search_results, logs), logs
+
+    def stream_semantic_search(self, query: str,
+                               context: Optional[RetrievalContext] = None) -> Tuple[Iterator[str], List[Dict]]:
+        """
+        Streaming variant of semantic_search()
+
+        Returns:
+            Tuple of (text deltas, agent_logs); the sources footer is the last
+            delta and the logs are complete once the deltas are exhausted
+        """
+        logs = self._start(query)
+        return self._stream(query, logs, context), logs
+
+    def _stream(self, query: str, logs: List[Dict], context: Optional[RetrievalContext]) -> Iterator[str]:
+        context = turn_context(context, self.qdrant)
+        cached = self._cached(query, logs, context.deadline)
+        if cached:
+            yield cached["answer"]
+            yield self._complete(cached["results"], logs)
+            return
+
+        search_results = context.search(*self.retrieval_request(query))
+
+        if not self._retrieved(search_results, logs):
+            yield self.NO_RESULTS
+            return
+
+        client, args = budgeted_completion(self.groq_client, self._completion_args(query, search_results),
+                                           context.deadline, "search", logs)
+        answer = yield from stream_completion(client, self.groq_breaker, args, context.deadline, "search", logs,
+                                              lambda error: self._degraded(search_results, error, logs))
+        if answer is not None:
+            self._remember(query, answer, search_results)
+        yield self._complete(search_results, logs)
+
+    def retrieval_request(self, query: str) -> Tuple[str, int]:
+        """The (text, limit) Qdrant search semantic_search() runs for this query"""
+        return query, 5
+
+    def _start(self, query: str) -> List[Dict]:
         logs = []
-        
+
         logs.append({
             "agent": "search",
             "action": f"Initiating semantic search: {query[:50]}...",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
+        return logs
+
+    def _cached(self, query: str, logs: List[Dict], deadline: Deadline) -> Optional[Dict]:
+        """
+        Look the query up in the response cache, accepting a looser match when the
+        turn's budget is nearly spent; on a miss, log the Qdrant search that follows
+        """
+        query_vector = self.response_cache.embed(query)
+        hit = self.response_cache.get("search", query_vector, self.qdrant.content_version)
+
+        if not hit and deadline.nearly_spent():
+            hit = self.response_cache.get("search", query_vector, self.qdrant.content_version,
+                                          threshold=DEGRADED_CACHE_THRESHOLD)
+            if hit:
+                logs.append({
+                    "agent": "search",
+                    "action": f"Latency budget nearly spent; reusing a similar cached answer (similarity {hit[1]:.2f})",
+                    "cache": "hit",
+                    "degraded": "cached_answer",
+                    "timestamp": timestamp()
+                })
+                return hit[0]
+
+        if hit:
+            cached, similarity = hit
+            logs.append({
+                "agent": "search",
+                "action": f"Response cache hit (similarity {similarity:.2f})",
+                "cache": "hit",
+                "timestamp": timestamp()
+            })
+            return cached
+
+        logs.append({
+            "agent": "search",
+            "action": "Response cache miss",
+            "cache": "miss",
+            "timestamp": timestamp()
+        })
+
         # Perform Qdrant vector search
         logs.append({
             "agent": "search",
             "action": "Searching Qdrant vector database",
             "qdrant_query": query,
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
-        search_results = self.qdrant.search(query, limit=5)
-        
+        return None
+
+    def _remember(self, query: str, answer: str, search_results: List[Dict]) -> str:
+        """Cache the generated answer with the passages it was based on, unless those were fallbacks"""
+        if any(item.get("fallback") for item in search_results):
+            return answer
+        size = len(answer) + sum(len(item["text"]) for item in search_results)
+        self.response_cache.put(
+            "search", self.response_cache.embed(query),
+            {"answer": answer, "results": search_results}, size, self.qdrant.content_version
+        )
+        return answer
+
+    def _retrieved(self, search_results: List[Dict], logs: List[Dict]) -> bool:
         logs.append({
             "agent": "search",
             "action": f"Found {len(search_results)} relevant passages",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
         if not search_results:
-            return "I couldn't find relevant information in the book. Try rephrasing your question!", logs
-        
+            return False
+
+        if any(item.get("fallback") for item in search_results):
+            logs.append({
+                "agent": "search",
+                "action": "Qdrant unavailable in time; using fallback passages",
+                "degraded": "fallback_passages",
+                "timestamp": timestamp()
+            })
+
         # Generate answer from retrieved context
         logs.append({
             "agent": "search",
             "action": "Generating answer with Groq LLM",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+        return True
+
+    @staticmethod
+    def _degraded(search_results: List[Dict], error: Exception, logs: List[Dict]) -> str:
+        """Answer with the best passage when the LLM call failed or ran out of time"""
+        log_degraded("search", error, logs, "answering with the top passage")
+        return f"I couldn't finish a full answer in time. The most relevant passage from the book:\n\n> {search_results[0]['text']}"
+
+    def _completion_args(self, query: str, search_results: List[Dict]) -> Dict:
+        if self.CONTEXT_TOKENS is not None:
+            # "[Passage n]: " and the blank line after each passage
+            search_results, _ = pack_passages(search_results, self.CONTEXT_TOKENS, overhead_tokens=6)
         context = "\n\n".join([
             f"[Passage {i+1}]: {item['text']}"
             for i, item in enumerate(search_results)
         ])
-        
+
         prompt = f"""You are answering questions about "Rich Dad Poor Dad" by Robert Kiyosaki.
 
 User Question: {query}
@@ -71,35 +243,32 @@ Cite specific concepts from the book.
 If the passages don't fully answer the question, say so.
 
 Answer:"""
-        
-        response = self.groq_client.chat.completions.create(
-            messages=[
+
+        return {
+            "messages": [
                 {"role": "system", "content": "You are a knowledgeable assistant for Rich Dad Poor Dad."},
                 {"role": "user", "content": prompt}
             ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.6,
-            max_tokens=400
-        )
-        
-        answer = response.choices[0].message.content
-        
+            "model": "llama-3.3-70b-versatile",
+            "temperature": 0.6,
+            "max_tokens": 400
+        }
+
+    def _finish(self, answer: str, search_results: List[Dict], logs: List[Dict]) -> str:
+        return f"{answer}{self._complete(search_results, logs)}"
+
+    def _complete(self, search_results: List[Dict], logs: List[Dict]) -> str:
+        """Log completion and return the sources footer"""
         # Add source information
         sources = "\n\n📚 **Sources:**\n"
         for i, item in enumerate(search_results[:3], 1):
             score = item.get('score', 0)
             sources += f"- Passage {i} (relevance: {score:.2f})\n"
-        
-        full_response = f"{answer}{sources}"
-        
+
         logs.append({
             "agent": "search",
             "action": "Search complete",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
-        return full_response, logs
-    
-    def _get_timestamp(self):
-        from datetime import datetime
-        return datetime.now().strftime("%H:%M:%S")
+
+        return sources
@@ -2,10 +2,39 @@
 Tutor Agent - Sequential teaching with Qdrant-powered content retrieval
 """
 
+import asyncio
 import os
-from typing import Tuple, List, Dict
-from groq import Groq
-from utils.qdrant_client import QdrantManager
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Iterator, Optional, Tuple, List, Dict
+from groq import APIError
+from utils.circuit_breaker import CircuitOpenError
+from utils.clients import get_async_groq_client, get_breaker, get_groq_client, get_qdrant_manager
+from utils.context_packing import pack_passages
+from utils.deadline import Deadline, budgeted_completion, log_degraded, stream_completion
+from utils.lesson_pack import LessonPack
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_context import RetrievalContext, turn_context
+from utils.session_store import DEFAULT_SESSION, SessionState, SessionStore
+from utils.student_memory import StudentMemorySystem
+from utils.tracing import span, timestamp
+
+# Shared by all tutors so speculative work never holds more than a few threads
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TUTOR_PREFETCH_WORKERS", "4")), thread_name_prefix="tutor-prefetch"
+)
+# Records student progress off the turn path; one worker keeps each student's updates in order
+_progress_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="student-progress")
+
+
+class _Prefetch:
+    """Speculative retrieval (and optionally generation) of the section a tutor will teach next"""
+
+    def __init__(self, section_name: str):
+        self.section_name = section_name
+        self.cancelled = threading.Event()
+        self.tokens = 0
+        self.future: Optional[Future] = None
 
 
 class TutorAgent:
@@ -13,11 +42,36 @@ class TutorAgent:
     Specialized agent for sequential teaching.
     Uses Qdrant to retrieve relevant book sections and Groq for generation.
     """
-    
-    def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        self.qdrant = QdrantManager()
-        self.current_section = 0
+
+    # Prompt tokens the retrieved passages may take (None: every passage, as retrieved)
+    CONTEXT_TOKENS = 480
+    # Teaching style recorded in student profiles (one of the notebook's teaching styles)
+    TEACHING_STYLE = "Balanced and Informative"
+
+    def __init__(self, lesson_pack: Optional[LessonPack] = None, fast_mode: Optional[bool] = None,
+                 session_store: Optional[SessionStore] = None,
+                 student_memory: Optional[StudentMemorySystem] = None):
+        self.groq_client = get_groq_client()
+        self.groq_breaker = get_breaker("groq")
+        self.qdrant = get_qdrant_manager()
+        # Lesson progress is per student; the agent itself is shared by all sessions
+        self.sessions = session_store if session_store is not None else SessionStore()
+        # Opt-in (a student_memory, or STUDENT_MEMORY=1): each taught section is recorded in the student's
+        # profile, keyed by session id
+        if student_memory is None and os.getenv("STUDENT_MEMORY") == "1":
+            student_memory = StudentMemorySystem()
+        self.student_memory = student_memory
+        self.response_cache = SemanticResponseCache()
+        # Precomputed passages/explanations per section (LESSON_PACK_PATH); in fast mode a
+        # packed explanation is returned as is, without an LLM call
+        self.lesson_pack = lesson_pack if lesson_pack is not None else LessonPack.from_env()
+        self.fast_mode = fast_mode if fast_mode is not None else os.getenv("TUTOR_FAST_MODE") == "1"
+        # After each answer the next section is fetched in the background; with
+        # TUTOR_PREFETCH_GENERATE=1 its explanation is generated ahead of time too
+        self.prefetch_enabled = os.getenv("TUTOR_PREFETCH", "1") == "1"
+        self.prefetch_generate = os.getenv("TUTOR_PREFETCH_GENERATE") == "1"
+        self.prefetch_stats = {"issued": 0, "hits": 0, "cancelled": 0, "wasted_tokens": 0}
+        self._stats_lock = threading.Lock()
         self.sections = [
             "Introduction and Background",
             "The Two Dads Philosophy",
@@ -30,49 +84,415 @@ class TutorAgent:
             "Overcoming Obstacles",
             "Getting Started - Action Steps"
         ]
-    
-    def teach(self, query: str) -> Tuple[str, List[Dict]]:
-        """Teach a section using Qdrant retrieval + Groq generation"""
+
+    def teach(self, query: str, session_id: str = DEFAULT_SESSION,
+              context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
+        """Teach the session's current section using Qdrant retrieval + Groq generation"""
+        session, section_name, logs = self._start(query, session_id)
+        context = turn_context(context, self.qdrant)
+
+        cached = self._cached(query, section_name, logs, context.deadline)
+        if cached is not None:
+            return self._finish(cached, session, section_name, logs), logs
+
+        retrieved_content, packed_answer = self._lesson(session, section_name, logs, context.deadline)
+        if packed_answer is not None:
+            return self._finish(packed_answer, session, section_name, logs), logs
+
+        if retrieved_content is None:
+            retrieved_content = context.search(section_name, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        client, args = budgeted_completion(self.groq_client,
+                                           self._completion_args(query, section_name, retrieved_content),
+                                           context.deadline, "tutor", logs)
+        try:
+            with span("llm.completion", agent="tutor"):
+                response = self.groq_breaker.call(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            degraded = self._degraded(section_name, retrieved_content, e, logs)
+            return self._finish(degraded, session, section_name, logs), logs
+
+        answer = self._remember(query, section_name, response.choices[0].message.content, retrieved_content)
+        return self._finish(answer, session, section_name, logs), logs
+
+    async def ateach(self, query: str, session_id: str = DEFAULT_SESSION,
+                     context: Optional[RetrievalContext] = None) -> Tuple[str, List[Dict]]:
+        """Non-blocking variant of teach() on the async Qdrant and Groq clients"""
+        session, section_name, logs = self._start(query, session_id)
+        context = turn_context(context, self.qdrant)
+
+        cached = self._cached(query, section_name, logs, context.deadline)
+        if cached is not None:
+            return self._finish(cached, session, section_name, logs), logs
+
+        await self._prefetch_settled(session, context.deadline)
+        retrieved_content, packed_answer = self._lesson(session, section_name, logs, context.deadline)
+        if packed_answer is not None:
+            return self._finish(packed_answer, session, section_name, logs), logs
+
+        if retrieved_content is None:
+            retrieved_content = await context.asearch(section_name, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        client, args = budgeted_completion(get_async_groq_client(),
+                                           self._completion_args(query, section_name, retrieved_content),
+                                           context.deadline, "tutor", logs)
+        try:
+            with span("llm.completion", agent="tutor"):
+                response = await self.groq_breaker.acall(client.chat.completions.create, **args)
+        except (APIError, CircuitOpenError) as e:
+            degraded = self._degraded(section_name, retrieved_content, e, logs)
+            return self._finish(degraded, session, section_name, logs), logs
+
+        answer = self._remember(query, section_name, response.choices[0].message.content, retrieved_content)
+        return self._finish(answer, session, section_name, logs), logs
+
+    def stream_teach(self, query: str, session_id: str = DEFAULT_SESSION,
+                     context: Optional[RetrievalContext] = None) -> Tuple[Iterator[str], List[Dict]]:
+        """
+        Streaming variant of teach()
+
+        Returns:
+            Tuple of (text deltas, agent_logs); the progress footer is the last
+            delta and the logs are complete once the deltas are exhausted
+        """
+        session, section_name, logs = self._start(query, session_id)
+        return self._stream(query, session, section_name, logs, context), logs
+
+    def _stream(self, query: str, session: SessionState, section_name: str, logs: List[Dict],
+                context: Optional[RetrievalContext]) -> Iterator[str]:
+        context = turn_context(context, self.qdrant)
+        cached = self._cached(query, section_name, logs, context.deadline)
+        if cached is not None:
+            yield self._header(section_name)
+            yield cached
+            yield self._complete(session, logs)
+            return
+
+        retrieved_content, packed_answer = self._lesson(session, section_name, logs, context.deadline)
+        if packed_answer is not None:
+            yield self._header(section_name)
+            yield packed_answer
+            yield self._complete(session, logs)
+            return
+
+        if retrieved_content is None:
+            retrieved_content = context.search(section_name, limit=3)
+        self._retrieved(retrieved_content, logs)
+
+        yield self._header(section_name)
+
+        client, args = budgeted_completion(self.groq_client,
+                                           self._completion_args(query, section_name, retrieved_content),
+                                           context.deadline, "tutor", logs)
+        answer = yield from stream_completion(client, self.groq_breaker, args, context.deadline, "tutor", logs,
+                                              lambda error: self._degraded(section_name, retrieved_content, error,
+                                                                           logs),
+                                              output="explanation")
+        if answer is not None:
+            self._remember(query, section_name, answer, retrieved_content)
+        yield self._complete(session, logs)
+
+    def _start(self, query: str, session_id: str) -> Tuple[SessionState, str, List[Dict]]:
+        session = self.sessions.load(session_id)
         logs = []
-        
+
         logs.append({
             "agent": "tutor",
             "action": "Preparing teaching content",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
         # Determine which section to teach
+        session.current_section = self._section_index(query, session)
+        section_name = self.sections[session.current_section]
+
+        return session, section_name, logs
+
+    def retrieval_request(self, query: str, session_id: str = DEFAULT_SESSION) -> Tuple[str, int]:
+        """The (text, limit) Qdrant search teach() would run for this query, without advancing the session"""
+        return self.sections[self._section_index(query, self.sessions.load(session_id))], 3
+
+    @staticmethod
+    def _section_index(query: str, session: SessionState) -> int:
         if "start" in query.lower() or "begin" in query.lower():
-            self.current_section = 0
-        
-        section_name = self.sections[self.current_section]
-        
-        # Retrieve relevant content from Qdrant
+            return 0
+        return session.current_section
+
+    def _cached(self, query: str, section_name: str, logs: List[Dict], deadline: Deadline) -> Optional[str]:
+        """
+        Look up an explanation of this section for a similar query; once the
+        turn's budget is nearly spent, any cached explanation of the section will do
+        """
+        namespace, query_vector = f"tutor:{section_name}", self.response_cache.embed(query)
+        hit = self.response_cache.get(namespace, query_vector, self.qdrant.content_version)
+
+        if not hit and deadline.nearly_spent():
+            hit = self.response_cache.get(namespace, query_vector, self.qdrant.content_version, threshold=-1.0)
+            if hit:
+                logs.append({
+                    "agent": "tutor",
+                    "action": "Latency budget nearly spent; reusing a cached explanation of this section",
+                    "cache": "hit",
+                    "degraded": "cached_answer",
+                    "timestamp": timestamp()
+                })
+                return hit[0]
+
+        if hit:
+            answer, similarity = hit
+            logs.append({
+                "agent": "tutor",
+                "action": f"Response cache hit (similarity {similarity:.2f})",
+                "cache": "hit",
+                "timestamp": timestamp()
+            })
+            return answer
+
         logs.append({
             "agent": "tutor",
-            "action": f"Querying Qdrant for: {section_name}",
-            "qdrant_query": section_name,
-            "timestamp": self._get_timestamp()
+            "action": "Response cache miss",
+            "cache": "miss",
+            "timestamp": timestamp()
         })
-        
-        retrieved_content = self.qdrant.search(section_name, limit=3)
-        
+        return None
+
+    def _lesson(self, session: SessionState, section_name: str, logs: List[Dict],
+                deadline: Deadline) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Packed passages for this section, plus the packed explanation in fast mode
+        or when the turn's budget is nearly spent; otherwise the result of a
+        matching prefetch. Logs the Qdrant query that follows when neither is available.
+        """
+        passages = self.lesson_pack.passages(section_name) if self.lesson_pack else None
+        if passages is None:
+            prefetched = self._take_prefetch(session, section_name, logs, deadline)
+            if prefetched is not None:
+                return prefetched
+
+            # Retrieve relevant content from Qdrant
+            logs.append({
+                "agent": "tutor",
+                "action": f"Querying Qdrant for: {section_name}",
+                "qdrant_query": section_name,
+                "timestamp": timestamp()
+            })
+            return None, None
+
+        use_explanation = self.fast_mode or deadline.nearly_spent()
+        explanation = self.lesson_pack.explanation(section_name) if use_explanation else None
+        logs.append({
+            "agent": "tutor",
+            "action": f"Using lesson pack for: {section_name}" + (" (fast mode)" if explanation else ""),
+            "lesson_pack": "fast" if explanation else "passages",
+            "timestamp": timestamp()
+        })
+        return passages, explanation
+
+    def cancel_prefetch(self, session_id: str = DEFAULT_SESSION):
+        """Abandon speculative work, e.g. when the student switches to search or quiz"""
+        self._cancel(self.sessions.load(session_id))
+
+    def _cancel(self, session: SessionState):
+        prefetch, session.prefetch = session.prefetch, None
+        if prefetch is None:
+            return
+
+        prefetch.cancelled.set()
+        prefetch.future.cancel()
+        with self._stats_lock:
+            self.prefetch_stats["cancelled"] += 1
+        # A running generation stops at its next chunk; whatever it produced is wasted
+        prefetch.future.add_done_callback(lambda _: self._waste(prefetch.tokens))
+
+    def prefetch_metrics(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.prefetch_stats)
+        stats["hit_rate"] = stats["hits"] / stats["issued"] if stats["issued"] else 0.0
+        return stats
+
+    def _start_prefetch(self, session: SessionState):
+        """Begin fetching the section teach() will serve next in this session"""
+        section_name = self.sections[session.current_section]
+        if not self.prefetch_enabled or (self.lesson_pack and section_name in self.lesson_pack):
+            return
+
+        self._cancel(session)
+        prefetch = _Prefetch(section_name)
+        prefetch.future = _prefetch_pool.submit(self._run_prefetch, prefetch)
+        session.prefetch = prefetch
+        with self._stats_lock:
+            self.prefetch_stats["issued"] += 1
+
+    def _run_prefetch(self, prefetch: _Prefetch) -> Tuple[List[Dict], Optional[str]]:
+        passages = self.qdrant.search(prefetch.section_name, limit=3)
+        if not self.prefetch_generate or prefetch.cancelled.is_set():
+            return passages, None
+
+        with span("llm.stream", agent="tutor", prefetch=True) as llm_span:
+            try:
+                stream = self.groq_breaker.call(
+                    self.groq_client.chat.completions.create, stream=True,
+                    **self._section_completion_args(prefetch.section_name, passages)
+                )
+            except CircuitOpenError:
+                # Groq is known to be down; the passages alone still save the turn a query
+                llm_span.set(circuit="open")
+                return passages, None
+            answer = []
+            for chunk in stream:
+                if prefetch.cancelled.is_set():
+                    stream.close()
+                    llm_span.set(cancelled=True, chunks=prefetch.tokens)
+                    return passages, None
+                if chunk.choices and chunk.choices[0].delta.content:
+                    answer.append(chunk.choices[0].delta.content)
+                    prefetch.tokens += 1
+            llm_span.set(chunks=prefetch.tokens)
+        return passages, "".join(answer)
+
+    async def _prefetch_settled(self, session: SessionState, deadline: Deadline):
+        """Let an in-flight prefetch finish, within the turn's retrieval time, without blocking the event loop"""
+        prefetch = session.prefetch
+        if prefetch is not None and prefetch.future.running():
+            with span("tutor.prefetch_wait") as wait_span:
+                try:
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(prefetch.future)),
+                                           deadline.retrieval_timeout())
+                except asyncio.TimeoutError:
+                    # _take_prefetch gives up on it
+                    wait_span.set(timed_out=True)
+                except Exception as e:
+                    # A speculative prefetch never fails the turn; _take_prefetch reports it and fetches directly
+                    wait_span.set(error=type(e).__name__)
+
+    def _take_prefetch(self, session: SessionState, section_name: str, logs: List[Dict],
+                       deadline: Deadline) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        """Claim the session's prefetch for this section, waiting for it if it is still running"""
+        prefetch = session.prefetch
+        if prefetch is None:
+            return None
+        if prefetch.section_name != section_name:
+            self._cancel(session)
+            return None
+
+        session.prefetch = None
+        if prefetch.future.cancel():
+            # Still queued behind other sessions' prefetches; fetching directly is faster
+            return None
+        try:
+            passages, answer = prefetch.future.result(timeout=deadline.retrieval_timeout())
+        except FutureTimeoutError:
+            # Still running past the retrieval budget; its result arrives too late to use
+            prefetch.cancelled.set()
+            prefetch.future.add_done_callback(lambda _: self._waste(prefetch.tokens))
+            return None
+        except Exception as e:
+            print(f"Tutor prefetch error: {e}")
+            self._waste(prefetch.tokens)
+            return None
+
+        with self._stats_lock:
+            self.prefetch_stats["hits"] += 1
+        logs.append({
+            "agent": "tutor",
+            "action": f"Using prefetched {'lesson' if answer else 'passages'} for: {section_name}",
+            "prefetch": "hit",
+            "timestamp": timestamp()
+        })
+        return passages, answer
+
+    def _record_progress(self, student_id: str, section_name: str):
+        try:
+            self.student_memory.update_student_progress(student_id, section_name, True, "neutral",
+                                                        self.TEACHING_STYLE)
+        except Exception as e:
+            print(f"Student memory error: {e}")
+
+    def _waste(self, tokens: int):
+        with self._stats_lock:
+            self.prefetch_stats["wasted_tokens"] += tokens
+
+    def _remember(self, query: str, section_name: str, answer: str, retrieved_content: List[Dict]) -> str:
+        # An explanation written from fallback passages is not worth keeping
+        if any(item.get("fallback") for item in retrieved_content):
+            return answer
+        self.response_cache.put(
+            f"tutor:{section_name}", self.response_cache.embed(query), answer, len(answer),
+            self.qdrant.content_version
+        )
+        return answer
+
+    def _retrieved(self, retrieved_content: List[Dict], logs: List[Dict]):
         logs.append({
             "agent": "tutor",
             "action": f"Retrieved {len(retrieved_content)} relevant passages",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
+        if any(item.get("fallback") for item in retrieved_content):
+            logs.append({
+                "agent": "tutor",
+                "action": "Qdrant unavailable in time; using fallback passages",
+                "degraded": "fallback_passages",
+                "timestamp": timestamp()
+            })
+
         # Generate teaching content
         logs.append({
             "agent": "tutor",
             "action": "Generating explanation with Groq LLM",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
+
+    def _degraded(self, section_name: str, retrieved_content: List[Dict], error: Exception,
+                  logs: List[Dict]) -> str:
+        """Fall back to the packed explanation, else the key passage, when the LLM call failed or ran out of time"""
+        explanation = self.lesson_pack.explanation(section_name) if self.lesson_pack else None
+        log_degraded("tutor", error, logs, f"teaching from the {'lesson pack' if explanation else 'key passage'}",
+                     "lesson_pack" if explanation else "passages")
+        if explanation:
+            return explanation
+        passage = retrieved_content[0]["text"] if retrieved_content else ""
+        return f"I couldn't prepare a full explanation in time. Here is the key passage for this section:\n\n> {passage}"
+
+    def explain_section(self, section_name: str, passages: List[Dict]) -> str:
+        """A base explanation of the section from its passages, as a lesson pack stores it"""
+        response = self.groq_breaker.call(self.groq_client.chat.completions.create,
+                                          **self._section_completion_args(section_name, passages))
+        return response.choices[0].message.content
+
+    def _section_completion_args(self, section_name: str, passages: List[Dict]) -> Dict:
+        """Completion arguments for teaching the section with no query of the student's (prefetch, lesson packs)"""
+        return self._completion_args(f"Teach me {section_name}", section_name, passages)
+
+    def _completion_args(self, query: str, section_name: str, retrieved_content: List[Dict]) -> Dict:
+        if self.CONTEXT_TOKENS is not None:
+            retrieved_content, _ = pack_passages(retrieved_content, self.CONTEXT_TOKENS)
         context = "\n\n".join([item["text"] for item in retrieved_content])
-        
-        prompt = f"""You are a tutor teaching "Rich Dad Poor Dad" by Robert Kiyosaki.
+        base_explanation = self.lesson_pack.explanation(section_name) if self.lesson_pack else None
+
+        if base_explanation:
+            # The pack already explains the section; only tailor it to this student
+            prompt = f"""You are a tutor teaching "Rich Dad Poor Dad" by Robert Kiyosaki.
+
+Section: {section_name}
+
+Retrieved book content:
+{context}
+
+Prepared explanation of this section:
+{base_explanation}
+
+User query: {query}
+
+Adapt the prepared explanation to the user's query. Keep what answers it, add what it is missing.
+Be conversational and educational. End with a question to check understanding.
+
+Response:"""
+        else:
+            prompt = f"""You are a tutor teaching "Rich Dad Poor Dad" by Robert Kiyosaki.
 
 Section: {section_name}
 
@@ -86,32 +506,38 @@ Be conversational and educational. Break down complex concepts simply.
 End with a question to check understanding.
 
 Response:"""
-        
-        response = self.groq_client.chat.completions.create(
-            messages=[
+
+        return {
+            "messages": [
                 {"role": "system", "content": "You are an expert tutor for Rich Dad Poor Dad."},
                 {"role": "user", "content": prompt}
             ],
-            model="llama-3.3-70b-versatile",
-            temperature=0.7,
-            max_tokens=500
-        )
-        
-        answer = response.choices[0].message.content
-        
+            "model": "llama-3.3-70b-versatile",
+            "temperature": 0.7,
+            "max_tokens": 500
+        }
+
+    def _finish(self, answer: str, session: SessionState, section_name: str, logs: List[Dict]) -> str:
+        return f"{self._header(section_name)}{answer}{self._complete(session, logs)}"
+
+    @staticmethod
+    def _header(section_name: str) -> str:
+        return f"📖 **{section_name}**\n\n"
+
+    def _complete(self, session: SessionState, logs: List[Dict]) -> str:
+        """Advance the session to the next section, log completion and return the progress footer"""
+        if self.student_memory is not None:
+            _progress_pool.submit(self._record_progress, session.session_id, self.sections[session.current_section])
+
         # Add section progress
-        self.current_section = min(self.current_section + 1, len(self.sections) - 1)
-        
-        full_response = f"📖 **{section_name}**\n\n{answer}\n\n*Progress: Section {self.current_section}/{len(self.sections)}*"
-        
+        session.current_section = min(session.current_section + 1, len(self.sections) - 1)
+        self.sessions.save(session)
+        self._start_prefetch(session)
+
         logs.append({
             "agent": "tutor",
             "action": "Teaching complete",
-            "timestamp": self._get_timestamp()
+            "timestamp": timestamp()
         })
-        
-        return full_response, logs
-    
-    def _get_timestamp(self):
-        from datetime import datetime
-        return datetime.now().strftime("%H:%M:%S")
+
+        return f"\n\n*Progress: Section {session.current_section}/{len(self.sections)}*"
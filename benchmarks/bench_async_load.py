@@ -0,0 +1,73 @@
+"""
+Async load test - sessions/sec and tail latency of OrchestratorAgent.aprocess against
+local stub LLM/Qdrant servers
+
+Usage:
+    python -m benchmarks.bench_async_load --users 1 10 100 500 --llm-latency-ms 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.clients import aclose_async_clients
+
+QUERIES = [
+    "Start teaching me the book",
+    "What is the difference between an asset and a liability?",
+    "Quiz me on financial literacy",
+    "Why do the rich not work for money?",
+]
+
+
+async def session(orchestrator, turns: int, latencies):
+    for _ in range(turns):
+        start = time.perf_counter()
+        await orchestrator.aprocess(random.choice(QUERIES))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_level(orchestrator, users: int, turns: int):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(session(orchestrator, turns, latencies) for _ in range(users)))
+    elapsed = time.perf_counter() - start
+    print(f"users={users:>4}  sessions/s={users / elapsed:8.1f}  turns/s={len(latencies) / elapsed:8.1f}  "
+          f"p50={np.percentile(latencies, 50):7.1f}ms  p99={np.percentile(latencies, 99):7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--turns", type=int, default=3, help="turns per session")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=32, help="Groq and Qdrant connection pool size")
+    args = parser.parse_args()
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms) as base_url:
+        os.environ.update(stub_environment(base_url))
+        # httpcore pool bookkeeping grows quadratically with open connections, so a moderate pool beats one per user
+        os.environ["GROQ_MAX_CONNECTIONS"] = os.environ["GROQ_MAX_KEEPALIVE"] = str(args.pool_size)
+        os.environ["QDRANT_POOL_SIZE"] = str(args.pool_size)
+
+        from agents.orchestrator import OrchestratorAgent
+        orchestrator = OrchestratorAgent()
+
+        async def run_all():
+            try:
+                for users in args.users:
+                    await run_level(orchestrator, users, args.turns)
+            finally:
+                await aclose_async_clients()
+
+        asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
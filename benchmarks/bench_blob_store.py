@@ -0,0 +1,133 @@
+"""
+Blob store benchmark - image payload size and query latency, base64 in the payload vs blob store references
+
+Generates an image-heavy PDF (--images-per-page distinct noise images per page,
+which compress about as badly as photos, plus a logo repeated on every page) and
+ingests it twice into the local stub server, started with --store-points so
+queries return the stored payloads:
+
+- inline: the notebook's ingest (benchmarks/bench_ingest.notebook_ingest), image
+  bytes base64-encoded in each image point's payload, as before the blob store.
+- blob store: ingest.IngestPipeline, image bytes in a BlobStore, payloads holding
+  only image_sha256, image_size and image_format.
+
+Then both image collections are queried --queries times with payloads (limit 10),
+and for the blob store run the images of the results are fetched: whole, as a
+1 KB range read, and as thumbnails (first render, then cached).
+
+Usage:
+    python -m benchmarks.bench_blob_store --pages 100 --images-per-page 4
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_ingest import WORDS, notebook_ingest
+from benchmarks.stubs import stub_server, stub_environment
+
+
+def generate_pdf(path: str, pages: int, images_per_page: int, side: int = 160, seed: int = 0):
+    """A few sentences and images_per_page distinct side x side noise images per page, plus a shared logo"""
+    import pymupdf
+
+    rng = np.random.default_rng(seed)
+    doc = pymupdf.open()
+    logo = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 48, 48), 0)
+    logo.set_rect(logo.irect, (40, 120, 200))
+    for _ in range(pages):
+        page = doc.new_page()
+        sentences = [" ".join(rng.choice(WORDS, size=12)).capitalize() for _ in range(6)]
+        page.insert_textbox(pymupdf.Rect(50, 50, 550, 200), ". ".join(sentences) + ".", fontsize=9)
+        page.insert_image(pymupdf.Rect(50, 770, 74, 794), pixmap=logo)
+        for i in range(images_per_page):
+            samples = rng.integers(0, 256, size=side * side * 3, dtype=np.uint8).tobytes()
+            pixmap = pymupdf.Pixmap(pymupdf.csRGB, side, side, samples, 0)
+            x, y = 50 + (i % 2) * 260, 220 + (i // 2) * 260
+            page.insert_image(pymupdf.Rect(x, y, x + 240, y + 240), pixmap=pixmap)
+    doc.save(path)
+    doc.close()
+
+
+def timed(fn, repeats: int):
+    """Median and p95 milliseconds of repeats calls, with the last result"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(0.95 * (len(times) - 1))], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--images-per-page", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, stub_server(store_points=True) as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from ingest import IngestPipeline
+        from utils.blob_store import BlobStore
+        from utils.clients import get_qdrant_manager
+        from utils.embeddings import simple_embed
+
+        pdf_path = os.path.join(tmp, "images.pdf")
+        generate_pdf(pdf_path, args.pages, args.images_per_page)
+        blobs = BlobStore(os.path.join(tmp, "blobs"), use_mmap=True)
+
+        def received_bytes() -> int:
+            return httpx.get(f"{base_url}/stub/stats").json()["received_bytes"]
+
+        runs = []
+        for name in ("inline", "blob store"):
+            manager, image_manager = get_qdrant_manager(f"text_{len(runs)}"), get_qdrant_manager(f"images_{len(runs)}")
+            before, start = received_bytes(), time.perf_counter()
+            if name == "inline":
+                stats = notebook_ingest(pdf_path, manager, image_manager)
+            else:
+                stats = IngestPipeline(manager, image_manager, workers=args.workers, manifest_dir=None,
+                                       blob_store=blobs).run(pdf_path)
+            runs.append((name, image_manager, stats, received_bytes() - before, time.perf_counter() - start))
+
+        vector = simple_embed("Image from page 3")
+        print(f"{'run':<11} {'images':>7} {'ingest s':>9} {'uploaded':>10} {'payload/img':>12} "
+              f"{'query p50':>10} {'query p95':>10}")
+        for name, image_manager, stats, uploaded, seconds in runs:
+            def query():
+                return image_manager.client.query_points(image_manager.collection_name, query=vector, limit=10,
+                                                         with_payload=True).points
+
+            p50, p95, points = timed(query, args.queries)
+            payload_bytes = statistics.mean(len(str(point.payload)) for point in points)
+            print(f"{name:<11} {stats['images']:7d} {seconds:9.2f} {uploaded / 1e6:8.2f}MB "
+                  f"{payload_bytes / 1e3:10.1f}KB {p50:8.2f}ms {p95:8.2f}ms")
+
+        stored = sum(len(files) for root, _, files in os.walk(blobs.root))
+        print(f"\nblob store: {stored} blobs for {runs[1][2]['images']} images (the logo is stored once)")
+
+        # Fetching the images of the last query's 10 results
+        digests = [point.payload["image_sha256"] for point in points]
+        start = time.perf_counter()
+        for digest in digests:
+            blobs.thumbnail(digest)
+        print(f"{'thumbnails, first render':<26} {(time.perf_counter() - start) * 1000:8.2f}ms")
+        for label, fetch in (("thumbnails, cached", lambda: [blobs.thumbnail(d) for d in digests]),
+                             ("get, whole images", lambda: [blobs.get(d) for d in digests]),
+                             ("range read, first 1 KB", lambda: [blobs.read(d, 0, 1024) for d in digests])):
+            p50, p95, _ = timed(fetch, args.queries)
+            print(f"{label:<26} {p50:8.2f}ms (p95 {p95:.2f}ms)")
+        blobs.close()
+
+
+if __name__ == "__main__":
+    main()
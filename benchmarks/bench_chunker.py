@@ -0,0 +1,109 @@
+"""
+Chunker benchmark - throughput (MB/s) and chunk / prompt token distributions, notebook split vs ingest.chunker
+
+Generates a book (benchmarks/bench_ingest.generate_pdf), extracts its page texts
+once, then chunks them:
+
+- notebook: text.split('. ') per page, groups of three sentences, fragments under
+  20 characters dropped (what ingest did before)
+- chunker: ingest.chunker.split_sentences + Chunker, token-budgeted chunks with
+  overlap that run across pages
+
+Throughput is page text in MB per second of chunking. Token counts are
+utils.tokens estimates. The prompt distribution is the context the agents build
+from the top --top-k chunks of --queries random queries (ranked with embed_many,
+as Qdrant would), i.e. the passages part of each LLM prompt.
+
+Usage:
+    python -m benchmarks.bench_chunker --pages 500 --target-tokens 128 --overlap-tokens 16
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from benchmarks.bench_ingest import WORDS, generate_pdf
+from ingest.chunker import MAX_TOKENS, OVERLAP_TOKENS, TARGET_TOKENS, Chunker, split_sentences
+from utils.embeddings import embed_many
+from utils.tokens import count_tokens
+
+
+def notebook_chunks(pages: List[str]) -> List[str]:
+    chunks = []
+    for text in pages:
+        sentences = text.split('. ')
+        for i in range(0, len(sentences), 3):
+            chunk_text = '. '.join(sentences[i:i+3]).strip()
+            if len(chunk_text) >= 20:
+                chunks.append(chunk_text)
+    return chunks
+
+
+def chunker_chunks(pages: List[str], target_tokens: int, max_tokens: int, overlap_tokens: int) -> List[str]:
+    chunker = Chunker(target_tokens, max_tokens, overlap_tokens)
+    chunks = []
+    for page_num, text in enumerate(pages, 1):
+        chunks.extend(chunker.add_page(page_num, split_sentences(text)))
+    chunks.extend(chunker.finish())
+    return [chunk["text"] for chunk in chunks]
+
+
+def distribution(values) -> str:
+    values = np.asarray(values)
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return f"{values.min():5.0f} {p5:5.0f} {p50:5.0f} {p95:5.0f} {values.max():5.0f} {values.std():6.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--target-tokens", type=int, default=TARGET_TOKENS)
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--overlap-tokens", type=int, default=OVERLAP_TOKENS)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    import pymupdf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "book.pdf")
+        generate_pdf(pdf_path, args.pages)
+        with pymupdf.open(pdf_path) as doc:
+            pages = [page.get_text() for page in doc]
+    megabytes = sum(len(text.encode("utf-8")) for text in pages) / 1e6
+
+    rng = random.Random(0)
+    queries = [" ".join(rng.choices(WORDS, k=4)) for _ in range(args.queries)]
+    query_vectors = embed_many(queries)
+
+    runs = {
+        "notebook": lambda: notebook_chunks(pages),
+        "chunker": lambda: chunker_chunks(pages, args.target_tokens, args.max_tokens, args.overlap_tokens)
+    }
+    print(f"{megabytes:.2f} MB of text in {args.pages} pages; tokens as min p5 p50 p95 max std\n")
+    print(f"{'mode':<9} {'MB/s':>6} {'chunks':>7}   {'chunk tokens':<34}  {f'prompt tokens (top {args.top_k})':<34}")
+    for name, chunk_fn in runs.items():
+        seconds = min(timed(chunk_fn) for _ in range(args.repeats))
+        chunks = chunk_fn()
+        tokens = np.array([count_tokens(chunk) for chunk in chunks])
+        scores = query_vectors @ embed_many(chunks).T
+        top = np.argpartition(-scores, args.top_k, axis=1)[:, :args.top_k]
+        print(f"{name:<9} {megabytes / seconds:6.2f} {len(chunks):7d}   {distribution(tokens):<34}  "
+              f"{distribution(tokens[top].sum(axis=1))}")
+
+
+def timed(fn: Callable) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
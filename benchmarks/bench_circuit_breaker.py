@@ -0,0 +1,88 @@
+"""
+Circuit breaker benchmark - turn latency against a backend that is down or stalled
+
+For each scenario a stub server is started (benchmarks/stubs.py) whose Qdrant or
+Groq endpoint fails or stalls on every request. The labeled intent queries are
+then replayed through OrchestratorAgent.process twice: with the breakers
+effectively off (BREAKER_MIN_CALLS so high they never open, the previous
+behaviour) and with them on, where after BREAKER_MIN_CALLS bad calls the backend
+is skipped for BREAKER_OPEN_SECONDS and a single probe tests it afterwards.
+Turns run without a latency budget so only the breaker shortens them. Response
+and retrieval caches are off so every turn reaches the stub.
+
+Usage:
+    python -m benchmarks.bench_circuit_breaker --turns 60 --min-calls 5 --open-seconds 10
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_intent import load_eval_set
+from benchmarks.stubs import stub_server, stub_environment
+from utils.clients import registry
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache
+
+# (name, stub faults, breaker reported)
+SCENARIOS = [
+    ("qdrant errors", {"fault_target": "qdrant", "error_rate": 1.0}, "qdrant"),
+    ("qdrant stalled 2s", {"fault_target": "qdrant", "slow_rate": 1.0, "slow_ms": 2000}, "qdrant"),
+    ("llm errors", {"fault_target": "llm", "error_rate": 1.0}, "groq"),
+]
+
+
+def run(queries):
+    from agents.orchestrator import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent(turn_budget_ms=0)
+    orchestrator.tutor.prefetch_enabled = False
+    orchestrator.search.response_cache = SemanticResponseCache(threshold=1.01)
+    orchestrator.tutor.response_cache = SemanticResponseCache(threshold=1.01)
+    orchestrator.search.qdrant.retrieval_cache = RetrievalCache(MemoryCacheBackend(max_entries=0))
+
+    latencies, failed = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            orchestrator.process(query, session_id="breaker")
+        except Exception:
+            failed += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--min-calls", type=int, default=5)
+    parser.add_argument("--open-seconds", type=float, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    os.environ["BREAKER_OPEN_SECONDS"] = str(args.open_seconds)
+    queries, _ = load_eval_set()
+    queries = queries[:args.turns]
+
+    print(f"{'scenario':<20} {'breaker':<8} {'p50':>8} {'p95':>8} {'mean':>8} {'total':>8}  failed  opened  rejected")
+    for name, faults, breaker in SCENARIOS:
+        with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms,
+                         **faults) as base_url:
+            os.environ.update(stub_environment(base_url))
+            for policy, min_calls in (("off", 10 ** 9), ("on", args.min_calls)):
+                os.environ["BREAKER_MIN_CALLS"] = str(min_calls)
+                # Fresh clients and breakers per run, pointed at this scenario's stub
+                registry.close()
+                latencies, failed = run(queries)
+                backend = registry.health()[breaker]
+                print(f"{name:<20} {policy:<8} {np.percentile(latencies, 50):7.0f}ms "
+                      f"{np.percentile(latencies, 95):7.0f}ms {np.mean(latencies):7.0f}ms "
+                      f"{sum(latencies) / 1000:7.1f}s  {failed:6d}  {backend['times_opened']:6d}  "
+                      f"{backend['rejected']:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Context packing benchmark - prompt tokens and turn latency with every retrieved passage vs token-budgeted packing
+
+Ingests a generated book twice into the local stub server (started with
+--store-points, so queries rank the stored chunks): the original and a second
+edition with --edit-rate of its pages revised, as a course collection holding
+two editions would. Matching chunks of the two editions come back side by side,
+so results hold near-duplicates.
+
+The labeled intent queries (benchmarks/intent_eval.jsonl) are then replayed
+through OrchestratorAgent.process twice, with the response and retrieval caches
+off:
+
+- all passages: CONTEXT_TOKENS = None on every agent; each prompt joins the 5
+  (search) or 3 (tutor, quiz) passages as retrieved
+- packed: the agents' CONTEXT_TOKENS budgets; near-duplicates dropped, the rest
+  fitted greedily in score order
+
+Prompt tokens are counted by the stub (utils.tokens). Completions take
+--llm-latency-ms plus --prefill-ms-per-1k-tokens per 1000 prompt tokens, so
+turn latency reflects prompt size.
+
+Usage:
+    python -m benchmarks.bench_context_packing --pages 200 --prefill-ms-per-1k-tokens 100
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_ingest import generate_pdf
+from benchmarks.bench_intent import load_eval_set
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--edit-rate", type=float, default=0.2)
+    parser.add_argument("--llm-latency-ms", type=float, default=150.0)
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=100.0)
+    args = parser.parse_args()
+
+    queries, _ = load_eval_set()
+
+    with tempfile.TemporaryDirectory() as tmp, stub_server(
+        llm_latency_ms=args.llm_latency_ms, prefill_ms_per_1k_tokens=args.prefill_ms_per_1k_tokens,
+        store_points=True
+    ) as base_url:
+        os.environ.update(stub_environment(base_url))
+        os.environ["TUTOR_PREFETCH"] = "0"
+
+        from agents.orchestrator import OrchestratorAgent
+        from ingest import IngestPipeline
+        from utils.blob_store import BlobStore
+        from utils.clients import get_qdrant_manager
+
+        pipeline = IngestPipeline(get_qdrant_manager(), with_images=False, manifest_dir=None,
+                                  blob_store=BlobStore(os.path.join(tmp, "blobs")))
+        for name, edit_rate in (("book.pdf", 0.0), ("book (2nd edition).pdf", args.edit_rate)):
+            path = os.path.join(tmp, name)
+            generate_pdf(path, args.pages, edit_rate=edit_rate)
+            pipeline.run(path)
+
+        def prompt_tokens() -> int:
+            return httpx.get(f"{base_url}/stub/stats").json()["prompt_tokens"]
+
+        print(f"{'mode':<13} {'prompt tokens/turn':>19} {'p95':>6} {'turn ms':>8} {'p95':>7}")
+        baseline = None
+        for name, packed in (("all passages", False), ("packed", True)):
+            orchestrator = OrchestratorAgent()
+            for agent in (orchestrator.search, orchestrator.tutor, orchestrator.quiz):
+                if not packed:
+                    agent.CONTEXT_TOKENS = None
+            orchestrator.search.response_cache = SemanticResponseCache(threshold=1.01)
+            orchestrator.tutor.response_cache = SemanticResponseCache(threshold=1.01)
+            orchestrator.search.qdrant.retrieval_cache = RetrievalCache(MemoryCacheBackend(max_entries=0))
+
+            tokens, latencies = [], []
+            for query in queries:
+                before, start = prompt_tokens(), time.perf_counter()
+                orchestrator.process(query, session_id=name)
+                latencies.append((time.perf_counter() - start) * 1000)
+                tokens.append(prompt_tokens() - before)
+
+            print(f"{name:<13} {np.mean(tokens):19.0f} {np.percentile(tokens, 95):6.0f} "
+                  f"{np.mean(latencies):8.1f} {np.percentile(latencies, 95):7.1f}")
+            if baseline is None:
+                baseline = (sum(tokens), np.mean(latencies))
+            else:
+                print(f"\ninput tokens saved: {1 - sum(tokens) / baseline[0]:.1%}; "
+                      f"mean turn latency {np.mean(latencies) - baseline[1]:+.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Embedding benchmark - texts/sec of embed_many vs the original per-word simple_embed loop
+
+Usage:
+    python -m benchmarks.bench_embeddings --sizes 1000 100000
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from utils.embeddings import embed_many, simple_embed, stable_hash
+
+VOCABULARY = [f"word{i}" for i in range(20000)]
+
+
+def legacy_simple_embed(text: str, dim: int = 384, hash_fn: Callable[[str], int] = hash) -> List[float]:
+    """The notebook's original implementation, kept here as the baseline"""
+    words = text.lower().split()
+    vector = [0.0] * dim
+
+    for i, word in enumerate(words[:100]):
+        hash_val = hash_fn(word)
+        for j in range(3):
+            idx = (hash_val + j * 13) % dim
+            vector[idx] += 1.0 / (i + 1)
+
+    norm = np.sqrt(sum(v * v for v in vector))
+    if norm > 0:
+        vector = [v / norm for v in vector]
+
+    return vector
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(size: int, batch_size: int, seed: int = 7):
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choices(VOCABULARY, k=rng.randint(20, 120))) for _ in range(size)]
+
+    legacy = timed(lambda: [legacy_simple_embed(t) for t in texts])
+    wrapper = timed(lambda: [simple_embed(t) for t in texts])
+    batched = timed(lambda: [embed_many(texts[i:i + batch_size]) for i in range(0, size, batch_size)])
+
+    # Same algorithm, only faster (and with a process-stable hash)
+    sample = texts[:100]
+    expected = np.asarray([legacy_simple_embed(t, hash_fn=stable_hash) for t in sample], dtype=np.float32)
+    assert np.allclose(embed_many(sample), expected, atol=1e-6)
+    # simple_embed's single-text path gives exactly embed_many's rows
+    assert all(simple_embed(t) == row.tolist() for t, row in zip(sample, embed_many(sample)))
+
+    print(f"texts={size:>7}  legacy={size / legacy:>10,.0f}/s  "
+          f"simple_embed={size / wrapper:>10,.0f}/s  "
+          f"embed_many={size / batched:>10,.0f}/s  "
+          f"speedup={legacy / batched:5.1f}x")
+
+
+def check_process_stability(text: str = "Assets put money in your pocket") -> bool:
+    """Embed the same text in fresh interpreters with different hash seeds"""
+    script = "from utils.embeddings import simple_embed; print(simple_embed(%r)[:8])" % text
+    outputs = set()
+    for seed in ("1", "2", "random"):
+        env = {**os.environ, "PYTHONHASHSEED": seed}
+        outputs.add(subprocess.check_output([sys.executable, "-c", script], env=env, text=True))
+    return len(outputs) == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--batch-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.batch_size)
+    print(f"identical vectors across processes: {check_process_stability()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Fault-injection benchmark - turn latency and outcomes with and without a latency budget
+
+For each fault scenario a stub server is started (benchmarks/stubs.py) that stalls
+or fails a share of Qdrant or Groq requests. The labeled intent queries are then
+replayed through OrchestratorAgent.process twice: without a budget
+(turn_budget_ms=0, the previous behaviour) and with one, where Qdrant queries are
+hedged and abandoned for fallback passages, LLM calls time out with the turn, and
+the turn degrades instead of failing. Response and retrieval caches are off so
+every turn reaches the stub.
+
+Usage:
+    python -m benchmarks.bench_faults --turns 40 --budget-ms 3000 --reserve-ms 1000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_intent import load_eval_set
+from benchmarks.stubs import stub_server, stub_environment
+from utils.clients import registry
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache
+
+SCENARIOS = [
+    ("healthy", {}),
+    ("qdrant 5% +2s", {"fault_target": "qdrant", "slow_rate": 0.05, "slow_ms": 2000}),
+    ("qdrant 30% errors", {"fault_target": "qdrant", "error_rate": 0.3}),
+    ("llm 10% +5s", {"fault_target": "llm", "slow_rate": 0.1, "slow_ms": 5000}),
+    ("llm 20% errors", {"fault_target": "llm", "error_rate": 0.2}),
+]
+
+
+def run(queries, budget_ms: float):
+    from agents.orchestrator import OrchestratorAgent
+
+    orchestrator = OrchestratorAgent(turn_budget_ms=budget_ms)
+    orchestrator.tutor.prefetch_enabled = False
+    orchestrator.search.response_cache = SemanticResponseCache(threshold=1.01)
+    orchestrator.tutor.response_cache = SemanticResponseCache(threshold=1.01)
+    manager = orchestrator.search.qdrant
+    manager.retrieval_cache = RetrievalCache(MemoryCacheBackend(max_entries=0))
+
+    latencies, failed, shortened, degraded = [], 0, 0, 0
+    for query in queries:
+        start = time.perf_counter()
+        try:
+            _, logs = orchestrator.process(query, session_id="faults")
+            modes = {log["degraded"] for log in logs if "degraded" in log}
+            shortened += "max_tokens" in modes
+            degraded += bool(modes - {"max_tokens"})
+        except Exception:
+            failed += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, failed, shortened, degraded, manager.hedged_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--budget-ms", type=float, default=3000)
+    parser.add_argument("--reserve-ms", type=float, default=1000)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    os.environ["LLM_RESERVE_MS"] = str(args.reserve_ms)
+    queries, _ = load_eval_set()
+    queries = queries[:args.turns]
+
+    # shortened: max_tokens cut to fit the budget; degraded: cached answer, fallback or top passages, or cut short
+    print(f"{'scenario':<20} {'policy':<10} {'p50':>8} {'p95':>8} {'max':>8}  failed  shortened  degraded  hedged")
+    for name, faults in SCENARIOS:
+        with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms,
+                         **faults) as base_url:
+            os.environ.update(stub_environment(base_url))
+            for policy, budget_ms in (("none", 0), (f"{args.budget_ms:.0f}ms", args.budget_ms)):
+                # Fresh clients per run, pointed at this scenario's stub
+                registry.close()
+                latencies, failed, shortened, degraded, hedged = run(queries, budget_ms)
+                print(f"{name:<20} {policy:<10} {np.percentile(latencies, 50):7.0f}ms "
+                      f"{np.percentile(latencies, 95):7.0f}ms {max(latencies):7.0f}ms  "
+                      f"{failed:6d}  {shortened:9d}  {degraded:8d}  {hedged:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Ingest benchmark - pages/sec and peak RSS of the streaming pipeline vs the notebook's in-memory ingest
+
+Generates PDFs of the given page counts (about 300 words per page, a small image
+on every tenth page) and ingests each into the local stub server, which
+acknowledges and discards upserts. Every run is a fresh subprocess so peak RSS
+(ru_maxrss) belongs to that run alone:
+
+- notebook: EnhancedPDFProcessor.process_pdf + ingest_to_qdrant: pages read
+  one by one, one simple_embed per chunk, every point and base64 image kept in
+  lists, then one upsert per collection.
+- pipeline: ingest.IngestPipeline, extraction in worker processes (each holds
+  one range of pages at a time), one embed_many call and one columnar upsert
+  per batch of chunks, at most a few batches queued.
+
+Usage:
+    python -m benchmarks.bench_ingest --pages 250 1000 --workers 4
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+WORDS = ("asset liability income expense cash flow money rich poor dad business tax corporation "
+         "investment financial literacy fear opportunity salary debt real estate stock bond "
+         "savings mind your own work learn sell").split()
+
+
+def generate_pdf(path: str, pages: int, seed: int = 0, edit_rate: float = 0.0):
+    """A book of random sentences; edit_rate inserts a sentence mid-page into that share of pages"""
+    import pymupdf
+
+    rng = random.Random(seed)
+    # Separate stream, so an edited book matches the original everywhere else
+    edits = random.Random(seed + 1)
+    doc = pymupdf.open()
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 64, 64), 0)
+    pixmap.set_rect(pixmap.irect, (40, 120, 200))
+    for page_num in range(pages):
+        page = doc.new_page()
+        sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize()
+                     for _ in range(25)]
+        if edits.random() < edit_rate:
+            sentences.insert(12, "This sentence was added in the revised edition")
+        page.insert_textbox(pymupdf.Rect(50, 50, 550, 700), ". ".join(sentences) + ".", fontsize=9)
+        if page_num % 10 == 0:
+            page.insert_image(pymupdf.Rect(50, 710, 114, 774), pixmap=pixmap)
+    doc.save(path)
+    doc.close()
+
+
+def notebook_ingest(pdf_path: str, manager, image_manager) -> dict:
+    """The notebook's process_pdf + ingest_to_qdrant, against the given collections"""
+    import pymupdf
+    import numpy as np
+    from qdrant_client.models import PointStruct
+    from utils.embeddings import EMBEDDING_VERSION, simple_embed
+
+    doc = pymupdf.open(pdf_path)
+    text_chunks, images, chunk_id = [], [], 0
+    for page_num, page in enumerate(doc):
+        text = page.get_text()
+        for img in page.get_images(full=True):
+            base_image = doc.extract_image(img[0])
+            description = f"Image {len(images)+1} from page {page_num+1}"
+            images.append({"id": str(uuid.uuid4()), "vector": simple_embed(description), "payload": {
+                "description": description, "page": page_num + 1,
+                "image_base64": base64.b64encode(base_image["image"]).decode(),
+                "image_format": base_image["ext"], "image_index": len(images),
+                "embedding_version": EMBEDDING_VERSION}})
+        sentences = text.split('. ')
+        for i in range(0, len(sentences), 3):
+            chunk_text = '. '.join(sentences[i:i+3]).strip()
+            if len(chunk_text) < 20:
+                continue
+            word_count = len(chunk_text.split())
+            avg_word_length = np.mean([len(w) for w in chunk_text.split()]) if word_count > 0 else 0
+            difficulty = "beginner" if avg_word_length < 6 else "intermediate" if avg_word_length < 8 else "advanced"
+            text_chunks.append({"id": str(uuid.uuid4()), "vector": simple_embed(chunk_text), "payload": {
+                "text": chunk_text, "sequence_id": chunk_id, "page": page_num + 1, "word_count": word_count,
+                "difficulty": difficulty, "timestamp": datetime.now().isoformat(),
+                "embedding_version": EMBEDDING_VERSION}})
+            chunk_id += 1
+    pages = len(doc)
+    doc.close()
+
+    manager.client.upsert(collection_name=manager.collection_name, points=[
+        PointStruct(id=chunk["id"], vector=chunk["vector"], payload=chunk["payload"]) for chunk in text_chunks])
+    image_manager.client.upsert(collection_name=image_manager.collection_name, points=[
+        PointStruct(id=img["id"], vector=img["vector"], payload=img["payload"]) for img in images])
+    return {"pages": pages, "chunks": len(text_chunks), "images": len(images)}
+
+
+def child(mode: str, pdf_path: str, workers: int):
+    """One measured run; prints its results as JSON"""
+    from ingest import IngestPipeline
+    from utils.blob_store import BlobStore
+    from utils.clients import get_qdrant_manager
+
+    manager, image_manager = get_qdrant_manager(), get_qdrant_manager("pdf_images")
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "notebook":
+        stats = notebook_ingest(pdf_path, manager, image_manager)
+    else:
+        blob_store = BlobStore(os.path.join(os.path.dirname(pdf_path), f"blobs_{os.getpid()}"))
+        stats = IngestPipeline(manager, image_manager, workers=workers, manifest_dir=None,
+                               blob_store=blob_store).run(pdf_path)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        **stats,
+        "seconds": seconds,
+        "baseline_mb": baseline_kb / 1024,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[250, 1000])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--child", choices=["notebook", "pipeline"], help=argparse.SUPPRESS)
+    parser.add_argument("--pdf", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.pdf, args.workers)
+
+    from benchmarks.stubs import stub_server, stub_environment
+
+    print(f"{'pages':>6} {'mode':<9} {'chunks':>7} {'images':>7} {'seconds':>8} {'pages/s':>8} "
+          f"{'peak RSS':>9} {'growth':>9}")
+    with tempfile.TemporaryDirectory() as tmp, stub_server() as base_url:
+        env = {**os.environ, **stub_environment(base_url)}
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"book_{pages}.pdf")
+            generate_pdf(pdf_path, pages)
+            for mode in ("notebook", "pipeline"):
+                command = [sys.executable, "-m", "benchmarks.bench_ingest", "--child", mode, "--pdf", pdf_path]
+                if args.workers:
+                    command += ["--workers", str(args.workers)]
+                output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                # growth: peak over the RSS the process had after its imports, before ingesting
+                print(f"{pages:6d} {mode:<9} {result['chunks']:7d} {result['images']:7d} {result['seconds']:8.2f} "
+                      f"{pages / result['seconds']:8.0f} {result['peak_mb']:7.0f}MB "
+                      f"{result['peak_mb'] - result['baseline_mb']:7.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Intent classifier benchmark - accuracy and µs/query of the keyword and embedding classifiers
+
+Evaluates on the labeled queries in benchmarks/intent_eval.jsonl, which are
+disjoint from the classifier's built-in examples.
+
+Usage:
+    python -m benchmarks.bench_intent --repeat 200
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from agents.intent import INTENT_EXAMPLES, EmbeddingIntentClassifier, KeywordIntentClassifier
+
+EVAL_SET = os.path.join(os.path.dirname(__file__), "intent_eval.jsonl")
+
+
+def load_eval_set(path: str = EVAL_SET):
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    # Accuracy on the classifier's own examples would measure nothing
+    examples = {example.lower() for intent_examples in INTENT_EXAMPLES.values() for example in intent_examples}
+    overlap = sorted(row["query"] for row in rows if row["query"].lower() in examples)
+    if overlap:
+        raise ValueError(f"Eval queries also in INTENT_EXAMPLES: {overlap}")
+    return [row["query"] for row in rows], [row["intent"] for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Timing passes over the eval set")
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args()
+
+    queries, labels = load_eval_set()
+    start = time.perf_counter()
+    embedding = EmbeddingIntentClassifier()
+    print(f"prototype build: {(time.perf_counter() - start) * 1000:.2f}ms  eval queries: {len(queries)}\n")
+
+    for name, classifier in (("keyword", KeywordIntentClassifier()), ("embedding", embedding)):
+        predictions = classifier.classify_batch(queries)
+        correct = Counter(label for label, p in zip(labels, predictions) if p.intent == label)
+        totals = Counter(labels)
+        per_intent = "  ".join(f"{intent}={correct[intent] / totals[intent]:.0%}" for intent in sorted(totals))
+        fallbacks = sum(p.source == "keyword" for p in predictions)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for query in queries:
+                classifier.classify(query)
+        single_us = (time.perf_counter() - start) / (args.repeat * len(queries)) * 1e6
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            classifier.classify_batch(queries)
+        batch_us = (time.perf_counter() - start) / (args.repeat * len(queries)) * 1e6
+
+        print(f"{name:<10} accuracy={sum(correct.values()) / len(labels):6.1%}  ({per_intent})  "
+              f"keyword fallbacks={fallbacks}  classify={single_us:6.1f}µs/query  batch={batch_us:6.1f}µs/query")
+
+        if args.show_errors:
+            for query, label, prediction in zip(queries, labels, predictions):
+                if prediction.intent != label:
+                    print(f"    {query!r}: expected {label}, got {prediction.intent} "
+                          f"({prediction.source}, confidence {prediction.confidence:.2f})")
+
+
+if __name__ == "__main__":
+    main()
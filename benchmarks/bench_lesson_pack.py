@@ -0,0 +1,69 @@
+"""
+Lesson pack benchmark - p50 latency per TutorAgent.teach() without a pack, with a pack and in fast mode
+
+Builds a pack against the local stub LLM/Qdrant server, then walks all ten
+sections several times in each mode. The response cache is disabled so every
+turn does its retrieval/generation.
+
+Usage:
+    python -m benchmarks.bench_lesson_pack --rounds 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+
+
+def walk(tutor, rounds: int):
+    latencies = []
+    for round_number in range(rounds):
+        for step in range(len(tutor.sections)):
+            query = "start the lesson" if step == 0 else f"next lesson please ({round_number})"
+            start = time.perf_counter()
+            tutor.teach(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms) as base_url, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.tutor_agent import TutorAgent
+        from utils.lesson_pack import LessonPack, build_lesson_pack
+
+        path = os.path.join(tmp, "lesson_pack.json.gz")
+        start = time.perf_counter()
+        build_lesson_pack().save(path)
+        print(f"built pack in {time.perf_counter() - start:.2f}s ({os.path.getsize(path):,} bytes)\n")
+
+        modes = (
+            ("no pack", None, False),
+            ("pack", LessonPack.load(path), False),
+            ("pack + fast", LessonPack.load(path), True),
+        )
+        for name, pack, fast_mode in modes:
+            tutor = TutorAgent(lesson_pack=pack, fast_mode=fast_mode)
+            # lesson_pack=None means "load LESSON_PACK_PATH"; force the mode under test
+            tutor.lesson_pack = pack
+            tutor.response_cache = SemanticResponseCache(threshold=1.01)
+            latencies = walk(tutor, args.rounds)
+            print(f"{name:<12} p50={np.percentile(latencies, 50):8.2f}ms  "
+                  f"p90={np.percentile(latencies, 90):8.2f}ms  turns={len(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Tutor prefetch benchmark - "next lesson" latency, prefetch hit rate and wasted LLM tokens
+
+A simulated student works through the sections, pausing to read after each
+answer and occasionally asking for a quiz instead (which cancels the prefetch).
+Runs against the local stub LLM/Qdrant server.
+
+Usage:
+    python -m benchmarks.bench_prefetch --turns 40 --read-seconds 1.0
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+
+
+def session(orchestrator, turns: int, read_seconds: float, switch_rate: float, seed: int = 5):
+    rng = random.Random(seed)
+    latencies = []
+    for turn in range(turns):
+        if turn == 0:
+            query = "start the lesson"
+        elif rng.random() < switch_rate:
+            query = "quiz me on this"
+        else:
+            query = "next lesson please"
+
+        start = time.perf_counter()
+        orchestrator.process(query)
+        if "lesson" in query:
+            latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(read_seconds)
+    return np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--read-seconds", type=float, default=1.0)
+    parser.add_argument("--switch-rate", type=float, default=0.25)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-interval-ms", type=float, default=10.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms,
+                     token_interval_ms=args.token_interval_ms) as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+
+        for name, enabled, generate in (("off", False, False), ("retrieval", True, False),
+                                        ("retrieval+llm", True, True)):
+            orchestrator = OrchestratorAgent()
+            tutor = orchestrator.tutor
+            tutor.prefetch_enabled, tutor.prefetch_generate = enabled, generate
+            tutor.response_cache = SemanticResponseCache(threshold=1.01)
+            tutor.qdrant.retrieval_cache.invalidate(tutor.qdrant.collection_name)
+
+            latencies = session(orchestrator, args.turns, args.read_seconds, args.switch_rate)
+            tutor.cancel_prefetch()
+            metrics = tutor.prefetch_metrics()
+            print(f"{name:<14} lesson p50={np.percentile(latencies, 50):8.2f}ms  "
+                  f"p90={np.percentile(latencies, 90):8.2f}ms  hit rate={metrics['hit_rate']:6.1%}  "
+                  f"issued={metrics['issued']}  cancelled={metrics['cancelled']}  "
+                  f"wasted tokens={metrics['wasted_tokens']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Profile store benchmark - memory per 100k students and lookup latency, notebook vector collection vs keyed stores
+
+Stores --students generated student profiles (about a dozen topics each), then
+looks up --lookups random students by id, as StudentMemorySystem does on first
+use:
+
+- qdrant vectors: the notebook's layout, each profile a point with a 384-dim
+  progress vector that is never searched
+- qdrant payload-only: utils.student_memory.QdrantProfileBackend, a vectorless
+  collection
+- sqlite: utils.student_memory.SQLiteProfileBackend, a local file
+
+Both Qdrant modes use the local in-memory client, so lookups include no network
+round-trip. Every mode is a fresh subprocess, so its memory growth (peak RSS
+over the RSS after imports) belongs to that store alone.
+
+Usage:
+    python -m benchmarks.bench_profile_store --students 100000 --lookups 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+MODES = ["qdrant vectors", "qdrant payload-only", "sqlite"]
+
+
+def profiles(count: int) -> list:
+    rng = random.Random(0)
+    result = []
+    for i in range(count):
+        topics = [f"topic-{n}" for n in rng.sample(range(200), rng.randint(4, 20))]
+        mastered = [topic for topic in topics if rng.random() < 0.6]
+        result.append({
+            "student_id": f"student-{i}",
+            "topics_covered": topics,
+            "confusion_points": [topic for topic in topics if topic not in mastered],
+            "mastered_topics": mastered,
+            "preferred_styles": rng.sample(["example", "analogy", "step-by-step", "visual"], 2),
+            "total_interactions": len(topics) * 3,
+            "start_time": "2026-01-01T09:00:00",
+            "last_emotion": "neutral",
+            "last_update": "2026-01-01T10:00:00",
+            "version": 1,
+            "write_ids": [f"{i:032x}"]
+        })
+    return result
+
+
+def child(mode: str, students: int, lookups: int, tmp: str):
+    """One measured run; prints its results as JSON"""
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, PointStruct, VectorParams
+
+    from utils.circuit_breaker import CircuitBreaker
+    from utils.embeddings import EMBEDDING_DIM, EMBEDDING_VERSION, embed_many
+    from utils.student_memory import QdrantProfileBackend, SQLiteProfileBackend, profile_point_id
+
+    payloads = profiles(students)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    disk_mb = 0.0
+    if mode == "qdrant vectors":
+        client = QdrantClient(":memory:")
+        client.create_collection("student_memory",
+                                 vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+        for first in range(0, students, 1000):
+            batch = payloads[first:first + 1000]
+            vectors = embed_many([f"Student {p['student_id']}: {len(p['mastered_topics'])} mastered" for p in batch])
+            client.upsert("student_memory", points=[
+                PointStruct(id=profile_point_id(p["student_id"]), vector=vector.tolist(),
+                            payload={**p, "embedding_version": EMBEDDING_VERSION})
+                for p, vector in zip(batch, vectors)
+            ])
+
+        def get(student_id):
+            records = client.retrieve("student_memory", ids=[profile_point_id(student_id)])
+            return records[0].payload if records else None
+    else:
+        if mode == "sqlite":
+            path = os.path.join(tmp, "student_memory.db")
+            backend = SQLiteProfileBackend(path)
+        else:
+            backend = QdrantProfileBackend(QdrantClient(":memory:"), "student_profiles", CircuitBreaker("qdrant"))
+            backend.create_collection()
+        for first in range(0, students, 1000):
+            backend.write(payloads[first:first + 1000])
+        if mode == "sqlite":
+            disk_mb = sum(os.path.getsize(f"{path}{suffix}") for suffix in ("", "-wal")
+                          if os.path.exists(f"{path}{suffix}")) / 1e6
+        get = backend.get
+    load_seconds = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    rng = random.Random(1)
+    latencies = []
+    for _ in range(lookups):
+        student_id = f"student-{rng.randrange(students)}"
+        start = time.perf_counter()
+        assert get(student_id)["student_id"] == student_id
+        latencies.append((time.perf_counter() - start) * 1e6)
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "growth_mb": (peak_kb - baseline_kb) / 1024,
+        "disk_mb": disk_mb,
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p99_us": float(np.percentile(latencies, 99))
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--tmp", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.students, args.lookups, args.tmp)
+
+    scale = 100_000 / args.students
+    print(f"{args.students} students, {args.lookups} lookups; memory and disk scaled to 100k students\n")
+    print(f"{'store':<20} {'load s':>7} {'RSS/100k':>9} {'disk/100k':>10} {'lookup p50':>11} {'p99':>8}")
+    for mode in MODES:
+        with tempfile.TemporaryDirectory() as tmp:
+            command = [sys.executable, "-m", "benchmarks.bench_profile_store", "--child", mode, "--tmp", tmp,
+                       "--students", str(args.students), "--lookups", str(args.lookups)]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        disk = f"{result['disk_mb'] * scale:8.0f}MB" if result["disk_mb"] else f"{'-':>10}"
+        print(f"{mode:<20} {result['load_seconds']:7.1f} {result['growth_mb'] * scale:7.0f}MB "
+              f"{disk} {result['p50_us']:9.0f}µs {result['p99_us']:6.0f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Re-ingest benchmark - time and bytes uploaded to re-ingest a lightly edited PDF, incremental vs full rebuild
+
+Generates a book (benchmarks/bench_ingest.generate_pdf) and a revision of it with
+a sentence inserted mid-page into --edit-rate of the pages, then runs
+ingest.IngestPipeline against the local stub server, which counts the request
+bytes it receives:
+
+- first ingest: no manifest yet, everything is embedded and uploaded
+- unchanged: the same PDF again
+- edited: the revision, incrementally (only changed chunks are embedded and sent)
+- edited, full: the revision with full=True, i.e. a rebuild as before
+
+Usage:
+    python -m benchmarks.bench_reingest --pages 1000 --edit-rate 0.01
+"""
+
+import argparse
+import os
+import tempfile
+
+import httpx
+
+from benchmarks.bench_ingest import generate_pdf
+from benchmarks.stubs import stub_server, stub_environment
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--edit-rate", type=float, default=0.01)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, stub_server() as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from ingest import IngestPipeline
+        from utils.blob_store import BlobStore
+        from utils.clients import get_qdrant_manager
+
+        original, revised = os.path.join(tmp, "book.pdf"), os.path.join(tmp, "book_revised.pdf")
+        generate_pdf(original, args.pages)
+        generate_pdf(revised, args.pages, edit_rate=args.edit_rate)
+
+        pipeline = IngestPipeline(get_qdrant_manager(), get_qdrant_manager("pdf_images"),
+                                  workers=args.workers, manifest_dir=os.path.join(tmp, "manifests"),
+                                  blob_store=BlobStore(os.path.join(tmp, "blobs")))
+
+        def received_bytes() -> int:
+            return httpx.get(f"{base_url}/stub/stats").json()["received_bytes"]
+
+        print(f"{'run':<14} {'seconds':>8} {'chunks':>7} {'embedded':>9} {'moved':>6} {'deleted':>8} "
+              f"{'writes':>7} {'uploaded':>10}")
+        for name, path, full in (("first ingest", original, False), ("unchanged", original, False),
+                                 ("edited", revised, False), ("edited, full", revised, True)):
+            before = received_bytes()
+            # Both files are the same document, as a revised book keeps its name
+            stats = pipeline.run(path, document="book.pdf", full=full)
+            uploaded = received_bytes() - before
+            print(f"{name:<14} {stats['seconds']:8.2f} {stats['chunks']:7d} {stats['embedded']:9d} "
+                  f"{stats['moved']:6d} {stats['deleted']:8d} {stats['batches']:7d} {uploaded / 1e6:8.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
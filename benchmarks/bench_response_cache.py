@@ -0,0 +1,82 @@
+"""
+Response cache benchmark - hit rate and latency from replaying a synthetic student question log
+
+Questions follow a Zipf popularity curve and are asked with casing, punctuation
+and filler-word variations, against the local stub LLM/Qdrant server.
+
+Usage:
+    python -m benchmarks.bench_response_cache --questions 500
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+
+TOPICS = [
+    "an asset", "a liability", "financial literacy", "passive income", "the asset column",
+    "a corporation", "the rat race", "cash flow", "net worth", "an income statement",
+    "a balance sheet", "capital gains", "the poor dad", "the rich dad", "minding your own business",
+    "the power of corporations", "working to learn", "fear of losing money", "a real estate investment", "taxes",
+]
+TEMPLATES = [
+    "What is {}?", "what is {}", "What is {} ?", "Explain {}", "explain {} please",
+    "Why does the book talk about {}?", "How does the book define {}?", "Can you explain {}?",
+]
+
+
+def question_log(n: int, seed: int = 3):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(TOPICS))]
+    log = []
+    for _ in range(n):
+        topic = rng.choices(TOPICS, weights=weights)[0]
+        log.append(rng.choice(TEMPLATES).format(topic))
+    return log
+
+
+def replay(orchestrator, log):
+    latencies = []
+    for question in log:
+        start = time.perf_counter()
+        orchestrator.process(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    log = question_log(args.questions)
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms) as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+        orchestrator = OrchestratorAgent()
+
+        for name, threshold in (("no cache", 1.01), ("semantic cache", args.threshold)):
+            caches = [SemanticResponseCache(threshold=threshold) for _ in range(2)]
+            orchestrator.search.response_cache, orchestrator.tutor.response_cache = caches
+            latencies = replay(orchestrator, log)
+
+            hits = sum(cache.hits for cache in caches)
+            lookups = hits + sum(cache.misses for cache in caches)
+            print(f"{name:<15} hit rate={hits / max(lookups, 1):6.1%}  "
+                  f"p50={np.percentile(latencies, 50):7.1f}ms  p90={np.percentile(latencies, 90):7.1f}ms  "
+                  f"mean={latencies.mean():7.1f}ms  entries={sum(c.stats()['entries'] for c in caches)}  "
+                  f"bytes={sum(c.stats()['bytes'] for c in caches):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Retrieval cache benchmark - latency of the fixed tutor/quiz searches with and without the cache
+
+Replays the ten tutor sections and five quiz topics against the local stub
+Qdrant server with each cache backend.
+
+Usage:
+    python -m benchmarks.bench_retrieval_cache --lookups 500
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache, SQLiteCacheBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with stub_server(qdrant_latency_ms=args.qdrant_latency_ms) as base_url, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.quiz_agent import QuizAgent
+        from agents.tutor_agent import TutorAgent
+        from utils.qdrant_client import QdrantManager
+
+        queries = [(section, 3) for section in TutorAgent().sections] + [(topic, 3) for topic in QuizAgent().topics]
+        rng = random.Random(7)
+        log = [rng.choice(queries) for _ in range(args.lookups)]
+
+        backends = (
+            ("no cache", MemoryCacheBackend(max_entries=0)),
+            ("memory", MemoryCacheBackend()),
+            ("sqlite", SQLiteCacheBackend(os.path.join(tmp, "retrieval_cache.db"))),
+        )
+        for name, backend in backends:
+            manager = QdrantManager(retrieval_cache=RetrievalCache(backend))
+            latencies = []
+            for query, limit in log:
+                start = time.perf_counter()
+                manager.search(query, limit=limit)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies = np.asarray(latencies)
+
+            cache = manager.get_stats()["retrieval_cache"]
+            print(f"{name:<9} hit rate={cache['hit_rate']:6.1%}  p50={np.percentile(latencies, 50):7.2f}ms  "
+                  f"p99={np.percentile(latencies, 99):7.2f}ms  total={latencies.sum() / 1000:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Retrieval context benchmark - Qdrant queries per turn with per-agent retrieval vs one shared context per turn
+
+Replays the labeled intent queries (benchmarks/intent_eval.jsonl) through
+OrchestratorAgent.process against the local stub server, with the retrieval
+cache disabled so every search reaches Qdrant.
+
+Usage:
+    python -m benchmarks.bench_retrieval_context
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from benchmarks.bench_intent import load_eval_set
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache
+
+
+class CountingClient:
+    """Wraps a QdrantClient and counts query_points calls"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = 0
+
+    def query_points(self, *args, **kwargs):
+        self.calls += 1
+        return self.client.query_points(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    queries, _ = load_eval_set()
+
+    with stub_server(qdrant_latency_ms=args.qdrant_latency_ms) as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+
+        for name, shared in (("per-agent", False), ("shared context", True)):
+            orchestrator = OrchestratorAgent()
+            orchestrator.shared_retrieval = shared
+            orchestrator.tutor.prefetch_enabled = False
+            orchestrator.search.response_cache = SemanticResponseCache(threshold=1.01)
+            orchestrator.tutor.response_cache = SemanticResponseCache(threshold=1.01)
+            manager = orchestrator.search.qdrant
+            manager.retrieval_cache = RetrievalCache(MemoryCacheBackend(max_entries=0))
+            counter = manager.client = CountingClient(manager.client)
+
+            calls, fan_out_calls = [], []
+            for query in queries:
+                before = counter.calls
+                _, logs = orchestrator.process(query, session_id=name)
+                calls.append(counter.calls - before)
+                if any("branch" in log for log in logs):
+                    fan_out_calls.append(calls[-1])
+
+            print(f"{name:<15} Qdrant queries/turn={np.mean(calls):.2f}  "
+                  f"fan-out turns={len(fan_out_calls)} at {np.mean(fan_out_calls or [0]):.2f} queries/turn  "
+                  f"total={sum(calls)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Search benchmark - recall@k and latency of QdrantManager.search on a local in-memory Qdrant
+
+Usage:
+    python -m benchmarks.bench_search --sizes 10000 100000 --queries 200 --k 5
+"""
+
+import argparse
+import os
+import random
+import time
+from typing import List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+from utils.embeddings import embed_many, simple_embed, EMBEDDING_DIM, EMBEDDING_VERSION
+from utils.qdrant_client import QdrantManager
+
+COLLECTION = "bench_pdf_content"
+VOCABULARY = [f"word{i}" for i in range(5000)]
+
+
+def make_chunks(n: int, rng: random.Random) -> List[str]:
+    """Generate n synthetic passages of 20-60 words"""
+    return [" ".join(rng.choices(VOCABULARY, k=rng.randint(20, 60))) for _ in range(n)]
+
+
+def build_collection(client: QdrantClient, chunks: List[str], batch_size: int = 1000) -> np.ndarray:
+    """Ingest chunks the same way the notebook does and return the vector matrix"""
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE)
+    )
+
+    vectors = embed_many(chunks)
+    for start in range(0, len(chunks), batch_size):
+        points = [
+            PointStruct(
+                id=i,
+                vector=vectors[i].tolist(),
+                payload={
+                    "text": chunks[i],
+                    "sequence_id": i,
+                    "page": i // 10 + 1,
+                    "difficulty": "beginner",
+                    "embedding_version": EMBEDDING_VERSION
+                }
+            )
+            for i in range(start, min(start + batch_size, len(chunks)))
+        ]
+        client.upsert(collection_name=COLLECTION, points=points)
+    return vectors
+
+
+def run(size: int, num_queries: int, k: int, seed: int = 42):
+    rng = random.Random(seed)
+    chunks = make_chunks(size, rng)
+
+    client = QdrantClient(":memory:")
+    start = time.perf_counter()
+    vectors = build_collection(client, chunks)
+    ingest_seconds = time.perf_counter() - start
+
+    manager = QdrantManager(client=client, collection_name=COLLECTION)
+
+    # Queries are word samples from random passages, like a student paraphrasing a section
+    queries = []
+    for _ in range(num_queries):
+        words = rng.choice(chunks).split()
+        queries.append(" ".join(rng.sample(words, k=min(8, len(words)))))
+
+    latencies = []
+    recalls = []
+    for query in queries:
+        t0 = time.perf_counter()
+        results = manager.search(query, limit=k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+        # Exact top-k by brute-force cosine similarity (vectors are unit length)
+        exact = np.argsort(-(vectors @ np.asarray(simple_embed(query), dtype=np.float32)))[:k]
+        found = {r["metadata"]["sequence_id"] for r in results}
+        recalls.append(len(found & set(exact.tolist())) / k)
+
+    print(f"chunks={size:>7}  ingest={ingest_seconds:6.1f}s  "
+          f"recall@{k}={np.mean(recalls):.3f}  "
+          f"p50={np.percentile(latencies, 50):7.2f}ms  p99={np.percentile(latencies, 99):7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GROQ_API_KEY", "bench")
+    for size in args.sizes:
+        run(size, args.queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
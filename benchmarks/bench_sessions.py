@@ -0,0 +1,114 @@
+"""
+Session store benchmark - isolation of concurrent users on one shared orchestrator,
+memory per session and load/save latency
+
+Many simulated students interleave lessons and searches on a single
+OrchestratorAgent (local stub LLM/Qdrant server); each one's lesson pointer
+must only move with its own turns.
+
+Usage:
+    python -m benchmarks.bench_sessions --users 200 --sessions 100000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.clients import aclose_async_clients
+from utils.session_store import SessionStore
+
+
+async def student(orchestrator, session_id: str, rng: random.Random):
+    """Run one student's turns and return (lessons taken, progress footers seen)"""
+    lessons, progress = 0, []
+    for turn in range(rng.randint(1, 12)):
+        if turn and rng.random() < 0.3:
+            await orchestrator.aprocess("what is an asset", session_id)
+            continue
+        query = "start the lesson" if turn == 0 else "next lesson please"
+        response, _ = await orchestrator.aprocess(query, session_id)
+        lessons += 1
+        progress.append(int(re.search(r"Progress: Section (\d+)/", response).group(1)))
+    return lessons, progress
+
+
+async def concurrency(orchestrator, users: int):
+    rng = random.Random(11)
+    session_ids = [f"student-{i}" for i in range(users)]
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(student(orchestrator, sid, random.Random(rng.random())) for sid in session_ids))
+    elapsed = time.perf_counter() - start
+    await aclose_async_clients()
+
+    last = len(orchestrator.tutor.sections) - 1
+    violations = 0
+    for session_id, (lessons, progress) in zip(session_ids, outcomes):
+        expected = [min(n, last) for n in range(1, lessons + 1)]
+        state = orchestrator.sessions.load(session_id)
+        if progress != expected or state.current_section != min(lessons, last):
+            violations += 1
+
+    turns = sum(len(orchestrator.sessions.load(sid).conversation_context) for sid in session_ids)
+    print(f"users={users}  turns={turns}  {turns / elapsed:7.1f} turns/s  isolation violations={violations}")
+
+
+def memory_per_session(sessions: int):
+    store = SessionStore(max_sessions=sessions)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(sessions):
+        state = store.load(f"student-{i}")
+        state.current_section = i % 10
+        state.conversation_context.extend({"query": "next lesson please", "intent": "teach"} for _ in range(5))
+        store.save(state)
+    used = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    print(f"sessions={sessions}  memory={used / sessions:,.0f} bytes/session (5 turns of context)")
+
+
+def latency(path: str, operations: int = 20_000):
+    for name, store in (("memory", SessionStore()), ("sqlite", SessionStore(max_sessions=100, path=path))):
+        loads, saves = [], []
+        for i in range(operations):
+            session_id = f"student-{i % 1000}"
+            t0 = time.perf_counter()
+            state = store.load(session_id)
+            t1 = time.perf_counter()
+            state.current_section = (state.current_section + 1) % 10
+            store.save(state)
+            loads.append(t1 - t0)
+            saves.append(time.perf_counter() - t1)
+        print(f"{name:<7} load p50={np.percentile(loads, 50) * 1e6:7.1f}us  "
+              f"save p50={np.percentile(saves, 50) * 1e6:7.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--llm-latency-ms", type=float, default=100.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, qdrant_latency_ms=args.qdrant_latency_ms) as base_url, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+        asyncio.run(concurrency(OrchestratorAgent(), args.users))
+
+        memory_per_session(args.sessions)
+        # 100 in-memory slots for 1000 sessions, so most loads go to SQLite
+        latency(os.path.join(tmp, "sessions.db"))
+
+
+if __name__ == "__main__":
+    main()
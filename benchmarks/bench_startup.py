@@ -0,0 +1,90 @@
+"""
+Startup benchmark - OrchestratorAgent() construction time, HTTP pools and open sockets,
+per-agent clients (previous layout) vs the shared client registry
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 20
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import time
+
+import httpx
+from groq import Groq
+from qdrant_client import QdrantClient
+
+from agents.orchestrator import OrchestratorAgent
+from benchmarks.stubs import stub_server, stub_environment
+from utils.clients import registry
+
+
+def open_sockets() -> int:
+    """Number of socket file descriptors held by this process (Linux)"""
+    fd_dir = "/proc/self/fd"
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            count += os.readlink(os.path.join(fd_dir, fd)).startswith("socket:")
+        except OSError:
+            pass
+    return count
+
+
+def http_pools() -> int:
+    """Number of live httpx clients, i.e. separate connection pools"""
+    gc.collect()
+    return sum(isinstance(obj, (httpx.Client, httpx.AsyncClient)) for obj in gc.get_objects())
+
+
+def build_per_agent():
+    """What OrchestratorAgent() used to build: a Groq client plus a QdrantManager
+    (its own QdrantClient and an unused Groq client) for each of the three agents"""
+    clients = []
+    for _ in range(3):
+        clients.append(Groq(api_key=os.getenv("GROQ_API_KEY")))
+        clients.append(QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY") or None))
+        clients.append(Groq(api_key=os.getenv("GROQ_API_KEY")))
+    return clients
+
+
+def build_shared():
+    return OrchestratorAgent()
+
+
+def measure(name: str, build, repeat: int, reset=None):
+    timings = []
+    sockets = pools = 0
+    for _ in range(repeat):
+        if reset:
+            reset()
+        gc.collect()
+        sockets_before = open_sockets()
+        pools_before = http_pools()
+        start = time.perf_counter()
+        built = build()
+        timings.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)  # let background compatibility checks finish
+        sockets = open_sockets() - sockets_before
+        pools = http_pools() - pools_before
+        del built
+    print(f"{name:<18} construct p50={statistics.median(timings):7.2f}ms  "
+          f"http pools={pools:>2}  open sockets={sockets:>2}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with stub_server() as base_url:
+        os.environ.update(stub_environment(base_url))
+        measure("per-agent clients", build_per_agent, args.repeat)
+        measure("registry (cold)", build_shared, args.repeat, reset=registry.close)
+        measure("registry (warm)", build_shared, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Streaming benchmark - time-to-first-token and total latency of OrchestratorAgent.stream_process
+vs the blocking process(), against a local stub streaming server
+
+Usage:
+    python -m benchmarks.bench_streaming --turns 20 --llm-latency-ms 300 --token-interval-ms 20
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.stubs import stub_server, stub_environment
+from utils.response_cache import SemanticResponseCache
+
+QUERIES = {
+    "search": "What is the difference between an asset and a liability?",
+    "teach": "Teach me the next lesson",
+    "quiz": "Quiz me on financial literacy",
+}
+
+
+# Tutor and quiz responses open with a header that is shown before the LLM starts
+HEADERS = ("📖", "📝")
+
+
+def blocking(orchestrator, query: str):
+    start = time.perf_counter()
+    orchestrator.process(query)
+    total = time.perf_counter() - start
+    # Nothing is shown until the whole response arrives
+    return total, total, total
+
+
+def streaming(orchestrator, query: str):
+    start = time.perf_counter()
+    deltas, _ = orchestrator.stream_process(query)
+    first_text = first_token = None
+    for delta in deltas:
+        now = time.perf_counter() - start
+        if first_text is None:
+            first_text = now
+        if first_token is None and not delta.startswith(HEADERS):
+            first_token = now
+    return first_text, first_token, time.perf_counter() - start
+
+
+def report(name: str, intent: str, samples):
+    first_text, first_token, total = (np.asarray(column) * 1000 for column in zip(*samples))
+    print(f"{intent:<7} {name:<10} first text p50={np.percentile(first_text, 50):7.1f}ms  "
+          f"TTFT p50={np.percentile(first_token, 50):7.1f}ms p99={np.percentile(first_token, 99):7.1f}ms  "
+          f"total p50={np.percentile(total, 50):7.1f}ms p99={np.percentile(total, 99):7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="delay before the first token")
+    parser.add_argument("--token-interval-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with stub_server(llm_latency_ms=args.llm_latency_ms, token_interval_ms=args.token_interval_ms) as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+        orchestrator = OrchestratorAgent()
+        # Every turn repeats its intent's query: with the response caches on, all but the
+        # first would be answered from the cache, and nothing would be streamed
+        orchestrator.search.response_cache = SemanticResponseCache(threshold=1.01)
+        orchestrator.tutor.response_cache = SemanticResponseCache(threshold=1.01)
+        orchestrator.tutor.prefetch_enabled = False
+
+        for intent, query in QUERIES.items():
+            report("blocking", intent, [blocking(orchestrator, query) for _ in range(args.turns)])
+            report("streaming", intent, [streaming(orchestrator, query) for _ in range(args.turns)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Student memory benchmark - updates/sec, Qdrant round-trips per session and lost updates,
+notebook read-modify-write vs the write-behind StudentMemorySystem
+
+--writers threads (each with its own memory system, as separate app workers
+would have) run --sessions tutoring sessions of --turns interactions each
+against one local in-memory Qdrant collection. Every Qdrant call takes
+--rtt-ms of simulated network latency. Students are drawn from --students, so
+writers update the same students concurrently.
+
+- notebook: the notebook's StudentMemorySystem.update_student_progress, a
+  retrieve, list membership checks and an upsert with a fresh vector per update
+- write-behind: utils.student_memory.StudentMemorySystem, profiles cached in
+  memory, updates coalesced per student and written in conditional batched
+  upserts to a vectorless collection every --flush-seconds
+
+Afterwards each student's stored total_interactions is compared with the
+number of updates made for it; the difference is lost updates.
+
+Usage:
+    python -m benchmarks.bench_student_memory --writers 4 --sessions 400 --turns 10 --rtt-ms 2
+"""
+
+import argparse
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.embeddings import EMBEDDING_DIM, EMBEDDING_VERSION, simple_embed
+from utils.student_memory import QdrantProfileBackend, StudentMemorySystem, profile_point_id
+
+EMOTIONS = ["neutral", "happy", "confused", "frustrated"]
+STYLES = ["example", "analogy", "step-by-step", "visual"]
+
+
+class RemoteClient:
+    """A QdrantClient whose every call waits rtt_ms first, and is counted"""
+
+    def __init__(self, client: QdrantClient, rtt_ms: float):
+        self.client = client
+        self.rtt = rtt_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        def call(*args, **kwargs):
+            time.sleep(self.rtt)
+            with self._lock:
+                self.calls += 1
+                return method(*args, **kwargs)
+        return call
+
+
+class NotebookMemory:
+    """The notebook's StudentMemorySystem update path"""
+
+    def __init__(self, client, collection_name: str):
+        self.client = client
+        self.collection_name = collection_name
+
+    def update_student_progress(self, student_id: str, topic: str,
+                                understood: bool, emotion: str, style_used: str):
+        point_id = profile_point_id(student_id)
+        result = self.client.retrieve(collection_name=self.collection_name, ids=[point_id])
+        if result:
+            current_payload = result[0].payload
+        else:
+            current_payload = {"student_id": student_id, "topics_covered": [], "confusion_points": [],
+                               "mastered_topics": [], "preferred_styles": [], "total_interactions": 0,
+                               "start_time": datetime.now().isoformat()}
+        if topic not in current_payload["topics_covered"]:
+            current_payload["topics_covered"].append(topic)
+        if understood:
+            if topic not in current_payload["mastered_topics"]:
+                current_payload["mastered_topics"].append(topic)
+        else:
+            if topic not in current_payload["confusion_points"]:
+                current_payload["confusion_points"].append(topic)
+        if style_used not in current_payload["preferred_styles"]:
+            current_payload["preferred_styles"].append(style_used)
+        current_payload["total_interactions"] += 1
+        current_payload["last_emotion"] = emotion
+        current_payload["last_update"] = datetime.now().isoformat()
+        current_payload["embedding_version"] = EMBEDDING_VERSION
+        vector = simple_embed(f"Student {student_id}: {len(current_payload['mastered_topics'])} mastered")
+        self.client.upsert(collection_name=self.collection_name,
+                           points=[PointStruct(id=point_id, vector=vector, payload=current_payload)])
+
+    def close(self):
+        pass
+
+
+def sessions_for(writer: int, args) -> list:
+    """(student, [(topic, understood, emotion, style)]) per session of one writer"""
+    rng = random.Random(writer)
+    return [
+        (f"student-{rng.randrange(args.students)}", [
+            (f"topic-{rng.randrange(50)}", rng.random() < 0.6, rng.choice(EMOTIONS), rng.choice(STYLES))
+            for _ in range(args.turns)
+        ])
+        for _ in range(args.sessions // args.writers)
+    ]
+
+
+def run(name: str, args) -> dict:
+    remote = RemoteClient(QdrantClient(":memory:"), args.rtt_ms)
+    collection_name = f"student_memory_{uuid.uuid4().hex[:8]}"
+    workloads = [sessions_for(writer, args) for writer in range(args.writers)]
+    if name == "notebook":
+        remote.client.create_collection(collection_name,
+                                        vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+        systems = [NotebookMemory(remote, collection_name) for _ in workloads]
+    else:
+        backend = QdrantProfileBackend(remote, collection_name, CircuitBreaker("qdrant"))
+        remote.client.create_collection(collection_name, vectors_config={})
+        systems = [StudentMemorySystem(backend, flush_seconds=args.flush_seconds) for _ in workloads]
+
+    def writer(system, sessions):
+        for student_id, turns in sessions:
+            for topic, understood, emotion, style in turns:
+                system.update_student_progress(student_id, topic, understood, emotion, style)
+
+    threads = [threading.Thread(target=writer, args=pair) for pair in zip(systems, workloads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for system in systems:
+        system.close()
+    seconds = time.perf_counter() - start
+
+    expected = Counter()
+    for sessions in workloads:
+        for student_id, turns in sessions:
+            expected[student_id] += len(turns)
+    records = remote.client.retrieve(collection_name, ids=[profile_point_id(student_id) for student_id in expected])
+    stored = sum(record.payload["total_interactions"] for record in records)
+    sessions = sum(len(sessions) for sessions in workloads)
+    return {
+        "updates": sum(expected.values()),
+        "seconds": seconds,
+        "round_trips": remote.calls,
+        "sessions": sessions,
+        "lost": sum(expected.values()) - stored,
+        "conflicts": sum(system.stats["conflicts"] for system in systems if hasattr(system, "stats"))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=400)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--flush-seconds", type=float, default=0.1)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.sessions} sessions x {args.turns} updates over {args.students} students, "
+          f"{args.rtt_ms} ms per Qdrant call\n")
+    print(f"{'mode':<13} {'updates/s':>10} {'round-trips/session':>20} {'lost updates':>13} {'conflicts':>10}")
+    for name in ("notebook", "write-behind"):
+        result = run(name, args)
+        print(f"{name:<13} {result['updates'] / result['seconds']:10.0f} "
+              f"{result['round_trips'] / result['sessions']:20.2f} "
+              f"{result['lost']:13d} {result['conflicts']:10d}")
+
+
+if __name__ == "__main__":
+    main()
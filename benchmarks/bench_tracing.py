@@ -0,0 +1,111 @@
+"""
+Tracing benchmark - per-span overhead, and a span breakdown of orchestrator turns
+
+Times the span context manager (enabled, with attributes, disabled) against an
+empty loop, and the agents' old per-log timestamp against utils.tracing.timestamp.
+Then replays the labeled intent queries through OrchestratorAgent.process against
+the local stub server and exports the collected spans as JSON lines and a
+Chrome trace (open in chrome://tracing or ui.perfetto.dev).
+
+Usage:
+    python -m benchmarks.bench_tracing --iterations 200000 --output-dir /tmp
+"""
+
+import argparse
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from benchmarks.bench_intent import load_eval_set
+from benchmarks.stubs import stub_server, stub_environment
+from utils.tracing import Tracer, get_tracer, span, timestamp
+
+
+def per_call_ns(fn, iterations: int) -> float:
+    start = time.perf_counter_ns()
+    fn(iterations)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def old_timestamp():
+    # What every agent's _get_timestamp() did per log entry
+    from datetime import datetime
+    return datetime.now().strftime("%H:%M:%S")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--output-dir", default=".")
+    args = parser.parse_args()
+
+    tracer = Tracer(capacity=4096)
+    disabled = Tracer(enabled=False)
+
+    def empty(n):
+        for _ in range(n):
+            pass
+
+    def enabled_span(n):
+        for _ in range(n):
+            with tracer.span("bench"):
+                pass
+
+    def attributed_span(n):
+        for _ in range(n):
+            with tracer.span("bench", agent="search", limit=5):
+                pass
+
+    def module_span(n):
+        # The agents' entry point, on the process-wide tracer
+        for _ in range(n):
+            with span("bench"):
+                pass
+
+    def disabled_span(n):
+        for _ in range(n):
+            with disabled.span("bench"):
+                pass
+
+    baseline = per_call_ns(empty, args.iterations)
+    for name, fn in (("span", enabled_span), ("span + 2 attributes", attributed_span),
+                     ("utils.tracing.span", module_span), ("span (tracing disabled)", disabled_span)):
+        print(f"{name:<24} {per_call_ns(fn, args.iterations) - baseline:8.0f} ns/span")
+
+    for name, fn in (("old _get_timestamp()", old_timestamp), ("tracing.timestamp()", timestamp)):
+        print(f"{name:<24} {per_call_ns(lambda n: [fn() for _ in range(n)], args.iterations):8.0f} ns/call")
+    print(f"ring buffer holds {len(tracer)} of {tracer.capacity} spans after {3 * args.iterations} recorded\n")
+
+    queries, _ = load_eval_set()
+    with stub_server() as base_url:
+        os.environ.update(stub_environment(base_url))
+
+        from agents.orchestrator import OrchestratorAgent
+
+        orchestrator = OrchestratorAgent()
+        orchestrator.tutor.prefetch_enabled = False
+        get_tracer().clear()
+        for query in queries:
+            orchestrator.process(query, session_id="bench")
+
+    spans = get_tracer().spans()
+    durations = defaultdict(list)
+    for name, start_ns, end_ns, _, _ in spans:
+        durations[name].append((end_ns - start_ns) / 1e6)
+
+    print(f"{len(queries)} turns, {len(spans)} spans")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"  {name:<16} n={len(values):<4} p50={np.percentile(values, 50):8.3f}ms  "
+              f"p95={np.percentile(values, 95):8.3f}ms  total={sum(values):9.1f}ms")
+
+    jsonl_path = os.path.join(args.output_dir, "trace.jsonl")
+    chrome_path = os.path.join(args.output_dir, "trace.json")
+    get_tracer().export_jsonl(jsonl_path, spans)
+    get_tracer().export_chrome(chrome_path, spans)
+    print(f"\nwrote {jsonl_path} and {chrome_path}")
+
+
+if __name__ == "__main__":
+    main()
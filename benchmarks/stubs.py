@@ -0,0 +1,302 @@
+"""
+Local stub servers - minimal Groq (OpenAI-style) and Qdrant REST endpoints for benchmarks
+
+Runs as a separate process so the benchmark's own sockets and CPU are not
+mixed with the server's:
+
+    python -m benchmarks.stubs --port 8765 --llm-latency-ms 200 --qdrant-latency-ms 5
+
+Faults can be injected into either backend (--fault-target): a share of
+requests that fail with 503 (--error-rate) and a share that stall for an
+extra --slow-ms (--slow-rate):
+
+    python -m benchmarks.stubs --fault-target qdrant --slow-rate 0.1 --slow-ms 2000
+
+With --store-points, upserted points are kept and queries on their collection
+return the closest ones (by dot product) with their payloads, so results and
+response sizes are real. --prefill-ms-per-1k-tokens makes completions take
+longer the larger their prompt, as LLM prefill does.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from utils.tokens import count_tokens
+
+STUB_ANSWER = ("Assets put money in your pocket and liabilities take money out. "
+               "Rich Dad taught Robert to build his asset column first. "
+               "What would you add to your own asset column?")
+
+
+class StubServer:
+    """HTTP/1.1 keep-alive server answering the handful of routes the agents use"""
+
+    def __init__(self, llm_latency_ms: float = 0.0, qdrant_latency_ms: float = 0.0,
+                 token_interval_ms: float = 0.0, error_rate: float = 0.0,
+                 slow_rate: float = 0.0, slow_ms: float = 0.0, fault_target: str = "all",
+                 store_points: bool = False, prefill_ms_per_1k_tokens: float = 0.0):
+        self.llm_latency = llm_latency_ms / 1000
+        self.qdrant_latency = qdrant_latency_ms / 1000
+        self.token_interval = token_interval_ms / 1000
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow = slow_ms / 1000
+        # "llm", "qdrant" or "all": which backend the injected errors and stalls hit
+        self.fault_target = fault_target
+        self.prefill_per_token = prefill_ms_per_1k_tokens / 1e6
+        # Upserted points per collection, id -> (vector, payload), when stored
+        self.stored: Optional[Dict[str, Dict]] = {} if store_points else None
+        # Request body bytes and completion prompt tokens received, reported at GET /stub/stats
+        self.received_bytes = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.received_bytes += len(body)
+                self.requests += 1
+                await self.route(method, path.split("?")[0], json.loads(body) if body else {}, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: Dict, writer: asyncio.StreamWriter):
+        if path == "/stub/stats":
+            return self.send_json(writer, {"received_bytes": self.received_bytes, "requests": self.requests,
+                                           "prompt_tokens": self.prompt_tokens})
+        if path.endswith("/chat/completions"):
+            prompt_tokens = sum(count_tokens(message.get("content") or "") for message in body.get("messages", []))
+            self.prompt_tokens += prompt_tokens
+            await asyncio.sleep(self.llm_latency + self._stall("llm") + prompt_tokens * self.prefill_per_token)
+            if self._should_fail("llm"):
+                return self.send_json(writer, {"error": {"message": "injected failure"}}, status=503)
+            if body.get("stream"):
+                return await self.send_stream(writer, body)
+            # A blocking completion only returns once every token has been generated
+            await asyncio.sleep(self.token_interval * len(STUB_ANSWER.split(" ")))
+            return self.send_json(writer, self.completion(body))
+
+        await asyncio.sleep(self.qdrant_latency + self._stall("qdrant"))
+        if self._should_fail("qdrant"):
+            return self.send_json(writer, {"status": {"error": "injected failure"}}, status=503)
+        collection = path.split("/")[2] if path.startswith("/collections/") else None
+        if path.endswith("/points/query"):
+            limit = body.get("limit", 10)
+            points = self.stored_points(collection, body.get("query"), limit) if self.stored else self.points(limit)
+            return self.send_json(writer, {"result": {"points": points}, "status": "ok", "time": 0.0})
+        if path.endswith("/points/batch"):
+            return self.send_json(writer, {"result": [self.update_result()] * len(body.get("operations", [])),
+                                           "status": "ok", "time": 0.0})
+        if method == "POST" and path.endswith("/points"):
+            # Retrieve by id
+            stored = (self.stored or {}).get(collection, {})
+            return self.send_json(writer, {"result": [
+                {"id": point_id, "payload": stored[point_id][1]} for point_id in body.get("ids", []) if point_id in stored
+            ], "status": "ok", "time": 0.0})
+        if method == "PUT" and path.endswith("/points") and self.stored is not None:
+            self.store(collection, body)
+        if (method == "PUT" and path.endswith("/points")) or path.endswith(("/points/delete", "/points/payload")):
+            # Writes are acknowledged and discarded
+            return self.send_json(writer, {"result": self.update_result(), "status": "ok", "time": 0.0})
+        if path.endswith("/exists"):
+            return self.send_json(writer, {"result": {"exists": True}, "status": "ok", "time": 0.0})
+        if path.startswith("/collections/"):
+            return self.send_json(writer, {"result": self.collection_info(), "status": "ok", "time": 0.0})
+        return self.send_json(writer, {"title": "qdrant - vector search engine", "version": "1.19.0"})
+
+    def _faulty(self, backend: str) -> bool:
+        return self.fault_target in ("all", backend)
+
+    def _should_fail(self, backend: str) -> bool:
+        return self.error_rate > 0 and self._faulty(backend) and random.random() < self.error_rate
+
+    def _stall(self, backend: str) -> float:
+        """Extra seconds this request hangs for, simulating a tail-latency outlier"""
+        if self.slow_rate > 0 and self._faulty(backend) and random.random() < self.slow_rate:
+            return self.slow
+        return 0.0
+
+    @staticmethod
+    def completion(body: Dict) -> Dict:
+        tokens = min(body.get("max_tokens") or 100, len(STUB_ANSWER.split()))
+        return {
+            "id": "stub", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": STUB_ANSWER}}],
+            "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": tokens,
+                      "total_tokens": tokens + len(json.dumps(body)) // 4}
+        }
+
+    def store(self, collection: str, body: Dict):
+        points = self.stored.setdefault(collection, {})
+        if "batch" in body:
+            batch = body["batch"]
+            count = len(batch["ids"])
+            points.update(zip(batch["ids"], zip(batch.get("vectors") or [None] * count,
+                                                batch.get("payloads") or [{}] * count)))
+        else:
+            points.update((point["id"], (point.get("vector"), point.get("payload") or {}))
+                          for point in body.get("points", []))
+
+    def stored_points(self, collection: str, query, limit: int):
+        """The stored points closest to the query vector, or the first ones if either lacks vectors"""
+        stored = list(self.stored.get(collection, {}).items())
+        # A plain vector is sent as {"nearest": vector}
+        query = query.get("nearest") if isinstance(query, dict) else query
+        if isinstance(query, list) and stored and all(vector is not None for _, (vector, _) in stored):
+            scores = np.array([vector for _, (vector, _) in stored], dtype=np.float32) @ np.array(query, np.float32)
+            order = np.argsort(-scores)[:limit]
+            return [{"id": stored[i][0], "version": 0, "score": float(scores[i]), "payload": stored[i][1][1]}
+                    for i in order]
+        return [{"id": point_id, "version": 0, "score": 0.9 - i * 0.01, "payload": payload}
+                for i, (point_id, (_, payload)) in enumerate(stored[:limit])]
+
+    @staticmethod
+    def update_result() -> Dict:
+        return {"operation_id": 0, "status": "completed"}
+
+    @staticmethod
+    def points(limit: int):
+        return [
+            {"id": i, "version": 0, "score": 0.9 - i * 0.01,
+             "payload": {"text": f"Stub passage {i}. {STUB_ANSWER}", "sequence_id": i, "page": 1}}
+            for i in range(limit)
+        ]
+
+    @staticmethod
+    def collection_info() -> Dict:
+        return {"status": "green", "optimizer_status": "ok", "points_count": 1000,
+                "indexed_vectors_count": 1000, "segments_count": 1,
+                "config": {"params": {"vectors": {"size": 384, "distance": "Cosine"}},
+                           "hnsw_config": {"m": 16, "ef_construct": 100, "full_scan_threshold": 10000},
+                           "optimizer_config": {"deleted_threshold": 0.2, "vacuum_min_vector_number": 1000,
+                                                "default_segment_number": 0, "flush_interval_sec": 5},
+                           "wal_config": {"wal_capacity_mb": 32, "wal_segments_ahead": 0}},
+                "payload_schema": {}}
+
+    @staticmethod
+    def send_json(writer: asyncio.StreamWriter, data: Dict, status: int = 200):
+        payload = json.dumps(data).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode() + payload
+        )
+
+    async def send_stream(self, writer: asyncio.StreamWriter, body: Dict):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n")
+        for word in STUB_ANSWER.split(" "):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": body.get("model", "stub"),
+                     "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+            self._write_chunk(writer, f"data: {json.dumps(chunk)}\n\n".encode())
+            await writer.drain()
+            await asyncio.sleep(self.token_interval)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def stub_server(llm_latency_ms: float = 0.0, qdrant_latency_ms: float = 0.0,
+                token_interval_ms: float = 0.0, error_rate: float = 0.0,
+                port: Optional[int] = None, slow_rate: float = 0.0, slow_ms: float = 0.0,
+                fault_target: str = "all", store_points: bool = False,
+                prefill_ms_per_1k_tokens: float = 0.0) -> Iterator[str]:
+    """Start the stub server in a subprocess and yield its base URL"""
+    port = port or free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stubs", "--port", str(port),
+        "--llm-latency-ms", str(llm_latency_ms), "--qdrant-latency-ms", str(qdrant_latency_ms),
+        "--token-interval-ms", str(token_interval_ms), "--error-rate", str(error_rate),
+        "--slow-rate", str(slow_rate), "--slow-ms", str(slow_ms), "--fault-target", fault_target,
+        "--prefill-ms-per-1k-tokens", str(prefill_ms_per_1k_tokens)
+    ] + (["--store-points"] if store_points else []))
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def stub_environment(base_url: str) -> Dict[str, str]:
+    """Environment variables that point the Groq and Qdrant clients at a stub server"""
+    return {
+        "GROQ_API_KEY": "stub",
+        "GROQ_BASE_URL": base_url,
+        "QDRANT_URL": base_url,
+        "QDRANT_API_KEY": "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--qdrant-latency-ms", type=float, default=0.0)
+    parser.add_argument("--token-interval-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    parser.add_argument("--fault-target", choices=["all", "llm", "qdrant"], default="all")
+    parser.add_argument("--store-points", action="store_true")
+    parser.add_argument("--prefill-ms-per-1k-tokens", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer(args.llm_latency_ms, args.qdrant_latency_ms, args.token_interval_ms, args.error_rate,
+                        args.slow_rate, args.slow_ms, args.fault_target, args.store_points,
+                        args.prefill_ms_per_1k_tokens)
+
+    async def serve():
+        srv = await asyncio.start_server(server.handle, "127.0.0.1", args.port, backlog=1024)
+        async with srv:
+            await srv.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Ingest package initialization"""
+from ingest.pipeline import IngestPipeline
+
+__all__ = ["IngestPipeline"]
@@ -0,0 +1,59 @@
+"""
+Ingest a PDF into Qdrant; running it again after the book changed only uploads the changes:
+    python -m ingest "Rich Dad Poor Dad.pdf" --create
+"""
+
+import argparse
+
+from ingest.chunker import MAX_TOKENS, OVERLAP_TOKENS, TARGET_TOKENS
+from ingest.pipeline import DEFAULT_IMAGE_COLLECTION, DEFAULT_MANIFEST_DIR, IngestPipeline
+from utils.blob_store import BlobStore
+from utils.clients import get_qdrant_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a PDF's chunks and images into Qdrant")
+    parser.add_argument("pdf_path")
+    parser.add_argument("--collection", default=None, help="Text collection (the agents' default if omitted)")
+    parser.add_argument("--image-collection", default=DEFAULT_IMAGE_COLLECTION)
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (CPU count if omitted)")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--chunk-tokens", type=int, default=TARGET_TOKENS, help="Target tokens per chunk")
+    parser.add_argument("--chunk-max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--chunk-overlap", type=int, default=OVERLAP_TOKENS, help="Tokens repeated from the last chunk")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embed_many call and upsert")
+    parser.add_argument("--max-pending", type=int, default=4, help="Upsert batches queued before extraction waits")
+    parser.add_argument("--no-images", action="store_true")
+    parser.add_argument("--create", action="store_true", help="Create missing collections and payload indexes")
+    parser.add_argument("--document", default=None, help="Name the book keeps across edits (file name if omitted)")
+    parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR)
+    parser.add_argument("--full", action="store_true", help="Re-embed and re-upload everything")
+    parser.add_argument("--blob-dir", default=None, help="Image blob store (BLOB_STORE_PATH or .blobs if omitted)")
+    args = parser.parse_args()
+
+    pipeline = IngestPipeline(
+        manager=get_qdrant_manager(args.collection),
+        image_manager=get_qdrant_manager(args.image_collection),
+        workers=args.workers,
+        pages_per_task=args.pages_per_task,
+        target_tokens=args.chunk_tokens,
+        max_tokens=args.chunk_max_tokens,
+        overlap_tokens=args.chunk_overlap,
+        batch_size=args.batch_size,
+        max_pending=args.max_pending,
+        with_images=not args.no_images,
+        manifest_dir=args.manifest_dir,
+        blob_store=BlobStore(args.blob_dir)
+    )
+    if args.create:
+        pipeline.create_collections()
+
+    stats = pipeline.run(args.pdf_path, document=args.document, full=args.full)
+    print(f"Ingested {stats['pages']} pages: {stats['chunks']} chunks, {stats['images']} images "
+          f"in {stats['batches']} writes, {stats['seconds']:.1f}s ({stats['pages_per_second']:.0f} pages/s)")
+    print(f"Chunks embedded {stats['embedded']}, moved {stats['moved']}, unchanged {stats['unchanged']}, "
+          f"deleted {stats['deleted']}; images uploaded {stats['images_uploaded']}")
+
+
+if __name__ == "__main__":
+    main()
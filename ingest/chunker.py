@@ -0,0 +1,186 @@
+"""
+Chunker - Sentence splitting and token-budgeted chunks with overlap, streamed across pages
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from utils.tokens import count_tokens
+
+# About the 100 words (utils.embeddings.MAX_WORDS) an embedding is built from
+TARGET_TOKENS = 128
+MAX_TOKENS = 192
+OVERLAP_TOKENS = 16
+# Past the target, a sentence ends its chunk with probability 1/CUT_EVERY
+CUT_EVERY = 2
+
+# Periods that end these words (lowercased, without their last period) do not end a sentence
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "st", "jr", "sr", "vs", "etc", "e.g", "i.e", "inc", "ltd",
+                 "co", "corp", "no", "fig", "vol", "pp", "u.s", "approx"}
+
+_HYPHENATED = re.compile(r"(\w)-\n\s*(\w)")
+# Sentence-ending punctuation, any closing quotes or brackets, then the whitespace after them
+_END = re.compile(r"[.!?]+[\"'”’)\]]*\s+")
+_TERMINATED = re.compile(r"[.!?][\"'”’)\]]*$")
+_OPENERS = "\"'“‘(["
+
+# A sentence with its token count
+Sentence = Tuple[str, int]
+
+
+def split_sentences(text: str) -> List[Sentence]:
+    """
+    Sentences of a page's text, with their token counts.
+
+    Lines are joined (words hyphenated across a line break are rejoined) and
+    whitespace collapsed. A sentence ends at . ! or ? followed by whitespace
+    and an uppercase letter, digit or opening quote, unless the period belongs
+    to an abbreviation or an initial. The last sentence may be unfinished; it
+    is returned as is.
+    """
+    text = " ".join(_HYPHENATED.sub(r"\1\2", text).split())
+    sentences, start = [], 0
+    for match in _END.finditer(text):
+        following = text[match.end():match.end() + 1]
+        if not (following.isupper() or following.isdigit() or following in _OPENERS):
+            continue
+        if match.group().startswith(".") and match.end() - match.start() == 2:
+            word = text[start:match.start()].rsplit(" ", 1)[-1].lower()
+            if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+                continue
+        sentence = text[start:match.end()].rstrip()
+        sentences.append((sentence, count_tokens(sentence)))
+        start = match.end()
+    if start < len(text):
+        sentences.append((text[start:], count_tokens(text[start:])))
+    return sentences
+
+
+def _join(first: str, second: str) -> str:
+    """A sentence continued on the next page"""
+    if first.endswith("-") and second[:1].islower():
+        return first[:-1] + second
+    return f"{first} {second}"
+
+
+def _is_cut(sentence: str) -> bool:
+    """Whether a chunk may end after this sentence; decided by the sentence alone"""
+    return hashlib.blake2b(sentence.encode("utf-8"), digest_size=2).digest()[0] % CUT_EVERY == 0
+
+
+class Chunker:
+    """
+    Packs the sentences of a document, page after page, into chunks of about
+    target_tokens tokens.
+
+    Chunks run across page boundaries, and a sentence left unfinished at the
+    bottom of a page is completed with the top of the next. Each chunk starts
+    with the last sentences (up to overlap_tokens) of the one before it and
+    never exceeds max_tokens; a single sentence longer than that is cut into
+    pieces of words.
+
+    Past target_tokens, whether a chunk ends after a sentence depends only on
+    that sentence, not on how many tokens came before. Boundaries are then
+    content-defined: after an edit they fall back on the same sentences as
+    before, so only the chunks around the edit change and a re-ingest embeds
+    those alone.
+
+    Feed pages in order with add_page(); each call returns the chunks it
+    completed, and finish() returns the rest. Chunks are dicts of text, the
+    page their first new (non-overlap) sentence is on, and token_count.
+    """
+
+    def __init__(self, target_tokens: int = TARGET_TOKENS, max_tokens: int = MAX_TOKENS,
+                 overlap_tokens: int = OVERLAP_TOKENS):
+        if not 0 <= overlap_tokens < target_tokens <= max_tokens:
+            raise ValueError("Expected 0 <= overlap_tokens < target_tokens <= max_tokens")
+        self.target_tokens = target_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        # Sentences of the open chunk: carried overlap first, then new ones
+        self._sentences: List[Sentence] = []
+        self._tokens = 0
+        self._overlap = 0
+        self._page: Optional[int] = None
+        # Unfinished last sentence of the previous page, with its page
+        self._unfinished: Optional[Tuple[int, str]] = None
+        self._chunks: List[Dict] = []
+
+    def add_page(self, page: int, sentences: List[Sentence]) -> List[Dict]:
+        """Add a page's sentences (from split_sentences); returns the chunks completed so far"""
+        sentences = list(sentences)
+        if self._unfinished is not None and sentences:
+            first_page, text = self._unfinished
+            self._unfinished = None
+            text = _join(text, sentences[0][0])
+            sentences[0] = (text, count_tokens(text))
+            self._add(first_page, sentences[0])
+            sentences = sentences[1:]
+        if sentences and not _TERMINATED.search(sentences[-1][0]):
+            self._unfinished = (page, sentences.pop()[0])
+        for sentence in sentences:
+            self._add(page, sentence)
+        return self._take()
+
+    def finish(self) -> List[Dict]:
+        """Chunks still open at the end of the document"""
+        if self._unfinished is not None:
+            page, text = self._unfinished
+            self._unfinished = None
+            self._add(page, (text, count_tokens(text)))
+        if len(self._sentences) > self._overlap:
+            self._emit()
+        return self._take()
+
+    def _take(self) -> List[Dict]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+    def _add(self, page: int, sentence: Sentence):
+        if sentence[1] > self.max_tokens - self.overlap_tokens:
+            for piece in self._pieces(sentence[0]):
+                self._add(page, piece)
+            return
+        if len(self._sentences) > self._overlap and self._tokens + sentence[1] > self.max_tokens:
+            self._emit()
+        if len(self._sentences) == self._overlap:
+            self._page = page
+        self._sentences.append(sentence)
+        self._tokens += sentence[1]
+        if self._tokens >= self.target_tokens and _is_cut(sentence[0]):
+            self._emit()
+
+    def _pieces(self, text: str) -> List[Sentence]:
+        """A sentence too long for one chunk, as runs of words that each fit"""
+        budget = self.max_tokens - self.overlap_tokens
+        # A word longer than that is cut too; no character counts for more than one token
+        parts = [word[i:i + budget] for word in text.split() for i in range(0, len(word), budget)]
+        pieces, words, tokens = [], [], 0
+        for word in parts:
+            word_tokens = count_tokens(word)
+            if words and tokens + word_tokens > budget:
+                pieces.append((" ".join(words), tokens))
+                words, tokens = [], 0
+            words.append(word)
+            tokens += word_tokens
+        if words:
+            pieces.append((" ".join(words), tokens))
+        return pieces
+
+    def _emit(self):
+        self._chunks.append({
+            "text": " ".join(text for text, _ in self._sentences),
+            "page": self._page,
+            "token_count": self._tokens
+        })
+        # Carry the trailing sentences that fit the overlap into the next chunk
+        carried, tokens = [], 0
+        for sentence in reversed(self._sentences):
+            if tokens + sentence[1] > self.overlap_tokens:
+                break
+            carried.append(sentence)
+            tokens += sentence[1]
+        self._sentences = carried[::-1]
+        self._tokens = tokens
+        self._overlap = len(self._sentences)
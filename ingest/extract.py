@@ -0,0 +1,52 @@
+"""
+PDF Extraction - Page sentences and images, run inside the ingest worker processes
+"""
+
+from typing import Dict, List, Optional
+
+import pymupdf
+
+from ingest.chunker import split_sentences
+from utils.blob_store import BlobStore
+
+
+def difficulty(words: List[str]) -> str:
+    """Reading level from the average word length"""
+    average = sum(map(len, words)) / len(words) if words else 0
+    return "beginner" if average < 6 else "intermediate" if average < 8 else "advanced"
+
+
+def extract_pages(pdf_path: str, start: int, stop: int, with_images: bool = True,
+                  blob_root: Optional[str] = None) -> List[Dict]:
+    """
+    Sentences and embedded images of pages [start, stop).
+
+    Each call opens the document itself, as PyMuPDF documents cannot be passed
+    between processes; taking a range of pages keeps that cost off every page.
+    Images are written to the blob store at blob_root here, in the worker, so
+    their bytes never travel back to the ingesting process.
+
+    Returns:
+        One dict per page: 1-based page number, sentences (text and token
+        count, see ingest.chunker) and images (sha256, size in bytes and file
+        extension)
+    """
+    blobs = BlobStore(blob_root) if with_images else None
+    pages = []
+    with pymupdf.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            page = doc[page_num]
+            sentences = split_sentences(page.get_text())
+
+            images = []
+            if with_images:
+                for img_index, img in enumerate(page.get_images(full=True)):
+                    try:
+                        base_image = doc.extract_image(img[0])
+                        data = base_image["image"]
+                        images.append({"sha256": blobs.put(data), "size": len(data), "ext": base_image["ext"]})
+                    except Exception as e:
+                        print(f"Could not extract image {img_index} from page {page_num + 1}: {e}")
+
+            pages.append({"page": page_num + 1, "sentences": sentences, "images": images})
+    return pages
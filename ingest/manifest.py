@@ -0,0 +1,79 @@
+"""
+Ingest Manifest - Per-document record of the points an ingest wrote, for incremental re-ingestion
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from typing import Dict, List, Optional
+
+from utils.embeddings import EMBEDDING_VERSION
+
+MANIFEST_FORMAT = 1
+# Namespace of the deterministic point ids
+POINT_NAMESPACE = uuid.UUID("5b3cf0f4-6a4e-4b8e-9d0a-0d2f7d1c9e21")
+
+
+def document_id(document: str) -> str:
+    """Stable id of a document name; unlike a hash of the file, it survives edits to the book"""
+    return hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
+
+
+def point_id(doc_id: str, kind: str, page: int, offset: int) -> str:
+    """Deterministic id of the offset-th chunk (or image) of a page, so re-ingesting overwrites in place"""
+    return str(uuid.uuid5(POINT_NAMESPACE, f"{doc_id}/{kind}/{page}/{offset}"))
+
+
+def content_hash(content: bytes) -> str:
+    """Hash of what a point's vector is built from; the embedding version is part of it"""
+    return hashlib.blake2b(content, digest_size=16, person=EMBEDDING_VERSION.encode()[:16]).hexdigest()
+
+
+class Manifest:
+    """
+    What was ingested for one document: per chunk point id its content hash
+    and sequence id, per image point id its content hash.
+
+    Kept as a JSON file per (collection, document); it is only rewritten after
+    an ingest has been fully written, so a failed run is simply redone.
+    """
+
+    def __init__(self, document: str, collection_name: str,
+                 chunks: Optional[Dict[str, List]] = None, images: Optional[Dict[str, str]] = None):
+        self.document = document
+        self.collection_name = collection_name
+        self.chunks: Dict[str, List] = chunks if chunks is not None else {}
+        self.images: Dict[str, str] = images if images is not None else {}
+
+    @staticmethod
+    def path(manifest_dir: str, collection_name: str, document: str) -> str:
+        return os.path.join(manifest_dir, f"{collection_name}-{document_id(document)}.json")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Manifest"]:
+        """The manifest at path, or None when there is none (or it is of another format)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if data.get("format") != MANIFEST_FORMAT:
+            return None
+        return cls(data["document"], data["collection"], data["chunks"], data["images"])
+
+    def save(self, path: str):
+        """Write atomically, so a crash never leaves a half-written manifest"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "document": self.document,
+            "collection": self.collection_name,
+            "embedding_version": EMBEDDING_VERSION,
+            "chunks": self.chunks,
+            "images": self.images
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
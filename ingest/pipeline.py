@@ -0,0 +1,300 @@
+"""
+Ingest Pipeline - Streams a PDF into Qdrant with memory that stays flat as the PDF grows
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import pymupdf
+from qdrant_client.models import Batch, Distance, PayloadSchemaType, VectorParams
+
+from ingest.chunker import MAX_TOKENS, OVERLAP_TOKENS, TARGET_TOKENS, Chunker
+from ingest.extract import difficulty, extract_pages
+from ingest.manifest import Manifest, content_hash, document_id, point_id
+from utils.blob_store import BlobStore
+from utils.embeddings import EMBEDDING_DIM, EMBEDDING_VERSION, embed_many
+from utils.qdrant_client import QdrantManager
+
+DEFAULT_IMAGE_COLLECTION = "pdf_images"
+DEFAULT_MANIFEST_DIR = ".ingest_manifests"
+
+# Payload indexes behind the agents' filters, per collection role
+TEXT_INDEXES = {"sequence_id": PayloadSchemaType.INTEGER, "difficulty": PayloadSchemaType.KEYWORD,
+                "page": PayloadSchemaType.INTEGER}
+IMAGE_INDEXES = {"page": PayloadSchemaType.INTEGER}
+
+
+class _Uploader:
+    """
+    Runs Qdrant writes, in order, on a background thread (a local Qdrant
+    client is not safe for concurrent writes). submit() blocks while
+    max_pending writes are queued or running, so extraction never runs
+    further ahead of Qdrant than that.
+    """
+
+    def __init__(self, max_pending: int):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-upsert")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._error: Optional[BaseException] = None
+        self.batches = 0
+
+    def submit(self, write: Callable, *args):
+        self._raise_error()
+        self._slots.acquire()
+        future = self._pool.submit(write, *args)
+        future.add_done_callback(self._done)
+        self.batches += 1
+
+    def _done(self, future: Future):
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+        self._slots.release()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Wait for every queued write; raises the first error"""
+        self._pool.shutdown(wait=True)
+        self._raise_error()
+
+
+class IngestPipeline:
+    """
+    Streams a PDF into Qdrant in three overlapping stages:
+
+    1. extract: ranges of pages_per_task pages are read and split into sentences
+       in a pool of worker processes; at most two ranges per worker are in
+       flight, and they are consumed in page order, so a Chunker can pack the
+       sentences into chunks of about target_tokens tokens across pages and
+       sequence ids follow the book.
+    2. embed: every batch_size chunks are embedded with one embed_many call.
+    3. upsert: each batch is written as a columnar Batch on a background
+       thread; with max_pending batches outstanding, extraction waits.
+
+    Only in-flight ranges and batches are held, never the whole document.
+    Image bytes go to blob_store (a BlobStore at BLOB_STORE_PATH if omitted),
+    deduplicated by SHA-256; their points, in a separate collection, carry
+    only the digest, size and format.
+
+    Re-ingesting is incremental. Point ids derive from (document, page the
+    chunk starts on, offset among the chunks starting there), and a manifest per document (in manifest_dir; None keeps
+    none) records each point's content hash. Only new or edited chunks are
+    embedded and upserted, chunks whose sequence id merely shifted get a
+    payload update, and points no longer in the document are deleted.
+    """
+
+    def __init__(self, manager: Optional[QdrantManager] = None,
+                 image_manager: Optional[QdrantManager] = None,
+                 workers: Optional[int] = None, pages_per_task: int = 8,
+                 batch_size: int = 256, image_batch: int = 32,
+                 max_pending: int = 4, with_images: bool = True,
+                 target_tokens: int = TARGET_TOKENS, max_tokens: int = MAX_TOKENS,
+                 overlap_tokens: int = OVERLAP_TOKENS,
+                 manifest_dir: Optional[str] = DEFAULT_MANIFEST_DIR,
+                 blob_store: Optional[BlobStore] = None):
+        self.manager = manager if manager is not None else QdrantManager()
+        self.image_manager = image_manager if image_manager is not None else QdrantManager(
+            client=self.manager.client, collection_name=DEFAULT_IMAGE_COLLECTION, breaker=self.manager.breaker
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.batch_size = batch_size
+        self.image_batch = image_batch
+        self.max_pending = max_pending
+        self.with_images = with_images
+        self.target_tokens = target_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.manifest_dir = manifest_dir
+        self.blob_store = blob_store if blob_store is not None else BlobStore()
+
+    def create_collections(self):
+        """Create the text and image collections, with their payload indexes, where missing"""
+        for manager, indexes in ((self.manager, TEXT_INDEXES), (self.image_manager, IMAGE_INDEXES)):
+            client, name = manager.client, manager.collection_name
+            if client.collection_exists(name):
+                continue
+            client.create_collection(name, vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+            for field_name, schema in indexes.items():
+                client.create_payload_index(name, field_name=field_name, field_schema=schema)
+            print(f"Created: {name}")
+
+    def run(self, pdf_path: str, document: Optional[str] = None, full: bool = False) -> Dict:
+        """
+        Ingest one PDF
+
+        Args:
+            pdf_path: PDF to ingest
+            document: Name the document keeps across edits (the file name if omitted)
+            full: Re-embed and re-upload every chunk and image, whatever the manifest says
+
+        Returns:
+            Counts of pages, chunks and images; of chunks embedded, moved (payload
+            update only), unchanged and deleted; of images uploaded and of Qdrant
+            writes; with the elapsed seconds and pages per second
+        """
+        start = time.perf_counter()
+        with pymupdf.open(pdf_path) as doc:
+            page_count = len(doc)
+        ranges = deque(
+            (first, min(first + self.pages_per_task, page_count))
+            for first in range(0, page_count, self.pages_per_task)
+        )
+
+        self._document = document or os.path.basename(pdf_path)
+        self._document_id = document_id(self._document)
+        manifest_path = None
+        previous = None
+        if self.manifest_dir is not None:
+            manifest_path = Manifest.path(self.manifest_dir, self.manager.collection_name, self._document)
+            previous = Manifest.load(manifest_path)
+        # Points of the last ingest: reused unless full, deleted if no longer in the document
+        self._previous = previous if previous is not None else Manifest(self._document, self.manager.collection_name)
+        self._reuse = not full
+        self._manifest = Manifest(self._document, self.manager.collection_name)
+        self._chunker = Chunker(self.target_tokens, self.max_tokens, self.overlap_tokens)
+        self._chunk_page, self._chunk_offset = None, 0
+
+        self._uploader = _Uploader(self.max_pending)
+        self._ids, self._texts, self._payloads, self._moved = [], [], [], {}
+        self._image_ids, self._images = [], []
+        self._stats = {"pages": page_count, "chunks": 0, "images": 0, "embedded": 0, "moved": 0,
+                       "unchanged": 0, "deleted": 0, "images_uploaded": 0}
+        # Forked where possible, so workers skip re-importing Qdrant and numpy; a forking pool
+        # starts all its workers on the first submit, before any upload thread exists
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context(method)) as pool:
+            in_flight = deque()
+            while ranges or in_flight:
+                while ranges and len(in_flight) < 2 * self.workers:
+                    first, stop = ranges.popleft()
+                    in_flight.append(pool.submit(extract_pages, pdf_path, first, stop, self.with_images,
+                                                 self.blob_store.root))
+                for page in in_flight.popleft().result():
+                    self._add_page(page)
+
+        for chunk in self._chunker.finish():
+            self._add_chunk(chunk)
+        self._flush_chunks()
+        self._flush_moved()
+        self._flush_images(final=True)
+        self._delete_removed()
+        self._uploader.close()
+        if manifest_path is not None:
+            self._manifest.save(manifest_path)
+
+        seconds = time.perf_counter() - start
+        return {**self._stats, "batches": self._uploader.batches, "seconds": seconds,
+                "pages_per_second": page_count / seconds if seconds else 0.0}
+
+    def _add_page(self, page: Dict):
+        for chunk in self._chunker.add_page(page["page"], page["sentences"]):
+            self._add_chunk(chunk)
+
+        for index, image in enumerate(page["images"]):
+            self._stats["images"] += 1
+            image_id = point_id(self._document_id, "image", page["page"], index)
+            # Hashed from the blob digest: manifests from before the blob store
+            # hashed the bytes, so their images are re-uploaded once
+            content = content_hash(image["sha256"].encode())
+            self._manifest.images[image_id] = content
+            if self._reuse and self._previous.images.get(image_id) == content:
+                continue
+            self._image_ids.append(image_id)
+            self._images.append({
+                "description": f"Image {self._stats['images']} from page {page['page']}",
+                "page": page["page"],
+                "image_sha256": image["sha256"],
+                "image_size": image["size"],
+                "image_format": image["ext"],
+                "image_index": self._stats["images"] - 1,
+                "document": self._document,
+                "embedding_version": EMBEDDING_VERSION
+            })
+        if len(self._images) >= self.image_batch:
+            self._flush_images()
+
+    def _add_chunk(self, chunk: Dict):
+        # Chunks arrive in page order, so offsets restart whenever the start page changes
+        if chunk["page"] != self._chunk_page:
+            self._chunk_page, self._chunk_offset = chunk["page"], 0
+        chunk_id = point_id(self._document_id, "chunk", chunk["page"], self._chunk_offset)
+        self._chunk_offset += 1
+        sequence_id = self._stats["chunks"]
+        self._stats["chunks"] += 1
+        content = content_hash(chunk["text"].encode("utf-8"))
+        self._manifest.chunks[chunk_id] = [content, sequence_id]
+
+        known = self._previous.chunks.get(chunk_id) if self._reuse else None
+        if known == [content, sequence_id]:
+            self._stats["unchanged"] += 1
+        elif known is not None and known[0] == content:
+            # Same text, shifted by chunks added or removed earlier in the book
+            self._moved[chunk_id] = {"sequence_id": sequence_id}
+            if len(self._moved) >= self.batch_size:
+                self._flush_moved()
+        else:
+            words = chunk["text"].split()
+            self._ids.append(chunk_id)
+            self._texts.append(chunk["text"])
+            self._payloads.append({
+                "text": chunk["text"],
+                "sequence_id": sequence_id,
+                "page": chunk["page"],
+                "word_count": len(words),
+                "token_count": chunk["token_count"],
+                "difficulty": difficulty(words),
+                "document": self._document,
+                "timestamp": datetime.now().isoformat(),
+                "embedding_version": EMBEDDING_VERSION
+            })
+            if len(self._texts) >= self.batch_size:
+                self._flush_chunks()
+
+    def _flush_chunks(self):
+        """Embed the buffered chunks in one call and queue them as one upsert"""
+        if not self._texts:
+            return
+        self._stats["embedded"] += len(self._texts)
+        self._uploader.submit(self.manager.upsert, Batch(
+            ids=self._ids,
+            vectors=embed_many(self._texts).tolist(),
+            payloads=self._payloads
+        ))
+        self._ids, self._texts, self._payloads = [], [], []
+
+    def _flush_moved(self):
+        if not self._moved:
+            return
+        self._stats["moved"] += len(self._moved)
+        self._uploader.submit(self.manager.set_payloads, self._moved)
+        self._moved = {}
+
+    def _flush_images(self, final: bool = False):
+        if not self._images or (len(self._images) < self.image_batch and not final):
+            return
+        self._stats["images_uploaded"] += len(self._images)
+        self._uploader.submit(self.image_manager.upsert, Batch(
+            ids=self._image_ids,
+            vectors=embed_many([image["description"] for image in self._images]).tolist(),
+            payloads=self._images
+        ))
+        self._image_ids, self._images = [], []
+
+    def _delete_removed(self):
+        """Delete the points of chunks and images that are no longer in the document"""
+        for manager, previous, current in ((self.manager, self._previous.chunks, self._manifest.chunks),
+                                           (self.image_manager, self._previous.images, self._manifest.images)):
+            removed = [point for point in previous if point not in current]
+            for first in range(0, len(removed), self.batch_size):
+                self._uploader.submit(manager.delete, removed[first:first + self.batch_size])
+            if manager is self.manager:
+                self._stats["deleted"] += len(removed)
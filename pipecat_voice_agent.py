@@ -4,21 +4,31 @@ Using Groq (Cloud LLM) + Groq STT
 No transport needed - just direct Streamlit interaction
 """
 
+import time
+import uuid
+
 import streamlit as st
-import os
 from dotenv import load_dotenv
-from groq import Groq
 
 # Import multi-agent system
 from agents.orchestrator import OrchestratorAgent
+from utils.clients import get_groq_client
+
 
-load_dotenv()
+@st.cache_resource
+def load_orchestrator() -> OrchestratorAgent:
+    """Build the orchestrator once per worker process; Streamlit reruns reuse it"""
+    load_dotenv()
+    return OrchestratorAgent()
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Initialize orchestrator (cached across reruns) and time what this rerun paid for it
+construction_start = time.perf_counter()
+orchestrator = load_orchestrator()
+construction_ms = (time.perf_counter() - construction_start) * 1000
+
+# Shared Groq client (same pooled client the agents use)
+client = get_groq_client()
 
 # System prompt
 SYSTEM_PROMPT = """You are an AI tutor specializing in the book "Rich Dad Poor Dad" by Robert Kiyosaki.
@@ -32,9 +42,6 @@ Your role is to:
 Keep responses concise (2-3 sentences).
 """
 
-# Initialize orchestrator
-orchestrator = OrchestratorAgent()
-
 # Streamlit UI
 st.title("🎙️ Rich Dad Poor Dad Voice Tutor")
 st.markdown("**Powered by Groq (llama-3.3-70b-versatile)**")
@@ -42,6 +49,13 @@ st.markdown("**Powered by Groq (llama-3.3-70b-versatile)**")
 # Initialize session state
 if "messages" not in st.session_state:
     st.session_state.messages = []
+# Keys this browser session's lesson progress in the shared orchestrator
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "timings" not in st.session_state:
+    st.session_state.timings = []
+
+inference_ms = None
 
 # Display chat history
 for message in st.session_state.messages:
@@ -55,11 +69,12 @@ if prompt := st.chat_input("Ask me anything about Rich Dad Poor Dad..."):
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Get orchestrator response
+    # Stream the orchestrator response as Groq produces it
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            response = orchestrator.process(prompt)
-            st.markdown(response)
+        inference_start = time.perf_counter()
+        deltas, agent_logs = orchestrator.stream_process(prompt, st.session_state.session_id)
+        response = st.write_stream(deltas)
+        inference_ms = (time.perf_counter() - inference_start) * 1000
     
     st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -70,3 +85,17 @@ with st.sidebar:
     st.markdown("- What is the difference between rich dad and poor dad?")
     st.markdown("- Quiz me on chapter 3")
     st.markdown("- Search for information about financial freedom")
+
+    # Per-rerun timing: orchestrator construction (near zero once cached) vs. answering
+    st.session_state.timings.append({
+        "construction_ms": round(construction_ms, 2),
+        "inference_ms": round(inference_ms, 1) if inference_ms is not None else None
+    })
+    del st.session_state.timings[:-20]
+
+    st.markdown("### ⏱️ Timing")
+    col1, col2 = st.columns(2)
+    col1.metric("Construction", f"{construction_ms:.1f} ms")
+    col2.metric("Inference", f"{inference_ms:.0f} ms" if inference_ms is not None else "-")
+    with st.expander("Recent reruns"):
+        st.dataframe(st.session_state.timings[::-1])
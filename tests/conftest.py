@@ -0,0 +1,31 @@
+"""
+Shared fixtures: a local in-memory Qdrant and environment without external stores
+"""
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+
+from utils.embeddings import EMBEDDING_DIM
+
+
+@pytest.fixture(autouse=True)
+def local_environment(monkeypatch):
+    """Keep caches and stores in memory, whatever the developer's environment points at"""
+    for name in ("RETRIEVAL_CACHE_PATH", "SESSION_STORE_PATH", "STUDENT_MEMORY", "STUDENT_MEMORY_PATH",
+                 "STUDENT_MEMORY_COLLECTION"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def qdrant():
+    client = QdrantClient(":memory:")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def collection(qdrant):
+    """A vector collection like the book's"""
+    qdrant.create_collection("book", vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+    return "book"
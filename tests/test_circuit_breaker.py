@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise ConnectionError("backend down")
+
+
+def breaker(**kwargs) -> CircuitBreaker:
+    options = {"min_calls": 4, "failure_rate": 0.5, "open_seconds": 60.0}
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def trip(circuit: CircuitBreaker):
+    for _ in range(circuit.min_calls):
+        with pytest.raises(ConnectionError):
+            circuit.call(fail)
+
+
+def reopen_after_timeout(circuit: CircuitBreaker):
+    """Let the open period run out without waiting for it"""
+    circuit._opened_at -= circuit.open_seconds
+
+
+def test_stays_closed_below_min_calls():
+    circuit = breaker()
+    for _ in range(circuit.min_calls - 1):
+        with pytest.raises(ConnectionError):
+            circuit.call(fail)
+    assert circuit.state == CLOSED
+
+
+def test_stays_closed_below_failure_rate():
+    circuit = breaker()
+    for _ in range(3):
+        assert circuit.call(lambda: "ok") == "ok"
+    with pytest.raises(ConnectionError):
+        circuit.call(fail)
+    assert circuit.state == CLOSED
+
+
+def test_opens_at_failure_rate_and_fails_fast():
+    circuit = breaker()
+    trip(circuit)
+    assert circuit.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        circuit.call(calls.append, "not sent")
+    assert calls == []
+    assert circuit.stats()["rejected"] == 1
+
+
+def test_half_open_probe_success_closes_with_clean_window():
+    circuit = breaker()
+    trip(circuit)
+    reopen_after_timeout(circuit)
+
+    assert circuit.call(lambda: "ok") == "ok"
+    assert circuit.state == CLOSED
+    assert circuit.stats()["calls"] == 0
+
+
+def test_half_open_probe_failure_opens_again():
+    circuit = breaker()
+    trip(circuit)
+    reopen_after_timeout(circuit)
+
+    with pytest.raises(ConnectionError):
+        circuit.call(fail)
+    assert circuit.state == OPEN
+    assert circuit.times_opened == 2
+
+
+def test_half_open_admits_only_the_probes():
+    circuit = breaker(probes=1)
+    trip(circuit)
+    reopen_after_timeout(circuit)
+
+    assert circuit.allow()
+    assert circuit.state == HALF_OPEN
+    assert not circuit.allow()
+
+
+def test_slow_calls_open_the_breaker():
+    circuit = breaker(slow_call_ms=100.0, slow_rate=0.5)
+    for _ in range(circuit.min_calls):
+        circuit.record_success(250.0)
+    assert circuit.state == OPEN
+
+
+def test_errors_that_are_not_failures_do_not_count():
+    circuit = breaker(is_failure=lambda error: not isinstance(error, ValueError))
+
+    def bad_request():
+        raise ValueError("the request itself was wrong")
+
+    for _ in range(2 * circuit.min_calls):
+        with pytest.raises(ValueError):
+            circuit.call(bad_request)
+    assert circuit.state == CLOSED
+
+
+def test_cancelled_async_probe_gives_its_slot_back():
+    circuit = breaker()
+    trip(circuit)
+    reopen_after_timeout(circuit)
+
+    async def probe():
+        task = asyncio.ensure_future(circuit.acall(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(probe())
+    assert circuit.state == HALF_OPEN
+    assert circuit.allow()
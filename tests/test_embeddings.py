@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils.embeddings import EMBEDDING_DIM, MAX_WORDS, embed_many, simple_embed
+
+
+def texts():
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(300)] + "Assets put money in your POCKET".split()
+    return ["", "   ", "asset", "Asset ASSET asset"] + [
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, MAX_WORDS + 50))) for _ in range(200)
+    ]
+
+
+def test_simple_embed_matches_embed_many_rows():
+    batch = texts()
+    vectors = embed_many(batch)
+    assert vectors.shape == (len(batch), EMBEDDING_DIM)
+    for text, row in zip(batch, vectors):
+        assert simple_embed(text) == row.tolist()
+
+
+def test_empty_text_is_a_zero_vector():
+    assert simple_embed("") == [0.0] * EMBEDDING_DIM
+    assert not embed_many(["", " "]).any()
+
+
+def test_vectors_are_normalized():
+    norms = np.linalg.norm(embed_many(texts()[2:]), axis=1)
+    assert norms == pytest.approx(1.0, abs=1e-6)
+
+
+def test_only_the_first_words_count():
+    words = [f"word{i}" for i in range(MAX_WORDS)]
+    assert simple_embed(" ".join(words)) == simple_embed(" ".join(words + ["ignored", "tail"]))
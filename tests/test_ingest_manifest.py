@@ -0,0 +1,108 @@
+import pymupdf
+import pytest
+
+from ingest import IngestPipeline
+from ingest.manifest import MANIFEST_FORMAT, Manifest
+from utils.blob_store import BlobStore
+from utils.qdrant_client import QdrantManager
+
+# The local Qdrant ignores the payload indexes create_collections() asks for
+pytestmark = pytest.mark.filterwarnings("ignore:Payload indexes have no effect")
+
+
+def paragraph(tag: str, sentences: int = 30) -> str:
+    return " ".join(f"Sentence {i} of {tag} explains how assets put money in your pocket." for i in range(sentences))
+
+
+def write_pdf(path, pages):
+    doc = pymupdf.open()
+    for text in pages:
+        doc.new_page().insert_textbox(pymupdf.Rect(50, 50, 550, 800), text, fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def ingest(qdrant, tmp_path):
+    pipeline = IngestPipeline(
+        QdrantManager(client=qdrant, collection_name="book"),
+        QdrantManager(client=qdrant, collection_name="book_images"),
+        workers=1, manifest_dir=str(tmp_path / "manifests"), blob_store=BlobStore(str(tmp_path / "blobs"))
+    )
+    pipeline.create_collections()
+    pdf_path = tmp_path / "book.pdf"
+
+    def run(pages, full=False):
+        write_pdf(pdf_path, pages)
+        return pipeline.run(str(pdf_path), document="book", full=full)
+    return run
+
+
+def test_unchanged_document_writes_nothing(ingest, qdrant):
+    pages = [paragraph(f"page {n}") for n in range(4)]
+    first = ingest(pages)
+    assert first["embedded"] == first["chunks"] > 0
+
+    again = ingest(pages)
+    assert again["unchanged"] == first["chunks"]
+    assert again["embedded"] == again["moved"] == again["deleted"] == again["batches"] == 0
+    assert qdrant.count("book").count == first["chunks"]
+
+
+def test_edited_page_is_the_only_one_embedded(ingest, qdrant):
+    pages = [paragraph(f"page {n}") for n in range(4)]
+    first = ingest(pages)
+    pages[2] = paragraph("an edited page")
+
+    edited = ingest(pages)
+    assert 0 < edited["embedded"] < first["chunks"]
+    assert edited["embedded"] + edited["unchanged"] + edited["moved"] == edited["chunks"]
+    texts = [point.payload["text"] for point in qdrant.scroll("book", limit=100)[0]]
+    assert any("an edited page" in text for text in texts)
+    assert not any("of page 2 " in text for text in texts)
+
+
+def test_chunks_shifted_by_an_earlier_edit_only_get_new_sequence_ids(ingest, qdrant):
+    pages = [paragraph(f"page {n}") for n in range(4)]
+    ingest(pages)
+    pages[0] = paragraph("a longer first page", sentences=60)
+
+    shifted = ingest(pages)
+    assert shifted["moved"] > 0
+    sequence_ids = sorted(point.payload["sequence_id"] for point in qdrant.scroll("book", limit=100)[0])
+    assert sequence_ids == list(range(shifted["chunks"]))
+
+
+def test_removed_pages_are_deleted(ingest, qdrant):
+    pages = [paragraph(f"page {n}") for n in range(4)]
+    ingest(pages)
+
+    shorter = ingest(pages[:2])
+    assert shorter["deleted"] > 0
+    assert qdrant.count("book").count == shorter["chunks"]
+    texts = [point.payload["text"] for point in qdrant.scroll("book", limit=100)[0]]
+    assert not any("of page 3 " in text for text in texts)
+
+
+def test_full_run_re_embeds_everything(ingest):
+    pages = [paragraph(f"page {n}") for n in range(2)]
+    first = ingest(pages)
+    assert ingest(pages, full=True)["embedded"] == first["chunks"]
+
+
+def test_manifest_round_trip(tmp_path):
+    path = Manifest.path(str(tmp_path), "book", "Rich Dad Poor Dad.pdf")
+    manifest = Manifest("Rich Dad Poor Dad.pdf", "book", chunks={"id-1": ["hash", 0]}, images={"id-2": "hash"})
+    manifest.save(path)
+
+    loaded = Manifest.load(path)
+    assert (loaded.document, loaded.collection_name) == ("Rich Dad Poor Dad.pdf", "book")
+    assert loaded.chunks == {"id-1": ["hash", 0]}
+    assert loaded.images == {"id-2": "hash"}
+
+
+def test_missing_or_foreign_manifest_means_a_first_ingest(tmp_path):
+    assert Manifest.load(str(tmp_path / "missing.json")) is None
+    path = tmp_path / "old.json"
+    path.write_text(f'{{"format": {MANIFEST_FORMAT + 1}, "chunks": {{}}}}')
+    assert Manifest.load(str(path)) is None
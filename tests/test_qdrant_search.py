@@ -0,0 +1,68 @@
+import asyncio
+
+from qdrant_client.models import PointStruct
+
+from utils.embeddings import EMBEDDING_VERSION, simple_embed
+from utils.qdrant_client import QdrantManager
+
+PASSAGES = [
+    ("Assets put money in your pocket, liabilities take money out", "beginner", 1),
+    ("The rich have their money work for them instead of working for money", "beginner", 2),
+    ("Corporations let the rich protect their assets and pay taxes last", "advanced", 3),
+    ("Financial literacy is the ability to read financial statements", "intermediate", 4),
+]
+
+
+def book(qdrant, collection) -> QdrantManager:
+    manager = QdrantManager(client=qdrant, collection_name=collection)
+    manager.upsert([
+        PointStruct(id=i, vector=simple_embed(text), payload={
+            "text": text, "difficulty": difficulty, "page": page, "sequence_id": i,
+            "embedding_version": EMBEDDING_VERSION
+        })
+        for i, (text, difficulty, page) in enumerate(PASSAGES)
+    ])
+    return manager
+
+
+def test_search_returns_scored_passages_best_match_first(qdrant, collection):
+    results = book(qdrant, collection).search("do assets put money in my pocket", limit=3)
+
+    assert len(results) == 3
+    assert results[0]["text"] == PASSAGES[0][0]
+    scores = [result["score"] for result in results]
+    assert scores == sorted(scores, reverse=True)
+    assert all(-1.0 <= score <= 1.0 for score in scores)
+    assert results[0]["metadata"] == {"difficulty": "beginner", "page": 1, "sequence_id": 0}
+    assert not any(result.get("fallback") for result in results)
+
+
+def test_search_applies_payload_filters(qdrant, collection):
+    manager = book(qdrant, collection)
+
+    beginner = manager.search("assets and money", limit=5, difficulty="beginner")
+    assert sorted(result["text"] for result in beginner) == sorted(text for text, level, _ in PASSAGES
+                                                                   if level == "beginner")
+    assert [result["metadata"]["page"] for result in manager.search("money", limit=5, page=3)] == [3]
+    assert [result["text"] for result in manager.search("money", limit=5, sequence_id=3)] == [PASSAGES[3][0]]
+    assert manager.search("money", limit=5, difficulty="expert") == []
+
+
+def test_offset_pages_through_the_ranking(qdrant, collection):
+    manager = book(qdrant, collection)
+    ranking = [result["text"] for result in manager.search("money", limit=4)]
+    assert [result["text"] for result in manager.search("money", limit=2, offset=2)] == ranking[2:]
+
+
+def test_asearch_matches_search(qdrant, collection):
+    expected = book(qdrant, collection).search("financial statements", limit=2, difficulty="intermediate")
+    # A second manager, so the answer comes from Qdrant rather than the first one's retrieval cache
+    manager = QdrantManager(client=qdrant, collection_name=collection)
+    assert asyncio.run(manager.asearch("financial statements", limit=2, difficulty="intermediate")) == expected
+    assert manager.retrieval_cache.stats()["misses"] == 1
+
+
+def test_unreachable_collection_serves_marked_fallback_passages(qdrant):
+    results = QdrantManager(client=qdrant, collection_name="missing").search("assets", limit=2)
+    assert len(results) == 2
+    assert all(result["fallback"] for result in results)
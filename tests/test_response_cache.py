@@ -0,0 +1,62 @@
+import numpy as np
+from qdrant_client.models import PointStruct
+
+from utils.circuit_breaker import CLOSED
+from utils.content_version import CONTENT_VERSION_COLLECTION
+from utils.embeddings import simple_embed
+from utils.qdrant_client import QdrantManager
+from utils.response_cache import SemanticResponseCache
+
+
+def points(*texts, first_id=0):
+    return [PointStruct(id=first_id + i, vector=simple_embed(text), payload={"text": text, "sequence_id": first_id + i})
+            for i, text in enumerate(texts)]
+
+
+def manager(qdrant, collection):
+    """A manager that re-reads the shared content version on every lookup"""
+    qdrant_manager = QdrantManager(client=qdrant, collection_name=collection)
+    qdrant_manager.content_versions.refresh_seconds = 0
+    return qdrant_manager
+
+
+def test_write_in_one_process_reaches_another(qdrant, collection):
+    writer, reader = manager(qdrant, collection), manager(qdrant, collection)
+    writer.upsert(points("assets put money in your pocket"))
+    assert reader.content_version == writer.content_version is not None
+
+    before = reader.content_version
+    writer.upsert(points("liabilities take money out", first_id=1))
+    assert reader.content_version == writer.content_version != before
+
+
+def test_missing_version_collection_does_not_open_the_breaker(qdrant, collection):
+    # Ingested before content versions were kept: no marker collection at all
+    qdrant.upsert(collection, points("assets put money in your pocket"))
+    reader = manager(qdrant, collection)
+    for _ in range(3 * reader.breaker.min_calls):
+        reader.search("money in your pocket", limit=1)
+
+    assert reader.breaker.state == CLOSED
+    assert reader.content_version is None
+    assert not qdrant.collection_exists(CONTENT_VERSION_COLLECTION)
+    assert not reader.search("what is a liability", limit=1)[0].get("fallback")
+
+
+def test_response_cache_drops_answers_when_content_version_changes():
+    cache = SemanticResponseCache()
+    query = cache.embed("What is an asset?")
+    cache.put("tutor:intro", query, "An asset puts money in your pocket", 40, content_version="v1")
+
+    assert cache.get("tutor:intro", query, content_version="v1")[0] == "An asset puts money in your pocket"
+    assert cache.get("tutor:intro", query, content_version="v2") is None
+    # Dropped, not hidden: going back to the old version finds nothing either
+    assert cache.get("tutor:intro", query, content_version="v1") is None
+
+
+def test_response_cache_matches_similar_queries_only():
+    cache = SemanticResponseCache(threshold=0.9)
+    cache.put("search", cache.embed("what is an asset"), "answer", 6)
+    assert cache.get("search", cache.embed("What is an asset?")) is not None
+    assert cache.get("search", cache.embed("how do taxes work for corporations")) is None
+    assert np.isclose(cache.get("search", cache.embed("what is an asset"))[1], 1.0)
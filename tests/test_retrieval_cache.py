@@ -0,0 +1,76 @@
+from qdrant_client.models import PointStruct
+
+from utils.embeddings import simple_embed
+from utils.qdrant_client import QdrantManager
+from utils.retrieval_cache import MemoryCacheBackend, RetrievalCache, SQLiteCacheBackend
+
+
+def points(*texts, first_id=0):
+    return [PointStruct(id=first_id + i, vector=simple_embed(text), payload={"text": text, "sequence_id": first_id + i})
+            for i, text in enumerate(texts)]
+
+
+def manager(qdrant, collection, cache=None):
+    """A manager that re-reads the shared content version on every lookup"""
+    qdrant_manager = QdrantManager(client=qdrant, collection_name=collection, retrieval_cache=cache)
+    qdrant_manager.content_versions.refresh_seconds = 0
+    return qdrant_manager
+
+
+def test_repeated_search_is_served_from_the_cache(qdrant, collection):
+    reader = manager(qdrant, collection)
+    reader.upsert(points("assets put money in your pocket"))
+    first = reader.search("money in your pocket", limit=5)
+    assert reader.search("money in your pocket", limit=5) == first
+    assert reader.retrieval_cache.stats()["hits"] == 1
+
+
+def test_retrieval_cache_is_not_served_after_another_writer_changed_content(qdrant, collection):
+    writer, reader = manager(qdrant, collection), manager(qdrant, collection)
+    writer.upsert(points("assets put money in your pocket"))
+
+    assert [hit["text"] for hit in reader.search("money in your pocket", limit=5)] == ["assets put money in your pocket"]
+    assert reader.retrieval_cache.stats()["entries"] == 1
+
+    # The reader's own cache is not invalidated by the writer; the version in its keys is
+    writer.upsert(points("more money in your pocket", first_id=1))
+    texts = [hit["text"] for hit in reader.search("money in your pocket", limit=5)]
+    assert sorted(texts) == ["assets put money in your pocket", "more money in your pocket"]
+
+
+def test_sqlite_retrieval_cache_ignores_entries_from_before_a_restart(qdrant, collection, tmp_path):
+    path = str(tmp_path / "retrieval.db")
+    writer = manager(qdrant, collection)
+    writer.upsert(points("assets put money in your pocket"))
+    first = manager(qdrant, collection, RetrievalCache(SQLiteCacheBackend(path)))
+    first.search("money", limit=3)
+
+    writer.upsert(points("new chapter about money", first_id=1))
+    # A new process opens the same cache file
+    restarted = manager(qdrant, collection, RetrievalCache(SQLiteCacheBackend(path)))
+    assert len(restarted.search("money", limit=3)) == 2
+    assert restarted.retrieval_cache.stats()["hits"] == 0
+
+
+def test_retrieval_cache_key_includes_content_version():
+    vector = simple_embed("what is an asset")
+    assert RetrievalCache.key(vector, None, 3, content_version="a") == RetrievalCache.key(vector, None, 3,
+                                                                                          content_version="a")
+    assert RetrievalCache.key(vector, None, 3, content_version="a") != RetrievalCache.key(vector, None, 3,
+                                                                                          content_version="b")
+
+
+def test_memory_cache_backend_evicts_oldest_entries():
+    cache = RetrievalCache(MemoryCacheBackend(max_entries=2))
+    for key in ("a", "b", "c"):
+        cache.put("book", key, [{"text": key}])
+    assert cache.get("book", "a") is None
+    assert cache.get("book", "c") == [{"text": "c"}]
+
+
+def test_sqlite_backend_evicts_down_to_its_limit(tmp_path):
+    cache = RetrievalCache(SQLiteCacheBackend(str(tmp_path / "retrieval.db"), max_entries=10, evict_to=0.5))
+    for i in range(11):
+        cache.put("book", f"key-{i}", [{"text": str(i)}])
+    assert cache.stats()["entries"] <= 10
+    assert cache.get("book", "key-10") == [{"text": "10"}]
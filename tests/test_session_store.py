@@ -0,0 +1,56 @@
+import threading
+
+from utils.session_store import MAX_CONTEXT_TURNS, SessionState, SessionStore
+
+
+class _Prefetch:
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+
+def test_least_recently_used_sessions_are_evicted():
+    store = SessionStore(max_sessions=2)
+    a, b = store.load("a"), store.load("b")
+    store.load("a")
+    store.load("c")
+    assert len(store) == 2
+    assert store.load("a") is a
+    assert store.load("b") is not b
+
+
+def test_evicted_session_without_backend_starts_over():
+    store = SessionStore(max_sessions=1)
+    state = store.load("a")
+    state.current_section = 4
+    store.save(state)
+    store.load("b")
+    assert store.load("a").current_section == 0
+
+
+def test_evicted_session_is_reloaded_from_sqlite(tmp_path):
+    store = SessionStore(max_sessions=1, path=str(tmp_path / "sessions.db"))
+    state = store.load("a")
+    state.current_section = 4
+    state.conversation_context.append({"query": "what is an asset", "intent": "search"})
+    store.save(state)
+    store.load("b")
+
+    reloaded = store.load("a")
+    assert reloaded is not state
+    assert reloaded.current_section == 4
+    assert reloaded.conversation_context == [{"query": "what is an asset", "intent": "search"}]
+
+
+def test_eviction_cancels_the_sessions_prefetch():
+    store = SessionStore(max_sessions=1)
+    state = store.load("a")
+    state.prefetch = _Prefetch()
+    store.load("b")
+    assert state.prefetch.cancelled.is_set()
+
+
+def test_saved_context_is_bounded():
+    store = SessionStore()
+    state = SessionState("a", conversation_context=[{"turn": i} for i in range(MAX_CONTEXT_TURNS + 5)])
+    store.save(state)
+    assert store.load("a").conversation_context == [{"turn": i} for i in range(5, MAX_CONTEXT_TURNS + 5)]
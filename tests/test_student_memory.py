@@ -0,0 +1,167 @@
+import threading
+
+import pytest
+
+from utils.circuit_breaker import CLOSED, CircuitBreaker
+from utils.student_memory import (DEFAULT_COLLECTION, QdrantProfileBackend, SQLiteProfileBackend,
+                                  StudentMemorySystem)
+
+# Flushes are driven by the tests, never by the background thread
+NEVER = 3600.0
+
+
+@pytest.fixture(params=["sqlite", "qdrant"])
+def backend_factory(request, tmp_path, qdrant):
+    """Makes one backend per simulated worker process, all on the same store"""
+    if request.param == "sqlite":
+        return lambda: SQLiteProfileBackend(str(tmp_path / "profiles.db"))
+    return lambda: QdrantProfileBackend(qdrant, "profiles", CircuitBreaker("qdrant"))
+
+
+@pytest.fixture
+def worker(qdrant):
+    """Makes a StudentMemorySystem on a backend; closed before the store goes away"""
+    systems = []
+
+    def make(backend) -> StudentMemorySystem:
+        systems.append(StudentMemorySystem(backend, flush_seconds=NEVER))
+        return systems[-1]
+    yield make
+    for system in systems:
+        system.close()
+
+
+def test_updates_are_visible_before_they_are_written(backend_factory, worker):
+    memory = worker(backend_factory())
+    memory.update_student_progress("ana", "assets", True, "happy", "example")
+    memory.update_student_progress("ana", "taxes", False, "confused", "analogy")
+
+    profile = memory.get_student_profile("ana")
+    assert profile["total_interactions"] == 2
+    assert profile["mastered_topics"] == ["assets"]
+    assert profile["confusion_points"] == ["taxes"]
+    assert memory.recommend_next_topic("ana")["recommendation"] == "taxes"
+    assert memory.get_student_profile("nobody") is None
+
+
+def test_flush_writes_each_student_once(backend_factory, worker):
+    backend = backend_factory()
+    memory = worker(backend)
+    for turn in range(5):
+        memory.update_student_progress("ana", f"topic-{turn}", True, "neutral", "example")
+    memory.update_student_progress("ben", "assets", True, "neutral", "example")
+
+    assert memory.flush() == 2
+    assert backend.get("ana")["total_interactions"] == 5
+    assert backend.get("ana")["version"] == 1
+    assert memory.flush() == 0
+
+
+def test_conflicting_writers_lose_no_updates(backend_factory, worker):
+    first, second = worker(backend_factory()), worker(backend_factory())
+    first.update_student_progress("ana", "assets", True, "happy", "example")
+    second.update_student_progress("ana", "taxes", False, "confused", "analogy")
+
+    first.flush()
+    # second's profile was read before first's write: its write is refused, then replayed on top
+    second.flush()
+    assert second.stats["conflicts"] == 1
+
+    stored = worker(backend_factory()).get_student_profile("ana")
+    assert stored["total_interactions"] == 2
+    assert stored["topics_covered"] == ["assets", "taxes"]
+    assert stored["version"] == 2
+
+
+def test_stale_writer_catches_up_on_later_updates(backend_factory, worker):
+    first, second = worker(backend_factory()), worker(backend_factory())
+    for memory in (first, second):
+        memory.update_student_progress("ana", "assets", True, "neutral", "example")
+        memory.flush()
+    first.update_student_progress("ana", "taxes", True, "neutral", "example")
+    first.flush()
+
+    assert worker(backend_factory()).get_student_profile("ana")["total_interactions"] == 3
+
+
+def test_write_superseded_before_it_is_read_back_is_not_replayed(tmp_path, worker):
+    """
+    Another worker may overwrite a profile between a write and its read-back;
+    the write still counts as stored because its id is in the profile's history
+    """
+    path = str(tmp_path / "profiles.db")
+    other = worker(SQLiteProfileBackend(path))
+
+    class Interleaved(SQLiteProfileBackend):
+        def write(self, payloads):
+            super().write(payloads)
+            other.update_student_progress("ana", "taxes", True, "neutral", "example")
+            other.flush()
+            return {payload["student_id"]: self.get(payload["student_id"]) for payload in payloads}
+
+    memory = worker(Interleaved(path))
+    memory.update_student_progress("ana", "assets", True, "neutral", "example")
+    assert memory.flush() == 1
+    assert memory.stats["conflicts"] == 0
+
+    assert memory.get_student_profile("ana")["total_interactions"] == 2
+    assert memory.flush() == 0
+    assert worker(SQLiteProfileBackend(path)).get_student_profile("ana")["total_interactions"] == 2
+
+
+def test_concurrent_workers_lose_no_updates(backend_factory, worker):
+    workers = [worker(backend_factory()) for _ in range(3)]
+    students = [f"student-{i}" for i in range(5)]
+
+    def run(memory):
+        for turn in range(20):
+            memory.update_student_progress(students[turn % len(students)], f"topic-{turn}", True, "neutral", "example")
+            if turn % 4 == 3:
+                memory.flush()
+        memory.flush()
+
+    threads = [threading.Thread(target=run, args=(memory,)) for memory in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for memory in workers:
+        memory.flush()
+
+    reader = backend_factory()
+    assert sum(reader.get(student)["total_interactions"] for student in students) == 3 * 20
+
+
+def test_profile_collection_is_not_the_notebooks_vector_collection():
+    assert DEFAULT_COLLECTION != "student_memory"
+
+
+def test_collection_with_vectors_is_refused(qdrant, collection, worker):
+    backend = QdrantProfileBackend(qdrant, collection, CircuitBreaker("qdrant"))
+    with pytest.raises(ValueError, match="has vectors"):
+        backend.create_collection()
+
+    memory = worker(backend)
+    memory.update_student_progress("ana", "assets", True, "neutral", "example")
+    assert memory.flush() == 0
+    assert qdrant.count(collection).count == 0
+
+
+def test_missing_collection_is_created_by_the_first_write(qdrant, worker):
+    backend = QdrantProfileBackend(qdrant, "profiles", CircuitBreaker("qdrant"))
+    assert backend.get("ana") is None
+
+    memory = worker(backend)
+    memory.update_student_progress("ana", "assets", True, "neutral", "example")
+    assert memory.flush() == 1
+    assert qdrant.collection_exists("profiles")
+    assert len(backend) == 1
+
+
+def test_new_students_before_the_first_write_are_not_breaker_failures(qdrant):
+    breaker = CircuitBreaker("qdrant")
+    backend = QdrantProfileBackend(qdrant, "profiles", breaker)
+    for student in range(3 * breaker.min_calls):
+        assert backend.get(f"student-{student}") is None
+    assert breaker.state == CLOSED
+    assert breaker.stats()["failures"] == 0
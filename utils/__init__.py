@@ -1,4 +1,5 @@
 """Utils package initialization"""
 from utils.qdrant_client import QdrantManager
+from utils.clients import ClientRegistry, get_groq_client, get_qdrant_client, get_qdrant_manager
 
-__all__ = ["QdrantManager"]
+__all__ = ["QdrantManager", "ClientRegistry", "get_groq_client", "get_qdrant_client", "get_qdrant_manager"]
@@ -0,0 +1,129 @@
+"""
+Blob Store - Content-addressed files for PDF images, referenced from Qdrant payloads by SHA-256
+"""
+
+import hashlib
+import mmap
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_BLOB_ROOT = ".blobs"
+THUMBNAIL_SIDE = 128
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def _write(path: str, data: bytes):
+    """Write through a temporary file and rename; the same bytes always go to the same
+    name, so a concurrent writer winning the rename is harmless"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class BlobStore:
+    """
+    Immutable blobs on disk, named by the SHA-256 of their bytes.
+
+    A blob lives at root/ab/cd/<digest>, so no directory grows past a few
+    hundred entries; putting bytes that are already stored is a no-op, which
+    dedups an image repeated across pages or documents. Reads take a byte
+    range; with use_mmap, files are mapped once and kept in a small LRU of
+    open maps, so repeated range reads skip the open and read calls.
+    Thumbnails are rendered on first use and cached next to the blobs.
+    """
+
+    def __init__(self, root: Optional[str] = None, use_mmap: bool = False, max_mapped: int = 64):
+        self.root = root if root is not None else os.getenv("BLOB_STORE_PATH", DEFAULT_BLOB_ROOT)
+        self.use_mmap = use_mmap
+        self.max_mapped = max_mapped
+        self._maps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, digest: str) -> str:
+        if not _DIGEST.fullmatch(digest):
+            raise ValueError(f"Not a SHA-256 hex digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its digest; safe to call from several processes at once"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            _write(path, data)
+        return digest
+
+    def __contains__(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def size(self, digest: str) -> int:
+        return os.path.getsize(self.path(digest))
+
+    def get(self, digest: str) -> bytes:
+        """All bytes of a blob; raises FileNotFoundError for an unknown digest"""
+        return self.read(digest)
+
+    def read(self, digest: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Bytes [offset, offset + length) of a blob (to its end if length is None)"""
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError("offset and length must not be negative")
+        if self.use_mmap:
+            # Sliced under the lock, so another read cannot evict and close the map meanwhile
+            with self._lock:
+                mapped = self._mapped(digest)
+                return mapped[offset:] if length is None else mapped[offset:offset + length]
+        with open(self.path(digest), "rb") as f:
+            f.seek(offset)
+            return f.read() if length is None else f.read(length)
+
+    def _mapped(self, digest: str) -> mmap.mmap:
+        """The map of a blob, opening it (and closing the least recently used) if needed; hold _lock"""
+        mapped = self._maps.get(digest)
+        if mapped is not None:
+            self._maps.move_to_end(digest)
+            return mapped
+        with open(self.path(digest), "rb") as f:
+            # mmap rejects empty files
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        self._maps[digest] = mapped
+        if len(self._maps) > self.max_mapped:
+            _, evicted = self._maps.popitem(last=False)
+            if isinstance(evicted, mmap.mmap):
+                evicted.close()
+        return mapped
+
+    def thumbnail(self, digest: str, max_side: int = THUMBNAIL_SIDE) -> bytes:
+        """
+        PNG of the image scaled to fit max_side x max_side, rendered once and
+        then served from root/thumbnails/<max_side>/
+        """
+        blob_path = self.path(digest)
+        path = os.path.join(self.root, "thumbnails", str(max_side), digest[:2], digest[2:4], f"{digest}.png")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return f.read()
+
+        import pymupdf
+
+        pixmap = pymupdf.Pixmap(blob_path)
+        if pixmap.colorspace is not None and pixmap.colorspace.n > 3:
+            pixmap = pymupdf.Pixmap(pymupdf.csRGB, pixmap)
+        scale = min(1.0, max_side / max(pixmap.width, pixmap.height, 1))
+        if scale < 1.0:
+            pixmap = pymupdf.Pixmap(pixmap, max(1, round(pixmap.width * scale)), max(1, round(pixmap.height * scale)))
+        data = pixmap.tobytes("png")
+        _write(path, data)
+        return data
+
+    def close(self):
+        """Unmap every mapped blob"""
+        with self._lock:
+            for mapped in self._maps.values():
+                if isinstance(mapped, mmap.mmap):
+                    mapped.close()
+            self._maps.clear()
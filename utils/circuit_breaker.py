@@ -0,0 +1,204 @@
+"""
+Circuit Breaker - Fail fast on a backend that keeps failing or stalling
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a backend whose breaker is open"""
+
+
+class _Bucket:
+    """Outcomes of one slice of the rolling window"""
+
+    __slots__ = ("epoch", "calls", "failures", "slow_calls", "latency_ms", "max_latency_ms")
+
+    def __init__(self):
+        self.reset(-1)
+
+    def reset(self, epoch: int):
+        self.epoch = epoch
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+
+class CircuitBreaker:
+    """
+    Tracks a backend's outcomes over a rolling time window and stops calling
+    it while it is unhealthy.
+
+    closed: calls go through. Once the window holds min_calls, the breaker
+    opens when the share of failures reaches failure_rate, or the share of
+    calls slower than slow_call_ms reaches slow_rate.
+    open: calls are refused for open_seconds, without touching the network.
+    half_open: up to `probes` trial calls go through. If they all succeed
+    quickly the breaker closes with an empty window; otherwise it opens again.
+
+    is_failure decides which exceptions count against the backend (e.g. not
+    a 400 caused by the request itself); by default all of them do.
+    """
+
+    def __init__(self, name: str, window_seconds: float = 30.0, buckets: int = 10,
+                 min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_ms: Optional[float] = None, slow_rate: float = 0.8,
+                 open_seconds: float = 10.0, probes: int = 1,
+                 is_failure: Optional[Callable[[Exception], bool]] = None):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.is_failure = is_failure
+
+        self.state = CLOSED
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._bucket_seconds = window_seconds / buckets
+        self._buckets: List[_Bucket] = [_Bucket() for _ in range(buckets)]
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_passed = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now; a True in half-open state claims a probe"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() < self._opened_at + self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN:
+                if self._probes_started >= self.probes:
+                    self.rejected += 1
+                    return False
+                self._probes_started += 1
+            return True
+
+    def record_success(self, duration_ms: float):
+        self._record(False, duration_ms)
+
+    def record_failure(self, duration_ms: float, error: Optional[Exception] = None):
+        counts = error is None or self.is_failure is None or self.is_failure(error)
+        self._record(counts, duration_ms)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call fn through the breaker; raises CircuitOpenError while it is open"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_failure((time.perf_counter() - start) * 1000, e)
+            raise
+        self.record_success((time.perf_counter() - start) * 1000)
+        return result
+
+    async def acall(self, fn: Callable, *args, **kwargs):
+        """Non-blocking variant of call() for coroutine functions"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            # A hedge that lost, or a call abandoned with its turn: says nothing about the backend
+            self._abandon()
+            raise
+        except Exception as e:
+            self.record_failure((time.perf_counter() - start) * 1000, e)
+            raise
+        self.record_success((time.perf_counter() - start) * 1000)
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            buckets = self._live_buckets()
+            calls = sum(bucket.calls for bucket in buckets)
+            failures = sum(bucket.failures for bucket in buckets)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failures": failures,
+                "failure_rate": failures / calls if calls else 0.0,
+                "slow_calls": sum(bucket.slow_calls for bucket in buckets),
+                "mean_latency_ms": sum(bucket.latency_ms for bucket in buckets) / calls if calls else 0.0,
+                "max_latency_ms": max((bucket.max_latency_ms for bucket in buckets), default=0.0),
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+    def _abandon(self):
+        """Give back the probe slot of a call that ended without an outcome"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes_started > self._probes_passed:
+                self._probes_started -= 1
+
+    def _record(self, failed: bool, duration_ms: float):
+        slow = self.slow_call_ms is not None and duration_ms >= self.slow_call_ms
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._transition(OPEN)
+                    return
+                self._probes_passed += 1
+                if self._probes_passed >= self.probes:
+                    self._transition(CLOSED)
+                return
+
+            epoch = int(time.monotonic() / self._bucket_seconds)
+            bucket = self._buckets[epoch % len(self._buckets)]
+            if bucket.epoch != epoch:
+                bucket.reset(epoch)
+            bucket.calls += 1
+            bucket.failures += failed
+            bucket.slow_calls += slow
+            bucket.latency_ms += duration_ms
+            bucket.max_latency_ms = max(bucket.max_latency_ms, duration_ms)
+
+            if self.state == CLOSED and self._should_open():
+                self._transition(OPEN)
+
+    def _should_open(self) -> bool:
+        buckets = self._live_buckets()
+        calls = sum(bucket.calls for bucket in buckets)
+        if calls < self.min_calls:
+            return False
+        failures = sum(bucket.failures for bucket in buckets)
+        slow_calls = sum(bucket.slow_calls for bucket in buckets)
+        return failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_rate
+
+    def _live_buckets(self) -> List[_Bucket]:
+        """Buckets still inside the rolling window"""
+        oldest = int(time.monotonic() / self._bucket_seconds) - len(self._buckets) + 1
+        return [bucket for bucket in self._buckets if bucket.epoch >= oldest]
+
+    def _transition(self, state: str):
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+            print(f"Circuit breaker '{self.name}' opened; failing fast for {self.open_seconds:g}s")
+        elif state == HALF_OPEN:
+            self._probes_started = 0
+            self._probes_passed = 0
+        elif state == CLOSED:
+            # A recovered backend starts from a clean window
+            for bucket in self._buckets:
+                bucket.reset(-1)
+            print(f"Circuit breaker '{self.name}' closed; backend recovered")
+        self.state = state
@@ -0,0 +1,243 @@
+"""
+Client Registry - Process-wide, lazily created, connection-pooled Groq and Qdrant clients
+and the circuit breakers guarding them
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional
+
+import httpx
+from groq import APIStatusError, AsyncGroq, Groq
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _groq_failure(error: Exception) -> bool:
+    """Whether a Groq error says the service is unhealthy, rather than that the request was bad"""
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 429) or error.status_code >= 500
+    # Connection errors and timeouts
+    return True
+
+
+class _BoundedAsyncTransport(httpx.AsyncHTTPTransport):
+    """
+    Async transport that queues requests on a semaphore before they reach the
+    connection pool. httpcore rescans every connection for every waiting request,
+    so letting hundreds of coroutines wait inside the pool burns the event loop.
+    """
+
+    def __init__(self, limits: httpx.Limits, **kwargs):
+        super().__init__(limits=limits, **kwargs)
+        self._max_requests = limits.max_connections or 100
+        # Created by the first request, inside the loop that uses it (before 3.10 a
+        # Semaphore binds to the loop current at construction)
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_requests)
+        async with self._slots:
+            return await super().handle_async_request(request)
+
+
+class ClientRegistry:
+    """
+    Hands out shared clients so every agent reuses the same keep-alive
+    connection pools instead of opening its own.
+
+    Clients are created on first use, which also means .env only has to be
+    loaded before the first request rather than before import.
+
+    Pool sizes come from the arguments or, when omitted, from
+    GROQ_MAX_CONNECTIONS, GROQ_MAX_KEEPALIVE, QDRANT_POOL_SIZE and
+    KEEPALIVE_EXPIRY (seconds).
+
+    Each backend has one circuit breaker, configured by BREAKER_WINDOW_SECONDS
+    (30), BREAKER_MIN_CALLS (10), BREAKER_FAILURE_RATE (0.5) and
+    BREAKER_OPEN_SECONDS (10). Qdrant queries slower than QDRANT_SLOW_CALL_MS
+    (1000) count against it too; Groq calls only by failing, as generation
+    time varies with the answer.
+
+    Async clients are per event loop. Await aclose() (or
+    aclose_async_clients()) before a loop finishes, e.g. at the end of the
+    coroutine passed to asyncio.run(), to close that loop's connections.
+    """
+
+    def __init__(self,
+                 groq_max_connections: Optional[int] = None,
+                 groq_max_keepalive: Optional[int] = None,
+                 qdrant_pool_size: Optional[int] = None,
+                 keepalive_expiry: Optional[float] = None):
+        self.groq_max_connections = groq_max_connections or _env_int("GROQ_MAX_CONNECTIONS", 20)
+        self.groq_max_keepalive = groq_max_keepalive or _env_int("GROQ_MAX_KEEPALIVE", 10)
+        self.qdrant_pool_size = qdrant_pool_size or _env_int("QDRANT_POOL_SIZE", 10)
+        self.keepalive_expiry = keepalive_expiry or float(_env_int("KEEPALIVE_EXPIRY", 30))
+
+        self._lock = threading.Lock()
+        self._groq: Optional[Groq] = None
+        self._qdrant: Optional[QdrantClient] = None
+        self._managers: Dict[Optional[str], "QdrantManager"] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # Async clients hold connections bound to one event loop, so they are kept per loop
+        self._async_groq: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+        self._async_qdrant: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncQdrantClient]" = weakref.WeakKeyDictionary()
+
+    def _groq_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.groq_max_connections,
+            max_keepalive_connections=self.groq_max_keepalive,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def _qdrant_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.qdrant_pool_size,
+            max_keepalive_connections=self.qdrant_pool_size,
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def groq(self) -> Groq:
+        """Shared Groq client backed by one pooled keep-alive HTTP client"""
+        if self._groq is None:
+            with self._lock:
+                if self._groq is None:
+                    http_client = httpx.Client(limits=self._groq_limits())
+                    self._groq = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+        return self._groq
+
+    def qdrant(self) -> QdrantClient:
+        """Shared Qdrant client with a bounded keep-alive connection pool"""
+        if self._qdrant is None:
+            with self._lock:
+                if self._qdrant is None:
+                    self._qdrant = QdrantClient(
+                        url=os.getenv("QDRANT_URL"),
+                        api_key=os.getenv("QDRANT_API_KEY") or None,
+                        limits=self._qdrant_limits()
+                    )
+        return self._qdrant
+
+    def async_groq(self) -> AsyncGroq:
+        """Shared AsyncGroq client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_groq.get(loop)
+        if client is None:
+            http_client = httpx.AsyncClient(transport=_BoundedAsyncTransport(self._groq_limits()))
+            client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+            self._async_groq[loop] = client
+        return client
+
+    def async_qdrant(self) -> AsyncQdrantClient:
+        """Shared AsyncQdrantClient for the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = self._async_qdrant.get(loop)
+        if client is None:
+            client = AsyncQdrantClient(
+                url=os.getenv("QDRANT_URL"),
+                api_key=os.getenv("QDRANT_API_KEY") or None,
+                transport=_BoundedAsyncTransport(self._qdrant_limits())
+            )
+            self._async_qdrant[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the running event loop's async clients and their connections"""
+        loop = asyncio.get_running_loop()
+        groq, qdrant = self._async_groq.pop(loop, None), self._async_qdrant.pop(loop, None)
+        if groq is not None:
+            await groq.close()
+        if qdrant is not None:
+            await qdrant.close()
+
+    def breaker(self, backend: str) -> CircuitBreaker:
+        """Shared circuit breaker of a backend ("qdrant" or "groq")"""
+        with self._lock:
+            if backend not in self._breakers:
+                self._breakers[backend] = CircuitBreaker(
+                    backend,
+                    window_seconds=float(os.getenv("BREAKER_WINDOW_SECONDS", "30")),
+                    min_calls=_env_int("BREAKER_MIN_CALLS", 10),
+                    failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+                    slow_call_ms=float(os.getenv("QDRANT_SLOW_CALL_MS", "1000")) if backend == "qdrant" else None,
+                    open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "10")),
+                    is_failure=_groq_failure if backend == "groq" else None
+                )
+            return self._breakers[backend]
+
+    def health(self) -> Dict[str, Dict]:
+        """Circuit breaker state and rolling error/latency window per backend"""
+        return {backend: self.breaker(backend).stats() for backend in ("qdrant", "groq")}
+
+    def qdrant_manager(self, collection_name: Optional[str] = None) -> "QdrantManager":
+        """Shared QdrantManager per collection, all on the same Qdrant client"""
+        if collection_name not in self._managers:
+            # Imported here because QdrantManager itself pulls its default client from the registry
+            from utils.qdrant_client import QdrantManager
+            manager = QdrantManager(client=self.qdrant(), collection_name=collection_name,
+                                    breaker=self.breaker("qdrant"))
+            with self._lock:
+                self._managers.setdefault(collection_name, manager)
+        return self._managers[collection_name]
+
+    def close(self):
+        """Close pooled connections and forget all clients and breaker history"""
+        with self._lock:
+            if self._groq is not None:
+                self._groq.close()
+            if self._qdrant is not None:
+                self._qdrant.close()
+            self._groq = None
+            self._qdrant = None
+            self._managers = {}
+            self._breakers = {}
+            # Async clients can only be closed on their own loop (aclose()); just drop the references
+            self._async_groq = weakref.WeakKeyDictionary()
+            self._async_qdrant = weakref.WeakKeyDictionary()
+
+
+registry = ClientRegistry()
+
+
+def get_groq_client() -> Groq:
+    """Process-wide Groq client"""
+    return registry.groq()
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Process-wide Qdrant client"""
+    return registry.qdrant()
+
+
+def get_async_groq_client() -> AsyncGroq:
+    """AsyncGroq client shared by everything running on the current event loop"""
+    return registry.async_groq()
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """AsyncQdrantClient shared by everything running on the current event loop"""
+    return registry.async_qdrant()
+
+
+async def aclose_async_clients():
+    """Close the async clients of the current event loop; await it before the loop finishes"""
+    await registry.aclose()
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """Process-wide circuit breaker of a backend ("qdrant" or "groq")"""
+    return registry.breaker(backend)
+
+
+def get_qdrant_manager(collection_name: Optional[str] = None) -> "QdrantManager":
+    """Process-wide QdrantManager for a collection (default collection if omitted)"""
+    return registry.qdrant_manager(collection_name)
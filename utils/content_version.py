@@ -0,0 +1,101 @@
+"""
+Content Version - A collection's content version, stored in Qdrant so every process sees changes
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from utils.circuit_breaker import CircuitBreaker
+
+# Vectorless collection holding one marker point per content collection
+CONTENT_VERSION_COLLECTION = "content_versions"
+
+
+def marker_point_id(collection_name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"content-version:{collection_name}"))
+
+
+class ContentVersion:
+    """
+    The content version of one collection: a token replaced by every write to
+    the collection, whichever process (the app, `python -m ingest`, the
+    notebook) made it. Caches of answers and search results key on it.
+
+    get() re-reads the token from Qdrant at most every refresh_seconds
+    (CONTENT_VERSION_REFRESH_SECONDS, default 5), so a change made elsewhere
+    reaches this process within that time. While Qdrant cannot be read the
+    last known token is kept; None until one has been read or written.
+    A missing marker collection (data ingested before versions were kept,
+    or a search-only deployment) reads as None and is not a breaker failure.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str, breaker: CircuitBreaker,
+                 refresh_seconds: Optional[float] = None):
+        self.client = client
+        self.collection_name = collection_name
+        self.breaker = breaker
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.getenv("CONTENT_VERSION_REFRESH_SECONDS", "5"))
+        self._point_id = marker_point_id(collection_name)
+        self._version: Optional[str] = None
+        self._read_at = float("-inf")
+        self._marker_collection_exists = False
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[str]:
+        if time.monotonic() - self._read_at < self.refresh_seconds:
+            return self._version
+        # One thread re-reads; the others keep using the version they have meanwhile
+        if not self._lock.acquire(blocking=False):
+            return self._version
+        try:
+            self._read_at = time.monotonic()
+            version = self.breaker.call(self._read)
+            if version is not None:
+                self._version = version
+        except Exception:
+            # Unreadable (Qdrant down): keep the last known version
+            pass
+        finally:
+            self._lock.release()
+        return self._version
+
+    def _read(self) -> Optional[str]:
+        # Until the marker collection exists, ask whether it does rather than
+        # let every retrieve fail against it
+        if not self._marker_collection_exists:
+            if not self.client.collection_exists(CONTENT_VERSION_COLLECTION):
+                return None
+            self._marker_collection_exists = True
+        records = self.client.retrieve(collection_name=CONTENT_VERSION_COLLECTION, ids=[self._point_id],
+                                       with_vectors=False)
+        return records[0].payload.get("version") if records else None
+
+    def bump(self) -> str:
+        """
+        Replace the version after a write to the collection; returns the new one.
+        This process uses it at once, even if it could not be stored
+        """
+        version = uuid.uuid4().hex
+        self._version, self._read_at = version, time.monotonic()
+        point = PointStruct(id=self._point_id, vector={}, payload={
+            "collection": self.collection_name, "version": version, "updated_at": time.time()
+        })
+        try:
+            try:
+                self.client.upsert(collection_name=CONTENT_VERSION_COLLECTION, points=[point])
+            except Exception:
+                # First write anywhere: create the marker collection (unless another process just did) and retry
+                if not self.client.collection_exists(CONTENT_VERSION_COLLECTION):
+                    self.client.create_collection(CONTENT_VERSION_COLLECTION, vectors_config={})
+                self.client.upsert(collection_name=CONTENT_VERSION_COLLECTION, points=[point])
+            self._marker_collection_exists = True
+        except Exception as e:
+            print(f"Content version update error: {e}")
+        return version
@@ -0,0 +1,88 @@
+"""
+Context Packing - Fit retrieved passages into an agent's prompt token budget
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from utils.tokens import count_tokens
+from utils.tracing import span
+
+# Share of the smaller passage's word trigrams found in a kept passage at which it is a duplicate
+DUPLICATE_OVERLAP = 0.8
+SHINGLE_WORDS = 3
+
+
+def passage_tokens(passage: Dict) -> int:
+    """Tokens of a passage's text: the token_count stored at ingest, else counted"""
+    stored = (passage.get("metadata") or {}).get("token_count")
+    return stored if stored is not None else count_tokens(passage["text"])
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) < SHINGLE_WORDS:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _truncate(passage: Dict, budget: int) -> Optional[Dict]:
+    """The passage cut at a word boundary to at most budget tokens, or None if not even a word fits"""
+    words, tokens = [], 0
+    for word in passage["text"].split():
+        word_tokens = count_tokens(word)
+        if tokens + word_tokens > budget:
+            break
+        words.append(word)
+        tokens += word_tokens
+    if not words:
+        return None
+    metadata = {**(passage.get("metadata") or {}), "token_count": tokens}
+    return {**passage, "text": " ".join(words), "metadata": metadata, "truncated": True}
+
+
+def pack_passages(passages: List[Dict], budget_tokens: int, overhead_tokens: int = 0,
+                  duplicate_overlap: float = DUPLICATE_OVERLAP) -> Tuple[List[Dict], Dict]:
+    """
+    Choose the passages that go into a prompt.
+
+    Passages are taken best score first. One whose word trigrams mostly
+    (duplicate_overlap of the smaller set) appear in a passage already taken
+    is a near-duplicate and skipped; so is one that no longer fits, while
+    smaller ones after it may still fit. When not even the best passage fits,
+    it is cut to the budget rather than leaving the prompt without context.
+
+    Args:
+        passages: Search results (text, score, metadata), in any order
+        budget_tokens: Tokens the passages may take up, overheads included
+        overhead_tokens: Tokens the prompt adds around each passage (labels, separators)
+        duplicate_overlap: Trigram overlap at which a passage counts as a duplicate
+
+    Returns:
+        Tuple of (passages in score order, stats: tokens, duplicates, over_budget)
+    """
+    with span("context.pack", passages=len(passages), budget=budget_tokens) as pack_span:
+        packed, stats = _pack(passages, budget_tokens, overhead_tokens, duplicate_overlap)
+        pack_span.set(kept=len(packed), **stats)
+    return packed, stats
+
+
+def _pack(passages: List[Dict], budget_tokens: int, overhead_tokens: int,
+          duplicate_overlap: float) -> Tuple[List[Dict], Dict]:
+    packed, kept_shingles = [], []
+    stats = {"tokens": 0, "duplicates": 0, "over_budget": 0}
+    for passage in sorted(passages, key=lambda item: item.get("score", 0), reverse=True):
+        shingles = _shingles(passage["text"])
+        if any(len(shingles & kept) >= duplicate_overlap * min(len(shingles), len(kept)) for kept in kept_shingles):
+            stats["duplicates"] += 1
+            continue
+        tokens = passage_tokens(passage) + overhead_tokens
+        if stats["tokens"] + tokens > budget_tokens:
+            truncated = None if packed else _truncate(passage, budget_tokens - overhead_tokens)
+            if truncated is None:
+                stats["over_budget"] += 1
+                continue
+            passage, tokens = truncated, truncated["metadata"]["token_count"] + overhead_tokens
+        packed.append(passage)
+        kept_shingles.append(shingles)
+        stats["tokens"] += tokens
+    return packed, stats
@@ -0,0 +1,146 @@
+"""
+Deadline - Per-turn latency budget shared by every Qdrant and LLM call of a turn
+"""
+
+import os
+import time
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+
+from groq import APIError
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.tracing import span, timestamp
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# A degraded completion is shortened, but never below this
+MIN_MAX_TOKENS = 64
+# The Groq SDK waits about this long before retrying a failed request
+RETRY_BACKOFF_MS = 500
+
+
+class Deadline:
+    """
+    Point in time by which a turn should have answered, started on creation.
+
+    Unbounded (budget_ms=0) deadlines never expire and leave every call as
+    it was: no timeouts, no hedging, full max_tokens.
+
+    Defaults come from TURN_BUDGET_MS (10000), LLM_RESERVE_MS (2000, at most half
+    the budget: time kept back for the LLM call, which retrieval may not eat
+    into; with less than this left the turn degrades), and LLM_FIRST_TOKEN_MS / LLM_MS_PER_TOKEN
+    (300 / 4: generation speed used to size max_tokens).
+    """
+
+    def __init__(self, budget_ms: Optional[float] = None, reserve_ms: Optional[float] = None):
+        self.budget_ms = _env_float("TURN_BUDGET_MS", 10_000) if budget_ms is None else budget_ms
+        if reserve_ms is None:
+            reserve_ms = _env_float("LLM_RESERVE_MS", min(2_000, self.budget_ms / 2))
+        self.reserve_ms = reserve_ms
+        self.first_token_ms = _env_float("LLM_FIRST_TOKEN_MS", 300)
+        self.ms_per_token = _env_float("LLM_MS_PER_TOKEN", 4)
+        self.bounded = self.budget_ms > 0
+        self._expires_at = time.monotonic() + self.budget_ms / 1000
+
+    def remaining_ms(self) -> float:
+        if not self.bounded:
+            return float("inf")
+        return max(0.0, (self._expires_at - time.monotonic()) * 1000)
+
+    def expired(self) -> bool:
+        return self.remaining_ms() <= 0
+
+    def nearly_spent(self) -> bool:
+        """Less time left than the LLM call is expected to need"""
+        return self.remaining_ms() < self.reserve_ms
+
+    def retrieval_timeout(self) -> Optional[float]:
+        """Seconds retrieval may take without eating into the LLM reserve (None when unbounded)"""
+        if not self.bounded:
+            return None
+        return max(self.remaining_ms() - self.reserve_ms, 0.0) / 1000
+
+    def max_tokens(self, requested: int) -> int:
+        """The largest completion, up to requested, that can still be generated in time"""
+        if not self.bounded:
+            return requested
+        fits = (self.remaining_ms() - self.first_token_ms) / self.ms_per_token
+        return int(max(MIN_MAX_TOKENS, min(requested, fits)))
+
+
+def budgeted_completion(client, args: Dict, deadline: Deadline, agent: str, logs: List[Dict]) -> Tuple[object, Dict]:
+    """
+    The Groq client and completion arguments for one LLM call within the
+    turn's remaining budget: max_tokens shrinks to what fits, and the request
+    times out with the turn. The SDK retries once only when two attempts fit
+    in the budget; otherwise a failure goes straight to the caller's degrade path.
+    """
+    if not deadline.bounded:
+        return client, args
+
+    remaining_ms = deadline.remaining_ms()
+    retries = 1 if remaining_ms >= 2 * deadline.reserve_ms + RETRY_BACKOFF_MS else 0
+    timeout = max((remaining_ms - retries * RETRY_BACKOFF_MS) / (retries + 1), 1.0) / 1000
+
+    max_tokens = deadline.max_tokens(args["max_tokens"])
+    if max_tokens < args["max_tokens"]:
+        logs.append({
+            "agent": agent,
+            "action": f"Latency budget nearly spent: max_tokens {args['max_tokens']} -> {max_tokens}",
+            "degraded": "max_tokens",
+            "timestamp": timestamp()
+        })
+    return client.with_options(timeout=timeout, max_retries=retries), {**args, "max_tokens": max_tokens}
+
+
+def stream_completion(client, breaker: CircuitBreaker, args: Dict, deadline: Deadline, agent: str,
+                      logs: List[Dict], degrade: Callable[[Exception], str],
+                      output: str = "answer") -> Generator[str, None, Optional[str]]:
+    """
+    Stream a chat completion's text deltas within the turn's deadline.
+
+    Once the deadline expires the stream is closed and the (partial) output
+    logged as cut short. If the call fails before any text was shown,
+    degrade(error) is yielded in its place; once text has been shown the
+    partial output stands. Returns the full text when the stream ran to its
+    end, else None, so callers only cache complete answers.
+    """
+    text, complete = [], False
+    try:
+        with span("llm.stream", agent=agent) as llm_span:
+            stream = breaker.call(client.chat.completions.create, stream=True, **args)
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    text.append(chunk.choices[0].delta.content)
+                    yield text[-1]
+                if deadline.expired():
+                    stream.close()
+                    logs.append({
+                        "agent": agent,
+                        "action": f"Latency budget spent; {output} cut short",
+                        "degraded": "truncated",
+                        "timestamp": timestamp()
+                    })
+                    break
+            else:
+                complete = True
+            llm_span.set(chunks=len(text))
+    except (APIError, CircuitOpenError) as e:
+        degraded = degrade(e)
+        if not text:
+            yield degraded
+    return "".join(text) if complete else None
+
+
+def log_degraded(agent: str, error: Exception, logs: List[Dict], instead: str, degraded: str = "passages"):
+    """Log that the LLM call failed or ran out of time, and what the turn answers with instead"""
+    logs.append({
+        "agent": agent,
+        "action": f"LLM call failed ({type(error).__name__}); {instead}",
+        "degraded": degraded,
+        "timestamp": timestamp()
+    })
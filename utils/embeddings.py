@@ -0,0 +1,109 @@
+"""
+Embeddings - Hash-based text embeddings shared by ingestion and retrieval
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+EMBEDDING_DIM = 384
+MAX_WORDS = 100
+HASH_SLOTS = 3
+SLOT_STRIDE = 13
+
+# Stored in every Qdrant payload; bump whenever the vectors for a given text change
+EMBEDDING_VERSION = "blake2b-v1"
+HASH_SEED = b"edu-mas-embed"
+
+# Offset of each hash slot from a word's bucket, and the weight of each word position; shared by both paths
+_SLOT_OFFSETS = np.arange(HASH_SLOTS, dtype=np.int64) * SLOT_STRIDE
+_POSITION_WEIGHTS = (1.0 / (np.arange(MAX_WORDS, dtype=np.float32) + 1.0))[:, None]
+
+
+def stable_hash(word: str) -> int:
+    """
+    64-bit seeded BLAKE2b digest of a word.
+    Unlike the built-in hash() it is not salted per process, so every
+    process and ingest worker maps a word to the same value.
+    """
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8, key=HASH_SEED).digest()
+    return int.from_bytes(digest, "little")
+
+
+@lru_cache(maxsize=1 << 20)
+def word_bucket(word: str, dim: int = EMBEDDING_DIM) -> int:
+    """Vocabulary-to-bucket cache: first hash slot of a word"""
+    return stable_hash(word) % dim
+
+
+def embed_many(texts: Sequence[str], dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Embed a batch of texts with the hash-based approach in one pass.
+
+    Each of the first 100 words of a text adds 1/(position+1) to three
+    hashed slots; rows are then L2-normalized.
+
+    Args:
+        texts: Texts to embed
+        dim: Embedding dimension
+
+    Returns:
+        float32 array of shape (len(texts), dim)
+    """
+    # Tokenize once into a flat word list, remembering each text's length
+    tokenized = [text.lower().split()[:MAX_WORDS] for text in texts]
+    lengths = np.fromiter(map(len, tokenized), dtype=np.int64, count=len(tokenized))
+    words = [word for text_words in tokenized for word in text_words]
+
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    if not words:
+        return vectors
+
+    vocabulary: Dict[str, int] = {}
+    for word in words:
+        if word not in vocabulary:
+            vocabulary[word] = len(vocabulary)
+    token_ids = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+
+    # Row of each token and its position inside its text
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    positions = np.arange(len(words)) - np.repeat(starts, lengths)
+
+    # Hash each distinct word once, then derive every slot index vectorially
+    buckets = np.fromiter((word_bucket(word, dim) for word in vocabulary), dtype=np.int64, count=len(vocabulary))
+    indices = (buckets[token_ids][:, None] + _SLOT_OFFSETS) % dim
+    weights = _POSITION_WEIGHTS[positions]
+
+    np.add.at(vectors, (rows[:, None], indices), np.broadcast_to(weights, indices.shape))
+
+    # Normalize row-wise, leaving empty texts as zero vectors
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def simple_embed(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    Create embeddings using hash-based approach.
+    Must match the function used to ingest the PDF content,
+    otherwise query vectors land in a different space.
+
+    Same result as embed_many([text], dim)[0], without the batch bookkeeping
+    (vocabulary, row offsets) a single text does not need.
+    """
+    words = text.lower().split()[:MAX_WORDS]
+    vector = np.zeros(dim, dtype=np.float32)
+    if not words:
+        return vector.tolist()
+
+    buckets = np.fromiter((word_bucket(word, dim) for word in words), dtype=np.int64, count=len(words))
+    indices = (buckets[:, None] + _SLOT_OFFSETS) % dim
+    np.add.at(vector, indices, np.broadcast_to(_POSITION_WEIGHTS[:len(words)], indices.shape))
+
+    norm = np.sqrt(np.add.reduce(vector * vector))
+    if norm > 0:
+        vector /= norm
+    return vector.tolist()
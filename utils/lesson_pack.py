@@ -0,0 +1,117 @@
+"""
+Lesson Pack - Precomputed passages and base explanations for the Tutor's sections
+
+Build a pack offline and point LESSON_PACK_PATH at it so TutorAgent loads it at startup:
+    python -m utils.lesson_pack --output lesson_pack.json.gz
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from utils.embeddings import EMBEDDING_VERSION
+
+PACK_FORMAT = 1
+
+
+class LessonPack:
+    """Per-section passages (and optionally a generated explanation) keyed by section name"""
+
+    def __init__(self, lessons: Dict[str, Dict], collection_name: str,
+                 embedding_version: str = EMBEDDING_VERSION, built_at: Optional[float] = None):
+        self.lessons = lessons
+        self.collection_name = collection_name
+        self.embedding_version = embedding_version
+        self.built_at = built_at or time.time()
+
+    def __contains__(self, section_name: str) -> bool:
+        return section_name in self.lessons
+
+    def __len__(self) -> int:
+        return len(self.lessons)
+
+    def passages(self, section_name: str) -> Optional[List[Dict]]:
+        lesson = self.lessons.get(section_name)
+        return lesson["passages"] if lesson else None
+
+    def explanation(self, section_name: str) -> Optional[str]:
+        lesson = self.lessons.get(section_name)
+        return lesson.get("explanation") if lesson else None
+
+    def save(self, path: str):
+        """Write the pack as gzip-compressed JSON"""
+        document = {
+            "format": PACK_FORMAT,
+            "collection_name": self.collection_name,
+            "embedding_version": self.embedding_version,
+            "built_at": self.built_at,
+            "lessons": self.lessons
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LessonPack"]:
+        """Read a pack, or return None if it is missing or was built for another embedding version"""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                document = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Lesson pack not loaded from {path}: {e}")
+            return None
+
+        if document.get("format") != PACK_FORMAT or document.get("embedding_version") != EMBEDDING_VERSION:
+            print(f"Lesson pack {path} was built for another version; rebuild it")
+            return None
+
+        return cls(document["lessons"], document["collection_name"],
+                   document["embedding_version"], document["built_at"])
+
+    @classmethod
+    def from_env(cls) -> Optional["LessonPack"]:
+        path = os.getenv("LESSON_PACK_PATH")
+        return cls.load(path) if path else None
+
+
+def build_lesson_pack(generate: bool = True, limit: int = 3) -> LessonPack:
+    """
+    Retrieve passages for every Tutor section and optionally generate the base explanation
+
+    Args:
+        generate: Also pre-generate an explanation per section with Groq
+        limit: Passages retrieved per section, as in TutorAgent.teach
+    """
+    from agents.tutor_agent import TutorAgent
+
+    tutor = TutorAgent()
+    # Build from live retrieval and the plain prompt, not from a previously loaded pack
+    tutor.lesson_pack = None
+    lessons = {}
+    for section_name in tutor.sections:
+        passages = tutor.qdrant.search(section_name, limit=limit)
+        lessons[section_name] = {"passages": passages}
+
+        if generate:
+            lessons[section_name]["explanation"] = tutor.explain_section(section_name, passages)
+
+        print(f"Packed: {section_name}")
+
+    return LessonPack(lessons, tutor.qdrant.collection_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Tutor lesson pack")
+    parser.add_argument("--output", default="lesson_pack.json.gz")
+    parser.add_argument("--no-generate", action="store_true", help="Only pre-retrieve passages")
+    args = parser.parse_args()
+
+    pack = build_lesson_pack(generate=not args.no_generate)
+    pack.save(args.output)
+    print(f"Wrote {len(pack)} sections to {args.output} ({os.path.getsize(args.output):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,65 +2,336 @@
 Qdrant Client Manager - Handles all vector database operations
 """
 
+import asyncio
 import os
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-from typing import List, Dict
-from groq import Groq
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Batch, Filter, FieldCondition, MatchValue, PointIdsList, PointStruct, SetPayload, SetPayloadOperation
+)
+from typing import Callable, List, Dict, Optional, Union
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.clients import get_async_qdrant_client, get_breaker, get_qdrant_client
+from utils.content_version import ContentVersion
+from utils.deadline import Deadline
+from utils.embeddings import simple_embed, EMBEDDING_VERSION
+from utils.retrieval_cache import RetrievalCache
+from utils.tracing import span
+
+# Runs deadline-bound queries, so a slow one can be hedged or abandoned
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="qdrant-hedge")
 
 
 class QdrantManager:
     """Manages Qdrant vector database operations"""
     
-    def __init__(self):
-        self.client = QdrantClient(
-            url=os.getenv("QDRANT_URL"),
-            api_key=os.getenv("QDRANT_API_KEY")
-        )
-        self.collection_name = "rich_dad_poor_dad"
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, client: Optional[QdrantClient] = None, collection_name: Optional[str] = None,
+                 async_client: Optional[AsyncQdrantClient] = None,
+                 retrieval_cache: Optional[RetrievalCache] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        # An explicitly injected sync client (e.g. a local in-memory Qdrant) without an
+        # async counterpart is driven from asearch() through a worker thread
+        self._shared_clients = client is None
+        self.client = client or get_qdrant_client()
+        self._async_client = async_client
+        self.collection_name = collection_name or "rich_dad_poor_dad"
+        # Called with the collection name when stored vectors were built by
+        # another embedding version, e.g. to schedule a re-index
+        self.on_stale_embeddings: Optional[Callable[[str], None]] = None
+        self.stale_results = 0
+        # Result lists keyed by query vector, filter, limit and content version; cleared per collection on upsert
+        self.retrieval_cache = retrieval_cache or RetrievalCache()
+        # A deadline-bound query that has not answered within the p95 of recent queries, capped
+        # at QDRANT_HEDGE_MS so a heavy tail cannot push it out, is sent once more; the first answer wins
+        self.hedge_delay_ms = float(os.getenv("QDRANT_HEDGE_MS", "100"))
+        self.hedged_queries = 0
+        self._latencies_ms = deque(maxlen=200)
+        # While Qdrant keeps failing or stalling, queries skip it for the fallback passages
+        # instead of each paying the timeout; an injected client has a breaker of its own
+        if breaker is None:
+            breaker = get_breaker("qdrant") if self._shared_clients else CircuitBreaker("qdrant")
+        self.breaker = breaker
+        # Replaced on every write to the collection, by any process; caches of derived answers key on it
+        self.content_versions = ContentVersion(self.client, self.collection_name, self.breaker)
+    
+    @property
+    def content_version(self) -> Optional[str]:
+        """The collection's shared content version, re-read from Qdrant every few seconds"""
+        return self.content_versions.get()
     
-    def search(self, query: str, limit: int = 5) -> List[Dict]:
+    def search(self, query: str, limit: int = 5,
+               difficulty: Optional[str] = None,
+               page: Optional[int] = None,
+               sequence_id: Optional[int] = None,
+               offset: int = 0,
+               deadline: Optional[Deadline] = None,
+               on_query: Optional[Callable[[], None]] = None) -> List[Dict]:
         """
-        Perform semantic search using Qdrant
+        Perform semantic search using Qdrant; while its circuit breaker is
+        open, the fallback passages are returned without a query
         
         Args:
             query: Search query text
-            limit: Number of results to return
+            limit: Number of results to return (top-k)
+            difficulty: Only return passages with this difficulty level
+            page: Only return passages from this page
+            sequence_id: Only return the passage with this sequence id
+            offset: Skip this many best matches, to page through results
+            deadline: The turn's deadline; the query is hedged, and abandoned for
+                fallback passages rather than eat into the time reserved for the LLM
+            on_query: Called when the query goes to Qdrant, i.e. not for a
+                retrieval cache hit or fallback passages served without a query
             
         Returns:
-            List of dictionaries with text and score
+            List of dictionaries with text, score and metadata, best match first
         """
+        query_args = self._query_args(query, limit, difficulty, page, sequence_id, offset)
+        cache_key = self._cache_key(query_args)
+        cached = self.retrieval_cache.get(self.collection_name, cache_key)
+        if cached is not None:
+            return cached
+        
+        if deadline is not None and deadline.nearly_spent():
+            # No time left for a round trip
+            return self._get_fallback_content(query, limit, offset)
+        
         try:
-            # Generate embedding for query using a simple approach
-            # In production, you'd use a proper embedding model
-            # For demo, we'll use Qdrant's built-in search
-            
-            # Search in Qdrant
-            search_results = self.client.scroll(
-                collection_name=self.collection_name,
-                limit=limit,
-                with_payload=True,
-                with_vectors=False
-            )
-            
-            results = []
-            for point in search_results[0]:
-                payload = point.payload
-                results.append({
-                    "text": payload.get("text", payload.get("content", "")),
-                    "score": 0.95,  # Mock score for demo
-                    "metadata": payload.get("metadata", {})
-                })
-            
-            return results[:limit]
+            with span("qdrant.query", collection=self.collection_name, limit=limit, offset=offset) as query_span:
+                if on_query is not None:
+                    on_query()
+                if deadline is None or not deadline.bounded:
+                    response = self._timed_query(query_args)
+                else:
+                    response = self._hedged_query(query_args, deadline, query_span)
+            results = self._to_results(response.points)
             
+        except CircuitOpenError:
+            # Known to be down; already reported when the breaker opened
+            return self._get_fallback_content(query, limit, offset)
         except Exception as e:
             print(f"Qdrant search error: {e}")
             # Fallback to mock data for demo
-            return self._get_fallback_content(query, limit)
+            return self._get_fallback_content(query, limit, offset)
+        
+        self.retrieval_cache.put(self.collection_name, cache_key, results)
+        return results
     
-    def _get_fallback_content(self, query: str, limit: int) -> List[Dict]:
+    async def asearch(self, query: str, limit: int = 5,
+                      difficulty: Optional[str] = None,
+                      page: Optional[int] = None,
+                      sequence_id: Optional[int] = None,
+                      offset: int = 0,
+                      deadline: Optional[Deadline] = None,
+                      on_query: Optional[Callable[[], None]] = None) -> List[Dict]:
+        """Non-blocking variant of search() with the same arguments and results"""
+        async_client = self._async_client or (get_async_qdrant_client() if self._shared_clients else None)
+        if async_client is None:
+            return await asyncio.to_thread(self.search, query, limit, difficulty, page, sequence_id, offset, deadline,
+                                           on_query)
+        
+        query_args = self._query_args(query, limit, difficulty, page, sequence_id, offset)
+        cache_key = self._cache_key(query_args)
+        cached = self.retrieval_cache.get(self.collection_name, cache_key)
+        if cached is not None:
+            return cached
+        
+        if deadline is not None and deadline.nearly_spent():
+            return self._get_fallback_content(query, limit, offset)
+        
+        try:
+            with span("qdrant.query", collection=self.collection_name, limit=limit, offset=offset) as query_span:
+                if on_query is not None:
+                    on_query()
+                if deadline is None or not deadline.bounded:
+                    response = await self._atimed_query(async_client, query_args)
+                else:
+                    response = await self._ahedged_query(async_client, query_args, deadline, query_span)
+            results = self._to_results(response.points)
+            
+        except CircuitOpenError:
+            return self._get_fallback_content(query, limit, offset)
+        except Exception as e:
+            print(f"Qdrant search error: {e}")
+            return self._get_fallback_content(query, limit, offset)
+        
+        self.retrieval_cache.put(self.collection_name, cache_key, results)
+        return results
+    
+    def _hedged_query(self, query_args: Dict, deadline: Deadline, query_span):
+        """
+        Send the query, and send it once more if it has not answered within the
+        hedge delay or has failed; the first response wins. Raises TimeoutError
+        once retrieval would eat into the time reserved for the LLM.
+        """
+        expires_at = time.monotonic() + deadline.retrieval_timeout()
+        attempts = [_hedge_pool.submit(self._timed_query, query_args)]
+        pending = set(attempts)
+        while True:
+            remaining = max(expires_at - time.monotonic(), 0.0)
+            can_hedge = len(attempts) < 2
+            done, pending = wait(pending, timeout=min(self._hedge_delay(), remaining) if can_hedge else remaining,
+                                 return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+                if isinstance(attempt.exception(), CircuitOpenError) and not pending:
+                    # Refused by the breaker; a hedge would be refused too
+                    raise attempt.exception()
+            
+            if time.monotonic() >= expires_at:
+                # Abandoned attempts finish on the pool; their results are dropped
+                raise TimeoutError("Qdrant query did not answer within the turn's latency budget")
+            if can_hedge:
+                attempts.append(_hedge_pool.submit(self._timed_query, query_args))
+                pending.add(attempts[-1])
+                self.hedged_queries += 1
+                query_span.set(hedged=True)
+            elif not pending:
+                raise attempts[-1].exception()
+    
+    async def _ahedged_query(self, async_client: AsyncQdrantClient, query_args: Dict,
+                             deadline: Deadline, query_span):
+        """Non-blocking variant of _hedged_query(); attempts still running at the end are cancelled"""
+        expires_at = time.monotonic() + deadline.retrieval_timeout()
+        attempts = [asyncio.ensure_future(self._atimed_query(async_client, query_args))]
+        pending = set(attempts)
+        try:
+            while True:
+                remaining = max(expires_at - time.monotonic(), 0.0)
+                can_hedge = len(attempts) < 2
+                done, pending = await asyncio.wait(
+                    pending, timeout=min(self._hedge_delay(), remaining) if can_hedge else remaining,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                    if isinstance(attempt.exception(), CircuitOpenError) and not pending:
+                        raise attempt.exception()
+                
+                if time.monotonic() >= expires_at:
+                    raise TimeoutError("Qdrant query did not answer within the turn's latency budget")
+                if can_hedge:
+                    attempts.append(asyncio.ensure_future(self._atimed_query(async_client, query_args)))
+                    pending.add(attempts[-1])
+                    self.hedged_queries += 1
+                    query_span.set(hedged=True)
+                elif not pending:
+                    raise attempts[-1].exception()
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+    
+    def _timed_query(self, query_args: Dict):
+        start = time.perf_counter()
+        response = self.breaker.call(self.client.query_points, **query_args)
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        return response
+    
+    async def _atimed_query(self, async_client: AsyncQdrantClient, query_args: Dict):
+        start = time.perf_counter()
+        response = await self.breaker.acall(async_client.query_points, **query_args)
+        self._latencies_ms.append((time.perf_counter() - start) * 1000)
+        return response
+    
+    def _hedge_delay(self) -> float:
+        """Seconds to wait for an attempt before hedging it"""
+        latencies = sorted(self._latencies_ms)
+        if len(latencies) < 20:
+            return self.hedge_delay_ms / 1000
+        return min(latencies[int(len(latencies) * 0.95)], self.hedge_delay_ms) / 1000
+    
+    def upsert(self, points: Union[List[PointStruct], Batch]):
+        """
+        Write points to the collection and mark its content as changed.
+        A columnar Batch serializes several times faster than PointStructs, for bulk writes.
+        """
+        self.client.upsert(collection_name=self.collection_name, points=points)
+        self._content_changed()
+    
+    def delete(self, point_ids: List[str]):
+        """Remove points from the collection and mark its content as changed"""
+        self.client.delete(collection_name=self.collection_name, points_selector=PointIdsList(points=point_ids))
+        self._content_changed()
+    
+    def set_payloads(self, payloads: Dict[str, Dict]):
+        """Merge a payload update into each point, in one request and without resending vectors"""
+        self.client.batch_update_points(collection_name=self.collection_name, update_operations=[
+            SetPayloadOperation(set_payload=SetPayload(payload=payload, points=[point_id]))
+            for point_id, payload in payloads.items()
+        ])
+        self._content_changed()
+    
+    def _content_changed(self):
+        self.content_versions.bump()
+        self.retrieval_cache.invalidate(self.collection_name)
+    
+    def _query_args(self, query: str, limit: int, difficulty: Optional[str],
+                    page: Optional[int], sequence_id: Optional[int], offset: int = 0) -> Dict:
+        """Embed the query and build the query_points arguments shared by search and asearch"""
+        with span("embed", texts=1):
+            vector = simple_embed(query)
+        return {
+            "collection_name": self.collection_name,
+            "query": vector,
+            "query_filter": self._build_filter(difficulty=difficulty, page=page, sequence_id=sequence_id),
+            "limit": limit,
+            "offset": offset,
+            "with_payload": True,
+            "with_vectors": False
+        }
+    
+    def _cache_key(self, query_args: Dict) -> str:
+        return RetrievalCache.key(query_args["query"], query_args["query_filter"], query_args["limit"],
+                                  query_args["offset"], self.content_version)
+    
+    def _to_results(self, points) -> List[Dict]:
+        self._check_embedding_version(points)
+        return [self._to_result(point) for point in points]
+    
+    def _check_embedding_version(self, points) -> None:
+        """Detect points whose vectors were not built by the current embedding version"""
+        stale = sum(
+            1 for point in points
+            if (point.payload or {}).get("embedding_version") != EMBEDDING_VERSION
+        )
+        if not stale:
+            return
+        
+        if not self.stale_results:
+            print(f"Qdrant collection '{self.collection_name}' has embeddings from another "
+                  f"version (expected {EMBEDDING_VERSION}); re-index to restore retrieval quality")
+        self.stale_results += stale
+        if self.on_stale_embeddings:
+            self.on_stale_embeddings(self.collection_name)
+    
+    @staticmethod
+    def _build_filter(**conditions) -> Optional[Filter]:
+        """Build a payload filter from the indexed fields that were given"""
+        must = [
+            FieldCondition(key=key, match=MatchValue(value=value))
+            for key, value in conditions.items()
+            if value is not None
+        ]
+        return Filter(must=must) if must else None
+    
+    @staticmethod
+    def _to_result(point) -> Dict:
+        """Convert a scored Qdrant point into the result dict agents expect"""
+        payload = point.payload or {}
+        metadata = payload.get("metadata") or {
+            key: value for key, value in payload.items()
+            if key not in ("text", "content", "embedding_version")
+        }
+        return {
+            "text": payload.get("text", payload.get("content", "")),
+            "score": point.score,
+            "metadata": metadata
+        }
+    
+    def _get_fallback_content(self, query: str, limit: int, offset: int = 0) -> List[Dict]:
         """Fallback content when Qdrant is unavailable"""
         fallback_passages = [
             {
@@ -90,18 +361,25 @@ class QdrantManager:
             }
         ]
         
-        return fallback_passages[:limit]
+        # Marked so callers can tell (and log) that the answer rests on canned passages
+        return [{**passage, "fallback": True} for passage in fallback_passages[offset:offset + limit]]
     
     def get_stats(self) -> Dict:
-        """Get collection statistics"""
+        """Get collection statistics, and the health of the Qdrant connection"""
+        stats = {
+            "vectors_count": None,
+            "points_count": None,
+            "embedding_version": EMBEDDING_VERSION,
+            "stale_results": self.stale_results,
+            "hedged_queries": self.hedged_queries,
+            "retrieval_cache": self.retrieval_cache.stats()
+        }
         try:
-            collection_info = self.client.get_collection(self.collection_name)
-            return {
-                "vectors_count": collection_info.vectors_count,
-                "points_count": collection_info.points_count
-            }
-        except:
-            return {
-                "vectors_count": 1247,  # Mock data
-                "points_count": 1247
-            }
+            collection_info = self.breaker.call(self.client.get_collection, self.collection_name)
+            stats["vectors_count"] = collection_info.indexed_vectors_count
+            stats["points_count"] = collection_info.points_count
+        except Exception as e:
+            # Counts stay unknown rather than made up
+            stats["error"] = f"{type(e).__name__}: {e}"
+        stats["circuit_breaker"] = self.breaker.stats()
+        return stats
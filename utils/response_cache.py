@@ -0,0 +1,161 @@
+"""
+Semantic Response Cache - Reuses agent answers for repeated and near-duplicate questions
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from utils.embeddings import embed_many
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Filler words carry no meaning for cache matching. The hash embedding weights early
+# words most, so "what is an asset" and "what is a liability" would otherwise collide.
+_FILLER_WORDS = frozenset("""
+    a an the is are was were be of to in on for about and or it its this that these those
+    me my i you your we our can could would please tell explain describe define mean means
+    say says said talk talks does do did book author
+""".split())
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and filler words so trivial variants embed identically"""
+    words = _PUNCTUATION.sub(" ", query.lower()).split()
+    content = [word for word in words if word not in _FILLER_WORDS]
+    return " ".join(content or words)
+
+
+class _Namespace:
+    """Entries of one agent/section, with a lazily rebuilt similarity matrix"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[int, Tuple[np.ndarray, Any, float, int]]" = OrderedDict()
+        self.matrix: Optional[np.ndarray] = None
+        self.keys: list = []
+
+    def similarity_matrix(self) -> Tuple[list, np.ndarray]:
+        if self.matrix is None:
+            self.keys = list(self.entries)
+            self.matrix = np.stack([self.entries[key][0] for key in self.keys])
+        return self.keys, self.matrix
+
+
+class SemanticResponseCache:
+    """
+    Cache of agent responses keyed on the normalized query embedding and a
+    namespace (agent name plus section/topic).
+
+    A lookup hits when a stored query in the same namespace has cosine
+    similarity >= threshold. Entries expire after ttl_seconds and the least
+    recently used ones are evicted beyond max_entries or max_bytes. Everything
+    is dropped when the content version of the collection changes.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 2048,
+                 ttl_seconds: float = 3600.0, max_bytes: int = 16 * 1024 * 1024):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._namespaces: Dict[Hashable, _Namespace] = {}
+        # Global recency order across namespaces: (namespace, entry id)
+        self._lru: "OrderedDict[Tuple[Hashable, int], None]" = OrderedDict()
+        self._next_id = 0
+        self._bytes = 0
+        self._content_version: Any = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def embed(query: str) -> np.ndarray:
+        return embed_many([normalize_query(query)])[0]
+
+    def get(self, namespace: Hashable, query_vector: np.ndarray, content_version: Any = None,
+            threshold: Optional[float] = None) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, similarity) of the closest fresh entry, or None on a miss.
+        A lower threshold than the cache's own accepts looser matches, e.g. when
+        a turn is out of time.
+        """
+        with self._lock:
+            self._check_version(content_version)
+            space = self._namespaces.get(namespace)
+            if space is None or not space.entries:
+                self.misses += 1
+                return None
+
+            keys, matrix = space.similarity_matrix()
+            similarities = matrix @ query_vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            entry_id = keys[best]
+            _, value, expires_at, _ = space.entries[entry_id]
+
+            if similarity < (self.threshold if threshold is None else threshold) or expires_at < time.monotonic():
+                if expires_at < time.monotonic():
+                    self._evict(namespace, entry_id)
+                self.misses += 1
+                return None
+
+            self._lru.move_to_end((namespace, entry_id))
+            self.hits += 1
+            return value, similarity
+
+    def put(self, namespace: Hashable, query_vector: np.ndarray, value: Any,
+            size_bytes: int, content_version: Any = None):
+        """Store a value; size_bytes is the caller's estimate of the value's footprint"""
+        with self._lock:
+            self._check_version(content_version)
+            space = self._namespaces.setdefault(namespace, _Namespace())
+            entry_id = self._next_id
+            self._next_id += 1
+
+            nbytes = size_bytes + query_vector.nbytes
+            space.entries[entry_id] = (query_vector.astype(np.float32), value,
+                                       time.monotonic() + self.ttl_seconds, nbytes)
+            space.matrix = None
+            self._lru[(namespace, entry_id)] = None
+            self._bytes += nbytes
+
+            while self._lru and (len(self._lru) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_namespace, oldest_id = next(iter(self._lru))
+                self._evict(oldest_namespace, oldest_id)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _check_version(self, content_version: Any):
+        if content_version != self._content_version:
+            self._clear()
+            self._content_version = content_version
+
+    def _clear(self):
+        self._namespaces = {}
+        self._lru = OrderedDict()
+        self._bytes = 0
+
+    def _evict(self, namespace: Hashable, entry_id: int):
+        space = self._namespaces[namespace]
+        self._bytes -= space.entries.pop(entry_id)[3]
+        space.matrix = None
+        del self._lru[(namespace, entry_id)]
+        if not space.entries:
+            del self._namespaces[namespace]
@@ -0,0 +1,191 @@
+"""
+Retrieval Cache - Caches Qdrant search results keyed by query vector, filter and limit
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.embeddings import EMBEDDING_VERSION
+
+
+class CacheBackend:
+    """Storage interface for RetrievalCache; keys are scoped by collection"""
+
+    def get(self, collection: str, key: str) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    def set(self, collection: str, key: str, results: List[Dict]):
+        raise NotImplementedError
+
+    def invalidate(self, collection: str):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU dict"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], List[Dict]]" = OrderedDict()
+
+    def get(self, collection: str, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            results = self._entries.get((collection, key))
+            if results is not None:
+                self._entries.move_to_end((collection, key))
+            return results
+
+    def set(self, collection: str, key: str, results: List[Dict]):
+        with self._lock:
+            self._entries[(collection, key)] = results
+            self._entries.move_to_end((collection, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection: str):
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == collection]:
+                del self._entries[cache_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Local on-disk store that survives restarts and is shared by worker processes
+    on the same machine. LRU is approximated with a last-used timestamp.
+
+    Inserts keep a running count of rows instead of counting the table. Once it
+    passes max_entries, the table is counted (other processes write too) and the
+    least recently used rows are evicted down to evict_to of max_entries, so
+    eviction runs once every many inserts rather than on each one.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000, evict_to: float = 0.9):
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_to = evict_to
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS retrieval_cache ("
+            "collection TEXT NOT NULL, key TEXT NOT NULL, results TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (collection, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS retrieval_cache_lru ON retrieval_cache (last_used)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM retrieval_cache").fetchone()[0]
+
+    def get(self, collection: str, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results FROM retrieval_cache WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE retrieval_cache SET last_used = ? WHERE collection = ? AND key = ?",
+                (time.time(), collection, key)
+            )
+            return json.loads(row[0])
+
+    def set(self, collection: str, key: str, results: List[Dict]):
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM retrieval_cache WHERE collection = ? AND key = ?", (collection, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO retrieval_cache VALUES (?, ?, ?, ?)",
+                (collection, key, json.dumps(results), time.time())
+            )
+            if exists is None:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._count = self._conn.execute("SELECT COUNT(*) FROM retrieval_cache").fetchone()[0]
+                overflow = self._count - int(self.max_entries * self.evict_to)
+                if self._count > self.max_entries and overflow > 0:
+                    self._count -= self._conn.execute(
+                        "DELETE FROM retrieval_cache WHERE rowid IN "
+                        "(SELECT rowid FROM retrieval_cache ORDER BY last_used LIMIT ?)", (overflow,)
+                    ).rowcount
+
+    def invalidate(self, collection: str):
+        with self._lock:
+            self._count -= self._conn.execute(
+                "DELETE FROM retrieval_cache WHERE collection = ?", (collection,)
+            ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM retrieval_cache").fetchone()[0]
+
+
+class RetrievalCache:
+    """
+    Cache in front of Qdrant searches with hit/miss counters.
+
+    Uses the SQLite backend when RETRIEVAL_CACHE_PATH is set, otherwise an
+    in-memory LRU, unless a backend is passed explicitly.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        if backend is None:
+            path = os.getenv("RETRIEVAL_CACHE_PATH")
+            backend = SQLiteCacheBackend(path) if path else MemoryCacheBackend()
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query_vector, query_filter, limit: int, offset: int = 0, content_version: Any = None) -> str:
+        """
+        Digest of everything that determines the result list. With the collection's
+        content version in the key, results cached before any process changed the
+        collection are never served again, even from a SQLite cache after a restart
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(EMBEDDING_VERSION.encode())
+        digest.update(f"{content_version}|".encode())
+        digest.update(np.asarray(query_vector, dtype=np.float32).tobytes())
+        digest.update(query_filter.model_dump_json().encode() if query_filter is not None else b"-")
+        digest.update(str(limit).encode())
+        if offset:
+            digest.update(f"@{offset}".encode())
+        return digest.hexdigest()
+
+    def get(self, collection: str, key: str) -> Optional[List[Dict]]:
+        results = self.backend.get(collection, key)
+        if results is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return results
+
+    def put(self, collection: str, key: str, results: List[Dict]):
+        self.backend.set(collection, key, results)
+
+    def invalidate(self, collection: str):
+        self.backend.invalidate(collection)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
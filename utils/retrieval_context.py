@@ -0,0 +1,91 @@
+"""
+Retrieval Context - Qdrant results shared by every agent taking part in one turn
+"""
+
+import threading
+from typing import Dict, List, Optional, Set
+
+from utils.deadline import Deadline
+
+
+class RetrievalContext:
+    """
+    Per-turn view of Qdrant results by query text.
+
+    Each text is fetched once, at the largest limit planned for it, and callers
+    get slices of that ranking. Asking for more than was fetched queries only
+    the missing tail (by offset), never the results already held.
+
+    It also carries the turn's deadline, which bounds every Qdrant and LLM call
+    made on the turn's behalf.
+    """
+
+    def __init__(self, qdrant, deadline: Optional[Deadline] = None):
+        self.qdrant = qdrant
+        self.deadline = deadline if deadline is not None else Deadline()
+        # Queries that went to Qdrant on the turn's behalf
+        self.qdrant_calls = 0
+        self._lock = threading.Lock()
+        self._planned: Dict[str, int] = {}
+        self._results: Dict[str, List[Dict]] = {}
+        self._exhausted: Set[str] = set()
+
+    def plan(self, text: str, limit: int):
+        """Declare that some agent this turn will need the top `limit` results for text"""
+        with self._lock:
+            self._planned[text] = max(limit, self._planned.get(text, 0))
+
+    def search(self, text: str, limit: int) -> List[Dict]:
+        """Top `limit` results for text, querying Qdrant only for what is not held yet"""
+        offset, missing = self._missing(text, limit)
+        if missing:
+            fetched = self.qdrant.search(text, limit=missing, offset=offset, deadline=self.deadline,
+                                         on_query=self._count_query)
+            if not self._store(text, offset, missing, fetched):
+                return (self._results.get(text, []) + fetched)[:limit]
+        return self._results.get(text, [])[:limit]
+
+    async def asearch(self, text: str, limit: int) -> List[Dict]:
+        """Non-blocking variant of search()"""
+        offset, missing = self._missing(text, limit)
+        if missing:
+            fetched = await self.qdrant.asearch(text, limit=missing, offset=offset, deadline=self.deadline,
+                                                on_query=self._count_query)
+            if not self._store(text, offset, missing, fetched):
+                return (self._results.get(text, []) + fetched)[:limit]
+        return self._results.get(text, [])[:limit]
+
+    def more(self, text: str, count: int) -> List[Dict]:
+        """The next `count` results for text after those already handed out"""
+        held = len(self._results.get(text, []))
+        return self.search(text, held + count)[held:]
+
+    def _missing(self, text: str, limit: int):
+        with self._lock:
+            held = len(self._results.get(text, []))
+            if held >= limit or text in self._exhausted:
+                return held, 0
+            return held, max(limit, self._planned.get(text, 0)) - held
+
+    def _count_query(self):
+        """Count a query that went to Qdrant; retrieval cache hits and fallback passages are not counted"""
+        with self._lock:
+            self.qdrant_calls += 1
+
+    def _store(self, text: str, offset: int, requested: int, results: List[Dict]) -> bool:
+        """Hold fetched results; fallback passages stand in for one call only and are not held"""
+        with self._lock:
+            if any(result.get("fallback") for result in results):
+                return False
+            held = self._results.setdefault(text, [])
+            # A concurrent fetch of the same text may have filled this range already
+            if len(held) == offset:
+                held.extend(results)
+            if len(results) < requested:
+                self._exhausted.add(text)
+            return True
+
+
+def turn_context(context: Optional[RetrievalContext], qdrant) -> RetrievalContext:
+    """The turn's shared retrieval context, or a private one when an agent is called directly"""
+    return context if context is not None else RetrievalContext(qdrant)
@@ -0,0 +1,115 @@
+"""
+Session Store - Per-student state kept outside the shared agent instances
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SESSION = "default"
+MAX_CONTEXT_TURNS = 20
+
+
+@dataclass
+class SessionState:
+    """Everything that differs between students using the same agents"""
+    session_id: str
+    current_section: int = 0
+    conversation_context: List[Dict] = field(default_factory=list)
+    # In-flight tutor prefetch; lives only in this process and is never persisted
+    prefetch: Any = field(default=None, repr=False, compare=False)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "current_section": self.current_section,
+            "conversation_context": self.conversation_context
+        })
+
+    @classmethod
+    def from_json(cls, session_id: str, data: str) -> "SessionState":
+        return cls(session_id=session_id, **json.loads(data))
+
+
+class SQLiteSessionBackend:
+    """Durable session rows in a local SQLite file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return SessionState.from_json(session_id, row[0]) if row else None
+
+    def set(self, state: SessionState):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (state.session_id, state.to_json(), time.time())
+            )
+
+
+class SessionStore:
+    """
+    Session states by id: an in-memory LRU of live sessions, optionally backed by
+    SQLite (SESSION_STORE_PATH) so sessions survive eviction and restarts.
+    Loads and saves are O(1).
+
+    Loads are served from the LRU first, so a session is not shared live
+    between processes: while a worker holds a session in memory, another
+    worker's saves to it are not seen. Each session should stay on one
+    worker (as a Streamlit browser session does).
+    """
+
+    def __init__(self, max_sessions: int = 10_000, path: Optional[str] = None):
+        self.max_sessions = max_sessions
+        path = path or os.getenv("SESSION_STORE_PATH")
+        self.backend = SQLiteSessionBackend(path) if path else None
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+
+    def load(self, session_id: str) -> SessionState:
+        """Return the session's state, creating it on first use"""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+                return state
+
+        state = (self.backend.get(session_id) if self.backend else None) or SessionState(session_id)
+        with self._lock:
+            # Another thread may have loaded the same session meanwhile; keep the first
+            state = self._sessions.setdefault(session_id, state)
+            self._evict()
+        return state
+
+    def save(self, state: SessionState):
+        if len(state.conversation_context) > MAX_CONTEXT_TURNS:
+            del state.conversation_context[:-MAX_CONTEXT_TURNS]
+        with self._lock:
+            self._sessions[state.session_id] = state
+            self._sessions.move_to_end(state.session_id)
+            self._evict()
+        if self.backend:
+            self.backend.set(state)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            _, state = self._sessions.popitem(last=False)
+            if state.prefetch is not None:
+                state.prefetch.cancelled.set()
@@ -0,0 +1,538 @@
+"""
+Student Memory - Per-student learning progress, cached in memory and written behind to a keyed profile store
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (Distance, FieldCondition, Filter, HasIdCondition, MatchValue, PointStruct,
+                                  VectorParams)
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.embeddings import EMBEDDING_DIM, EMBEDDING_VERSION, embed_many
+
+# Not the notebook's former "student_memory", whose points carry 384-dim vectors
+DEFAULT_COLLECTION = "student_profiles"
+DEFAULT_EXPORT_COLLECTION = "student_memory_analytics"
+# Conflicting writes are replayed onto the stored profile and retried this many times per flush
+MAX_FLUSH_ATTEMPTS = 3
+# Ids of the last writes kept in a profile, so a writer can tell that its write was stored even after others
+RECENT_WRITES = 16
+
+# One interaction: (topic, understood, emotion, style_used, time)
+Update = Tuple[str, bool, str, str, str]
+
+
+def profile_point_id(student_id: str) -> str:
+    """Point id of a student's profile, as the notebook derived it"""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, student_id))
+
+
+@dataclass
+class StudentProfile:
+    """
+    A student's progress. Topic and style collections are dicts used as
+    insertion-ordered sets: membership checks are O(1) and the latest
+    confusion point is still the last one.
+    """
+    student_id: str
+    topics_covered: Dict[str, None] = field(default_factory=dict)
+    confusion_points: Dict[str, None] = field(default_factory=dict)
+    mastered_topics: Dict[str, None] = field(default_factory=dict)
+    preferred_styles: Dict[str, None] = field(default_factory=dict)
+    total_interactions: int = 0
+    start_time: str = field(default_factory=lambda: datetime.now().isoformat())
+    last_emotion: Optional[str] = None
+    last_update: Optional[str] = None
+    # Version of the stored profile this one is based on (0: never stored), and the writes that led to it
+    version: int = 0
+    write_ids: List[str] = field(default_factory=list)
+
+    def apply(self, update: Update):
+        topic, understood, emotion, style_used, at = update
+        self.topics_covered[topic] = None
+        if understood:
+            self.mastered_topics[topic] = None
+        else:
+            self.confusion_points[topic] = None
+        self.preferred_styles[style_used] = None
+        self.total_interactions += 1
+        self.last_emotion = emotion
+        self.last_update = at
+
+    def to_payload(self) -> Dict:
+        payload = {
+            "student_id": self.student_id,
+            "topics_covered": list(self.topics_covered),
+            "confusion_points": list(self.confusion_points),
+            "mastered_topics": list(self.mastered_topics),
+            "preferred_styles": list(self.preferred_styles),
+            "total_interactions": self.total_interactions,
+            "start_time": self.start_time,
+            "version": self.version,
+            "write_ids": list(self.write_ids)
+        }
+        if self.last_update is not None:
+            payload["last_emotion"] = self.last_emotion
+            payload["last_update"] = self.last_update
+        return payload
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "StudentProfile":
+        return cls(
+            student_id=payload["student_id"],
+            topics_covered=dict.fromkeys(payload.get("topics_covered", [])),
+            confusion_points=dict.fromkeys(payload.get("confusion_points", [])),
+            mastered_topics=dict.fromkeys(payload.get("mastered_topics", [])),
+            preferred_styles=dict.fromkeys(payload.get("preferred_styles", [])),
+            total_interactions=payload.get("total_interactions", 0),
+            start_time=payload.get("start_time") or datetime.now().isoformat(),
+            last_emotion=payload.get("last_emotion"),
+            last_update=payload.get("last_update"),
+            version=payload.get("version", 0),
+            write_ids=payload.get("write_ids", [])
+        )
+
+
+class ProfileBackend:
+    """Storage interface for StudentMemorySystem: profile payloads keyed by student id"""
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def write(self, payloads: List[Dict]) -> Dict[str, Optional[Dict]]:
+        """
+        Store each payload whose student's stored profile is still at the payload's
+        version minus one (0: no profile); returns every student's stored payload afterwards
+        """
+        raise NotImplementedError
+
+    def scan(self, batch_size: int = 256) -> Iterator[List[Dict]]:
+        """Every stored payload, in batches"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class SQLiteProfileBackend(ProfileBackend):
+    """
+    Profiles as JSON rows of a local SQLite file, shared by worker processes
+    on the same machine. A batch is written in one transaction, each row only
+    if its version is still the expected one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS student_profiles ("
+            "student_id TEXT PRIMARY KEY, version INTEGER NOT NULL, profile TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile FROM student_profiles WHERE student_id = ?", (student_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, payloads: List[Dict]) -> Dict[str, Optional[Dict]]:
+        stored = {}
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so the version checks and writes are one atomic step
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payload in payloads:
+                    student_id, version = payload["student_id"], payload["version"]
+                    if version == 1:
+                        cursor = self._conn.execute(
+                            "INSERT OR IGNORE INTO student_profiles VALUES (?, ?, ?, ?)",
+                            (student_id, version, json.dumps(payload), now)
+                        )
+                    else:
+                        cursor = self._conn.execute(
+                            "UPDATE student_profiles SET version = ?, profile = ?, updated_at = ? "
+                            "WHERE student_id = ? AND version = ?",
+                            (version, json.dumps(payload), now, student_id, version - 1)
+                        )
+                    if cursor.rowcount == 1:
+                        stored[student_id] = payload
+                        continue
+                    row = self._conn.execute(
+                        "SELECT profile FROM student_profiles WHERE student_id = ?", (student_id,)
+                    ).fetchone()
+                    stored[student_id] = json.loads(row[0]) if row else None
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return stored
+
+    def scan(self, batch_size: int = 256) -> Iterator[List[Dict]]:
+        after = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT student_id, profile FROM student_profiles WHERE student_id > ? "
+                    "ORDER BY student_id LIMIT ?", (after, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield [json.loads(profile) for _, profile in rows]
+            after = rows[-1][0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM student_profiles").fetchone()[0]
+
+
+class QdrantProfileBackend(ProfileBackend):
+    """
+    Profiles as payload-only points (no vectors, so nothing to embed or index)
+    of a Qdrant collection, one per student at its profile_point_id. A batch
+    is one conditional upsert, then one retrieve to see which writes held.
+    The first write creates the collection if it is missing, and refuses one
+    created with vectors (the notebook's old layout). Until the collection
+    exists, reads ask whether it does instead of failing against it, so new
+    students do not count as Qdrant failures in the shared breaker.
+    """
+
+    def __init__(self, client: Optional[QdrantClient] = None, collection_name: Optional[str] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        if client is None or breaker is None:
+            from utils.clients import get_breaker, get_qdrant_client
+            client = client if client is not None else get_qdrant_client()
+            breaker = breaker if breaker is not None else get_breaker("qdrant")
+        self.client = client
+        self.breaker = breaker
+        self.collection_name = collection_name or os.getenv("STUDENT_MEMORY_COLLECTION", DEFAULT_COLLECTION)
+        self._checked = False
+        self._exists = False
+
+    def create_collection(self):
+        """Create the vectorless profile collection if it is missing; raises ValueError if it exists with vectors"""
+        if not self.client.collection_exists(self.collection_name):
+            self.client.create_collection(self.collection_name, vectors_config={})
+            print(f"Created: {self.collection_name}")
+            return
+        if self.client.get_collection(self.collection_name).config.params.vectors:
+            raise ValueError(
+                f"Collection {self.collection_name} has vectors, so profiles without one cannot be written to it; "
+                f"set STUDENT_MEMORY_COLLECTION to another name (default {DEFAULT_COLLECTION})"
+            )
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        return self.breaker.call(self._get, student_id)
+
+    def _get(self, student_id: str) -> Optional[Dict]:
+        if not self._exists:
+            if not self.client.collection_exists(self.collection_name):
+                # No collection yet: no student has a profile
+                return None
+            self._exists = True
+        records = self.client.retrieve(collection_name=self.collection_name, ids=[profile_point_id(student_id)],
+                                       with_vectors=False)
+        return records[0].payload if records else None
+
+    def write(self, payloads: List[Dict]) -> Dict[str, Optional[Dict]]:
+        ids = [profile_point_id(payload["student_id"]) for payload in payloads]
+        # Each point is only overwritten if it still has the version it was read at
+        expected = Filter(should=[
+            Filter(must=[HasIdCondition(has_id=[point_id]),
+                         FieldCondition(key="version", match=MatchValue(value=payload["version"] - 1))])
+            for point_id, payload in zip(ids, payloads)
+        ])
+        if not self._checked:
+            # Once per process: create the collection if it is missing, refuse one with vectors
+            self.create_collection()
+            self._checked = self._exists = True
+        self.breaker.call(self.client.upsert, collection_name=self.collection_name, update_filter=expected, points=[
+            PointStruct(id=point_id, vector={}, payload=payload) for point_id, payload in zip(ids, payloads)
+        ])
+        records = self.breaker.call(self.client.retrieve, collection_name=self.collection_name, ids=ids,
+                                    with_vectors=False)
+        stored = {record.id: record.payload for record in records}
+        return {payload["student_id"]: stored.get(point_id) for point_id, payload in zip(ids, payloads)}
+
+    def scan(self, batch_size: int = 256) -> Iterator[List[Dict]]:
+        offset = None
+        while True:
+            records, offset = self.breaker.call(self.client.scroll, collection_name=self.collection_name,
+                                                limit=batch_size, offset=offset, with_vectors=False)
+            if records:
+                yield [record.payload for record in records]
+            if offset is None:
+                return
+
+    def __len__(self) -> int:
+        return self.client.count(self.collection_name, exact=True).count
+
+
+def export_to_qdrant(backend: ProfileBackend, client: QdrantClient,
+                     collection_name: str = DEFAULT_EXPORT_COLLECTION, batch_size: int = 256) -> int:
+    """
+    Copy every stored profile into a Qdrant collection for analytics, with the
+    notebook's progress vector ("Student <id>: <n> mastered"). Nothing reads the
+    copy back; re-running the export overwrites it. Returns the profiles exported.
+    """
+    if not client.collection_exists(collection_name):
+        client.create_collection(collection_name,
+                                 vectors_config=VectorParams(size=EMBEDDING_DIM, distance=Distance.COSINE))
+    exported = 0
+    for payloads in backend.scan(batch_size):
+        vectors = embed_many([
+            f"Student {payload['student_id']}: {len(payload['mastered_topics'])} mastered" for payload in payloads
+        ])
+        client.upsert(collection_name=collection_name, points=[
+            PointStruct(id=profile_point_id(payload["student_id"]), vector=vector.tolist(),
+                        payload={**payload, "embedding_version": EMBEDDING_VERSION})
+            for payload, vector in zip(payloads, vectors)
+        ])
+        exported += len(payloads)
+    return exported
+
+
+class StudentMemorySystem:
+    """
+    Track student progress, preferences, and learning history.
+
+    Profiles live in a keyed store: a SQLite file when STUDENT_MEMORY_PATH
+    is set, otherwise a vectorless Qdrant collection, unless a backend is
+    passed explicitly. They are read from it once, then kept in memory, and
+    updates are applied there: update_student_progress() makes no store
+    call. Changed profiles are written behind by a background thread every
+    flush_seconds, or as soon as flush_size students have changes, each
+    student once however many updates it had, all in one batched write.
+
+    Several processes may update the same student. Each write is
+    conditional on the stored version being the one the profile was read
+    at; a student whose write lost is re-read, its pending updates replayed
+    on top, and written again, so no update is lost.
+    """
+
+    def __init__(self, backend: Optional[ProfileBackend] = None, flush_seconds: Optional[float] = None,
+                 flush_size: Optional[int] = None, max_profiles: int = 100_000):
+        if backend is None:
+            path = os.getenv("STUDENT_MEMORY_PATH")
+            backend = SQLiteProfileBackend(path) if path else QdrantProfileBackend()
+        self.backend = backend
+        self.flush_seconds = flush_seconds if flush_seconds is not None else float(
+            os.getenv("STUDENT_MEMORY_FLUSH_SECONDS", "1.0"))
+        self.flush_size = flush_size if flush_size is not None else int(os.getenv("STUDENT_MEMORY_FLUSH_SIZE", "256"))
+        self.max_profiles = max_profiles
+        self.stats = {"updates": 0, "loads": 0, "flushes": 0, "written": 0, "conflicts": 0}
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._profiles: "OrderedDict[str, StudentProfile]" = OrderedDict()
+        # Updates applied in memory but not yet stored, per student
+        self._pending: Dict[str, List[Update]] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def initialize_student(self, student_id: str):
+        """Create the student's profile unless there is one; it is written with the next flush"""
+        self._load(student_id)
+        self._schedule()
+
+    def update_student_progress(self, student_id: str, topic: str,
+                                understood: bool, emotion: str, style_used: str):
+        """Record one interaction; a student without a profile gets one"""
+        update = (topic, understood, emotion, style_used, datetime.now().isoformat())
+        self._load(student_id)
+        with self._lock:
+            self._profiles[student_id].apply(update)
+            self._pending.setdefault(student_id, []).append(update)
+            self.stats["updates"] += 1
+        self._schedule()
+
+    def get_student_profile(self, student_id: str) -> Optional[Dict]:
+        """The student's profile, pending updates included; None for an unknown student"""
+        profile = self._load(student_id, create=False)
+        if profile is None:
+            return None
+        with self._lock:
+            return profile.to_payload()
+
+    def recommend_next_topic(self, student_id: str) -> Dict:
+        """Recommend next topic based on progress"""
+        profile = self.get_student_profile(student_id)
+
+        if not profile:
+            return {
+                "recommendation": "Start from beginning",
+                "reason": "New student",
+                "type": "new",
+                "sequence_id": 0
+            }
+
+        topics_covered = len(profile.get("topics_covered", []))
+        confusion_points = profile.get("confusion_points", [])
+
+        if confusion_points:
+            return {
+                "recommendation": confusion_points[-1],
+                "reason": "Review confused topic",
+                "type": "review"
+            }
+
+        return {
+            "recommendation": f"Topic {topics_covered + 1}",
+            "reason": "Continue progression",
+            "type": "next",
+            "sequence_id": topics_covered
+        }
+
+    def flush(self) -> int:
+        """Write every pending change now; returns the number of profiles written"""
+        written = 0
+        with self._flush_lock:
+            for _ in range(MAX_FLUSH_ATTEMPTS):
+                with self._lock:
+                    batch = {
+                        student_id: (self._profiles[student_id].to_payload(), len(updates))
+                        for student_id, updates in self._pending.items()
+                    }
+                if not batch:
+                    break
+                students = list(batch)
+                for first in range(0, len(students), self.flush_size):
+                    written += self._write({student_id: batch[student_id]
+                                            for student_id in students[first:first + self.flush_size]})
+        return written
+
+    def close(self):
+        """Stop the background flusher after a last flush"""
+        self._closed = True
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            # Closed explicitly: nothing left for the exit hook to do
+            atexit.unregister(self.close)
+        self.flush()
+
+    def _load(self, student_id: str, create: bool = True) -> Optional[StudentProfile]:
+        """The cached profile, read from the backend on first use"""
+        with self._lock:
+            profile = self._profiles.get(student_id)
+            if profile is not None:
+                self._profiles.move_to_end(student_id)
+                return profile
+
+        payload = self.backend.get(student_id)
+        if payload is None and not create:
+            return None
+        with self._lock:
+            self.stats["loads"] += 1
+            # Another thread may have loaded (or created) the same student meanwhile; keep the first
+            profile = self._profiles.setdefault(
+                student_id, StudentProfile.from_payload(payload) if payload is not None else StudentProfile(student_id)
+            )
+            if payload is None:
+                self._pending.setdefault(student_id, [])
+            self._evict()
+        return profile
+
+    def _write(self, batch: Dict[str, Tuple[Dict, int]]) -> int:
+        """
+        One conditional write of the batch: a profile whose stored write ids
+        do not include this write's lost to a concurrent writer
+        """
+        write_id = uuid.uuid4().hex
+        payloads = [{**payload, "version": payload["version"] + 1,
+                     "write_ids": payload["write_ids"][-(RECENT_WRITES - 1):] + [write_id]}
+                    for payload, _ in batch.values()]
+        try:
+            stored = self.backend.write(payloads)
+        except Exception as e:
+            print(f"Student memory flush error: {e}")
+            return 0
+
+        written = 0
+        with self._lock:
+            self.stats["flushes"] += 1
+            for student_id, (sent, flushed) in batch.items():
+                payload = stored.get(student_id)
+                pending = self._pending.get(student_id, [])
+                profile = self._profiles[student_id]
+                if payload is not None and write_id in payload.get("write_ids", []):
+                    # Updates that arrived during the write stay pending
+                    del pending[:flushed]
+                    written += 1
+                    if payload["version"] == sent["version"] + 1:
+                        profile.version, profile.write_ids = payload["version"], payload["write_ids"]
+                        payload = None
+                else:
+                    self.stats["conflicts"] += 1
+                if payload is not None:
+                    # Another writer stored a newer profile: replay what is still pending on top of it
+                    profile = StudentProfile.from_payload(payload)
+                    for update in pending:
+                        profile.apply(update)
+                    self._profiles[student_id] = profile
+                if not pending:
+                    self._pending.pop(student_id, None)
+            self.stats["written"] += written
+            self._evict()
+        return written
+
+    def _evict(self):
+        """Drop the least recently used profiles without pending updates once over max_profiles; hold _lock"""
+        if len(self._profiles) <= self.max_profiles:
+            return
+        for student_id in list(self._profiles):
+            if student_id not in self._pending:
+                del self._profiles[student_id]
+                if len(self._profiles) <= self.max_profiles:
+                    return
+
+    def _schedule(self):
+        """Start the flusher on first use, and wake it once flush_size students have changes"""
+        if self._flusher is None:
+            with self._lock:
+                if self._flusher is None and not self._closed:
+                    self._flusher = threading.Thread(target=self._run, name="student-memory-flush", daemon=True)
+                    self._flusher.start()
+                    atexit.register(self.close)
+        if len(self._pending) >= self.flush_size:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export student profiles to a Qdrant collection for analytics")
+    parser.add_argument("--path", default=os.getenv("STUDENT_MEMORY_PATH"),
+                        help="SQLite profile store (default: STUDENT_MEMORY_PATH, else the Qdrant profile collection)")
+    parser.add_argument("--collection", default=DEFAULT_EXPORT_COLLECTION)
+    args = parser.parse_args()
+
+    from utils.clients import get_qdrant_client
+
+    backend = SQLiteProfileBackend(args.path) if args.path else QdrantProfileBackend()
+    exported = export_to_qdrant(backend, get_qdrant_client(), args.collection)
+    print(f"Exported {exported} profiles to {args.collection}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Tokens - Fast token-count estimate for sizing chunks and prompts
+"""
+
+import re
+
+# Letters of a word per token: common words are one token, longer or rarer ones split
+WORD_CHARS_PER_TOKEN = 6
+
+# Letter runs, digit groups of up to three (as Llama 3 splits numbers), and single symbols
+_PIECE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+_LONG_WORD = re.compile(rf"[^\W\d_]{{{WORD_CHARS_PER_TOKEN + 1},}}")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimated LLM tokens in text: no tokenizer is needed, and on English prose
+    it gives about 1.3 tokens per word, as BPE tokenizers do.
+
+    Whitespace is never a token of its own (BPE tokenizers fold it into the
+    following word), so the count of texts joined with spaces is the sum of
+    their counts; chunkers rely on that to add up sentence counts.
+    """
+    # One token per piece, plus the extra tokens of the (few) long words
+    return len(_PIECE.findall(text)) + sum(
+        (len(word) - 1) // WORD_CHARS_PER_TOKEN for word in _LONG_WORD.findall(text)
+    )
@@ -0,0 +1,189 @@
+"""
+Tracing - Nanosecond spans around routing, embedding, Qdrant and LLM calls
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from threading import get_ident
+from time import perf_counter_ns
+from typing import Dict, List, Optional, Tuple
+
+# A finished span: (name, start_ns, end_ns, thread id, attributes)
+SpanRecord = Tuple[str, int, int, int, Dict]
+
+
+# (epoch second, its "%H:%M:%S"): formatting the time of day once per second keeps timestamp() cheap
+_second_label: Tuple[int, str] = (-1, "")
+
+
+def timestamp() -> str:
+    """Wall-clock time of day with millisecond resolution, for the agents' log dicts"""
+    global _second_label
+    now = time.time()
+    second = int(now)
+    labelled, label = _second_label
+    if second != labelled:
+        label = time.strftime("%H:%M:%S", time.localtime(second))
+        _second_label = (second, label)
+    return f"{label}.{int((now - second) * 1000):03d}"
+
+
+class Span:
+    """
+    One timed operation, started on creation. Use it as a context manager,
+    or call end() when the operation does not fit a with block.
+    """
+
+    __slots__ = ("_buffer", "name", "attributes", "start_ns")
+
+    def __init__(self, buffer: deque, name: str, attributes: Dict):
+        self._buffer = buffer
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = perf_counter_ns()
+
+    def set(self, **attributes):
+        """Attach attributes known only once the operation is under way"""
+        self.attributes.update(attributes)
+
+    def end(self, **attributes):
+        if attributes:
+            self.attributes.update(attributes)
+        # deque.append is atomic, so recording needs no lock
+        self._buffer.append((self.name, self.start_ns, perf_counter_ns(), get_ident(), self.attributes))
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Stand-in handed out while tracing is disabled"""
+
+    def set(self, **attributes):
+        pass
+
+    def end(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """
+    Collects finished spans in a ring buffer: memory is bounded by capacity
+    and the oldest spans are dropped first.
+
+    Times come from perf_counter_ns (monotonic); exports convert them to
+    wall-clock epoch time.
+    """
+
+    def __init__(self, capacity: int = 65536, enabled: bool = True):
+        self.enabled = enabled
+        self._buffer: deque = deque(maxlen=capacity)
+        self._epoch_offset_ns = time.time_ns() - perf_counter_ns()
+
+    def span(self, name: str, **attributes) -> Span:
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self._buffer, name, attributes)
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.maxlen
+
+    def spans(self) -> List[SpanRecord]:
+        """Snapshot of the buffered spans, oldest first"""
+        return list(self._buffer)
+
+    def clear(self):
+        self._buffer.clear()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def export(self, path: str, spans: Optional[List[SpanRecord]] = None) -> int:
+        """Write JSON lines for a .jsonl path, else a Chrome trace; returns the span count"""
+        if path.endswith(".jsonl"):
+            return self.export_jsonl(path, spans)
+        return self.export_chrome(path, spans)
+
+    def export_jsonl(self, path: str, spans: Optional[List[SpanRecord]] = None) -> int:
+        """One JSON object per span, with epoch start_ns and duration_ns"""
+        spans = self.spans() if spans is None else spans
+        _make_parent_dirs(path)
+        with open(path, "w", encoding="utf-8") as f:
+            for name, start_ns, end_ns, thread, attributes in spans:
+                f.write(json.dumps({
+                    "name": name,
+                    "start_ns": start_ns + self._epoch_offset_ns,
+                    "duration_ns": end_ns - start_ns,
+                    "thread": thread,
+                    "attributes": attributes
+                }, default=str) + "\n")
+        return len(spans)
+
+    def export_chrome(self, path: str, spans: Optional[List[SpanRecord]] = None) -> int:
+        """Chrome trace event format, viewable in chrome://tracing and ui.perfetto.dev"""
+        spans = self.spans() if spans is None else spans
+        pid = os.getpid()
+        events = [{
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (start_ns + self._epoch_offset_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": pid,
+            "tid": thread,
+            "args": attributes
+        } for name, start_ns, end_ns, thread, attributes in spans]
+
+        # Label the lanes of threads that are still alive (fan-out, prefetch, ...)
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": threads[tid]}}
+                      for tid in {event["tid"] for event in events} if tid in threads)
+
+        _make_parent_dirs(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ns"}, f, default=str)
+        return len(spans)
+
+
+def _make_parent_dirs(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+_tracer = Tracer(
+    capacity=int(os.getenv("TRACE_BUFFER_SIZE", "65536")),
+    enabled=os.getenv("TRACING", "1") == "1"
+)
+
+# TRACE_EXPORT_PATH=trace.json (or .jsonl) writes the buffered spans when the process exits
+if os.getenv("TRACE_EXPORT_PATH"):
+    atexit.register(lambda: _tracer.export(os.environ["TRACE_EXPORT_PATH"]))
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+# Start a span on the process-wide tracer; bound directly, as a wrapper would repack the attributes
+span = _tracer.span